@@ -4,17 +4,29 @@
 运行完整的文档处理流水线
 """
 
+import argparse
 import sys
 from pathlib import Path
 
 # 添加src目录到Python路径
 sys.path.append(str(Path(__file__).parent / "src"))
 
-from src.main import DocumentProcessor
+from src.main import DocumentProcessor, setup_logging
 
 
 def main():
     """主程序入口"""
+    parser = argparse.ArgumentParser(description="知识库文档处理工具")
+    parser.add_argument(
+        "--resume", action="store_true", help="从上次中断处继续，跳过已完成的工作"
+    )
+    parser.add_argument(
+        "--upload",
+        action="store_true",
+        help="流水线完成后将知识块连同自定义索引上传到数据集",
+    )
+    args = parser.parse_args()
+
     print("=" * 50)
     print("知识库文档处理工具")
     print("=" * 50)
@@ -34,6 +46,7 @@ def main():
     try:
         # 创建处理器实例
         processor = DocumentProcessor(config_path)
+        setup_logging(processor.config.metrics.log_level)
 
         # 定义路径
         output_dir = Path("./data")
@@ -44,7 +57,9 @@ def main():
         print(f"📁 输出目录: {output_dir}")
 
         # 运行完整流水线
-        processor.run_full_pipeline(source_dir, output_dir, qa_file)
+        processor.run_full_pipeline(source_dir, output_dir, qa_file, resume=args.resume)
+        if args.upload:
+            processor.upload_chunks(output_dir / "out" / "chunks")
 
         print("✅ 处理完成！")
         print(f"📄 结果保存在: {output_dir}")
@@ -0,0 +1,114 @@
+"""
+增量构建缓存模块
+以输入内容哈希和阶段配置为键记录各阶段产物，跳过已是最新的处理
+"""
+
+import hashlib
+import json
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+# 产物描述: (产物ID, 输入文件列表, 输出文件列表)
+Artifact = Tuple[str, List[Path], List[Path]]
+
+# 文件系统时间戳精度的容差(秒)
+MTIME_SLACK = 2.0
+
+
+class BuildManifest:
+    """构建清单"""
+
+    def __init__(self, manifest_path: Path):
+        self.manifest_path = manifest_path
+        self.stages: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        # 文件哈希缓存: 路径 -> [大小, 修改时间, sha256]，未变化的文件无需重新计算
+        self.file_hashes: Dict[str, List[Any]] = {}
+
+        if manifest_path.exists():
+            try:
+                data = json.loads(manifest_path.read_text(encoding="utf-8"))
+                self.stages = data.get("stages", {})
+                self.file_hashes = data.get("files", {})
+            except (json.JSONDecodeError, OSError) as e:
+                print(f"构建清单读取失败，将全部重新构建: {e}")
+
+    def file_hash(self, path: Path) -> str:
+        """计算文件内容哈希"""
+        stat = path.stat()
+        cache_key = str(path.resolve())
+        cached = self.file_hashes.get(cache_key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+
+        sha = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self.file_hashes[cache_key] = [stat.st_size, stat.st_mtime_ns, digest]
+        return digest
+
+    def stage_key(self, stage: str, inputs: List[Path], config: Dict[str, Any]) -> str:
+        """由阶段名、阶段配置和全部输入内容计算产物键"""
+        sha = hashlib.sha256()
+        sha.update(stage.encode("utf-8"))
+        sha.update(
+            json.dumps(config, sort_keys=True, ensure_ascii=False).encode("utf-8")
+        )
+        for path in inputs:
+            sha.update(path.name.encode("utf-8"))
+            sha.update(self.file_hash(path).encode("utf-8"))
+        return sha.hexdigest()
+
+    def is_fresh(self, stage: str, artifact: Artifact, config: Dict[str, Any]) -> bool:
+        """判断产物是否已是最新"""
+        artifact_id, inputs, outputs = artifact
+        entry = self.stages.get(stage, {}).get(artifact_id)
+        if not entry or not all(path.exists() for path in inputs + outputs):
+            return False
+        return entry.get("key") == self.stage_key(stage, inputs, config)
+
+    def filter_stale(
+        self, stage: str, artifacts: List[Artifact], config: Dict[str, Any]
+    ) -> List[Artifact]:
+        """筛选出需要重新构建的产物"""
+        stale = [a for a in artifacts if not self.is_fresh(stage, a, config)]
+        skipped = len(artifacts) - len(stale)
+        if skipped:
+            print(f"[{stage}] 跳过 {skipped} 个已是最新的产物")
+        return stale
+
+    def record(
+        self,
+        stage: str,
+        artifacts: List[Artifact],
+        config: Dict[str, Any],
+        started_at: float,
+    ) -> None:
+        """记录本次构建成功的产物（输出均在本次构建开始后生成）并保存清单"""
+        entries = self.stages.setdefault(stage, {})
+        for artifact_id, inputs, outputs in artifacts:
+            if not all(path.exists() for path in inputs):
+                continue
+            if not outputs or not all(
+                path.exists() and path.stat().st_mtime >= started_at - MTIME_SLACK
+                for path in outputs
+            ):
+                continue
+            entries[artifact_id] = {
+                "key": self.stage_key(stage, inputs, config),
+                "outputs": [str(path) for path in outputs],
+                "built_at": time.time(),
+            }
+        self.save()
+
+    def save(self) -> None:
+        """保存构建清单"""
+        self.manifest_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"stages": self.stages, "files": self.file_hashes}
+        tmp_path = self.manifest_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        tmp_path.replace(self.manifest_path)
@@ -0,0 +1,201 @@
+"""
+批量索引模块
+预取数据分页、多条数据合并生成索引，并在多个集合之间有限并发地执行
+"""
+
+import queue
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Dict, Iterator, List, Optional
+
+from .checkpoint import CheckpointJournal
+from .llm_client import LLMClient
+
+# 分页预取线程结束的标记
+_END = object()
+
+
+class IndexStats:
+    """索引生成统计"""
+
+    def __init__(self):
+        self.items = 0
+        self.indexed = 0
+        self.failed = 0
+        # 数据获取中断的集合ID
+        self.failed_collections: List[str] = []
+        self._lock = threading.Lock()
+
+    def add(self, items: int, indexed: int) -> None:
+        with self._lock:
+            self.items += items
+            self.indexed += indexed
+            self.failed += items - indexed
+
+    def add_failed_collection(self, collection_id: str) -> None:
+        with self._lock:
+            self.failed_collections.append(collection_id)
+
+    def __str__(self) -> str:
+        return (
+            f"数据 {self.items} 条, 成功 {self.indexed} 条, 失败 {self.failed} 条, "
+            f"获取中断的集合 {len(self.failed_collections)} 个"
+        )
+
+
+class BulkIndexer:
+    """批量自定义索引生成器"""
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        batch_size: int = 5,
+        page_size: int = 30,
+        prefetch_pages: int = 2,
+        collection_workers: int = 4,
+        journal: Optional[CheckpointJournal] = None,
+    ):
+        self.llm_client = llm_client
+        # 每次大模型请求处理的数据条数
+        self.batch_size = max(1, batch_size)
+        self.page_size = page_size
+        # 每个集合预先取回、尚未处理的分页数上限
+        self.prefetch_pages = max(1, prefetch_pages)
+        # 同时处理的集合数
+        self.collection_workers = max(1, collection_workers)
+        # 断点日志：记录已更新索引的数据ID，续跑时跳过
+        self.journal = journal
+        self.stats = IndexStats()
+
+        # 所有集合共用的批处理线程池，大小与大模型并发上限一致
+        self._executor = None
+        # 已提交未完成的批次数上限，避免预取速度远超处理速度
+        self._inflight = threading.BoundedSemaphore(self.llm_client.concurrency * 2)
+
+    def index_collections(self, collection_ids: List[str]) -> IndexStats:
+        """为多个集合中的全部数据生成并更新索引"""
+        self.stats = IndexStats()
+        with ThreadPoolExecutor(
+            max_workers=self.llm_client.concurrency
+        ) as self._executor, ThreadPoolExecutor(
+            max_workers=self.collection_workers
+        ) as collections:
+            list(collections.map(self.index_collection, collection_ids))
+        self._executor = None
+
+        print(f"自定义索引统计: {self.stats}")
+        return self.stats
+
+    def index_collection(self, collection_id: str) -> None:
+        """处理单个集合：边预取分页边按批次提交"""
+        futures: List[Future] = []
+        batch: List[Dict[str, Any]] = []
+        completed = True
+
+        try:
+            for data_list in self.iter_pages(collection_id):
+                for item in data_list:
+                    if self.journal and self.journal.done("index", item.get("_id")):
+                        continue
+                    batch.append(item)
+                    if len(batch) >= self.batch_size:
+                        futures.append(self._submit(batch))
+                        batch = []
+            if batch:
+                futures.append(self._submit(batch))
+        except Exception as e:
+            # 请求失败或分页、响应格式异常只中断当前集合，已提交的批次照常完成
+            print(f"获取集合数据失败 {collection_id}: {e}")
+            self.stats.add_failed_collection(collection_id)
+            completed = False
+
+        for future in futures:
+            future.result()
+        if completed:
+            print(f"集合索引完成: {collection_id}")
+
+    def iter_pages(self, collection_id: str) -> Iterator[List[Dict[str, Any]]]:
+        """按顺序产出集合的数据分页，后台线程提前获取后续分页"""
+        pages: "queue.Queue" = queue.Queue(maxsize=self.prefetch_pages)
+        stop = threading.Event()
+
+        def put(item: Any) -> bool:
+            while not stop.is_set():
+                try:
+                    pages.put(item, timeout=0.5)
+                    return True
+                except queue.Full:
+                    continue
+            return False
+
+        def produce() -> None:
+            page = 0
+            fetched = 0
+            try:
+                while not stop.is_set():
+                    response = self.llm_client.get_data_list(
+                        collection_id, page, self.page_size
+                    )
+                    data = response.get("data", {})
+                    data_list = data.get("list", [])
+                    if not data_list or not put(data_list):
+                        break
+                    fetched += len(data_list)
+                    total = data.get("total")
+                    if isinstance(total, int) and fetched >= total:
+                        break
+                    page += 1
+            except Exception as e:
+                put(e)
+                return
+            put(_END)
+
+        thread = threading.Thread(target=produce, daemon=True)
+        thread.start()
+        try:
+            while True:
+                item = pages.get()
+                if item is _END:
+                    break
+                if isinstance(item, Exception):
+                    raise item
+                yield item
+        finally:
+            stop.set()
+            thread.join()
+
+    def _submit(self, batch: List[Dict[str, Any]]) -> Future:
+        self._inflight.acquire()
+        future = self._executor.submit(self._process_batch, batch)
+        future.add_done_callback(lambda _: self._inflight.release())
+        return future
+
+    def _process_batch(self, batch: List[Dict[str, Any]]) -> None:
+        """一次请求生成一批数据的索引，缺失的条目逐条补生成后更新"""
+        try:
+            results = self.llm_client.generate_custom_indexes_batch(
+                [(item["_id"], item["q"]) for item in batch]
+            )
+        except Exception as e:
+            # 整批失败时逐条补生成，格式异常的条目在下面单独计为失败
+            print(f"批量生成索引失败: {e}")
+            results = {}
+
+        indexed = 0
+        for item in batch:
+            data_id = None
+            try:
+                data_id, data_q = item["_id"], item["q"]
+                index_list = results.get(data_id)
+                if index_list is None:
+                    index_list = self.llm_client.generate_custom_indexes(
+                        data_q, data_id
+                    )
+                if index_list:
+                    self.llm_client.add_index(data_id, data_q, index_list)
+                    if self.journal:
+                        self.journal.record("index", data_id)
+                    indexed += 1
+            except Exception as e:
+                print(f"为数据 {data_id} 添加索引失败: {e}")
+        self.stats.add(len(batch), indexed)
@@ -0,0 +1,343 @@
+"""
+批量上传模块
+将本地切分的知识块连同自定义索引分批写入数据集，有限并发执行；
+写入请求失败后等待训练队列清空，再核对服务端已有的数据，只重发缺少的部分，保证重试不产生重复数据；
+上传前删除集合中本地JSONL已不包含的知识块。整个JSONL文件被删除时，对应的集合不会删除
+"""
+
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from .checkpoint import CheckpointJournal
+from .http_transport import RETRY_STATUS, TransportError
+from .llm_client import LLMClient
+
+# 写入知识块ID的数据字段：服务端原样保存并在数据列表中返回，不影响数据顺序；
+# 顺序由 chunkIndex（知识块在JSONL中的序号）决定
+ID_FIELD = "chunkId"
+
+
+def content_hash(q: str) -> str:
+    """知识块内容摘要，与 MarkdownChunker 生成的 hash 一致"""
+    return hashlib.sha1(q.encode("utf-8")).hexdigest()[:16]
+
+
+class UploadStats:
+    """上传统计"""
+
+    def __init__(self):
+        self.chunks = 0
+        self.uploaded = 0
+        self.skipped = 0
+        self.failed = 0
+        self.replaced = 0
+        self.removed = 0
+        self._lock = threading.Lock()
+
+    def add(self, **counts: int) -> None:
+        with self._lock:
+            for name, n in counts.items():
+                setattr(self, name, getattr(self, name) + n)
+
+    def __str__(self) -> str:
+        return (
+            f"知识块 {self.chunks} 个, 上传 {self.uploaded} 个, "
+            f"未变化跳过 {self.skipped} 个, 替换旧数据 {self.replaced} 条, "
+            f"删除已移除的知识块 {self.removed} 条, 失败 {self.failed} 个"
+        )
+
+
+class BulkUploader:
+    """知识块批量上传器"""
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        batch_size: int = 50,
+        workers: int = 4,
+        with_indexes: bool = True,
+        index_batch_size: int = 5,
+        page_size: int = 30,
+        journal: Optional[CheckpointJournal] = None,
+        queue_interval: float = 2.0,
+        queue_timeout: float = 120.0,
+    ):
+        self.llm_client = llm_client
+        # 每次写入请求的知识块数
+        self.batch_size = max(1, batch_size)
+        # 同时进行的写入批次数
+        self.workers = max(1, workers)
+        # 为True时写入前生成自定义索引，随数据一起写入
+        self.with_indexes = with_indexes
+        self.index_batch_size = max(1, index_batch_size)
+        self.page_size = page_size
+        # 上传记录：知识块ID -> 已上传内容的hash，再次运行时跳过未变化的知识块
+        self.journal = journal
+        # 写入失败后等待训练队列清空的轮询间隔和最长时间（秒）
+        self.queue_interval = queue_interval
+        self.queue_timeout = queue_timeout
+        self.stats = UploadStats()
+        self._progress_lock = threading.Lock()
+        self._done = 0
+        self._total = 0
+
+    def upload_dir(
+        self, chunk_dir: Path, parent_id: Optional[str] = None
+    ) -> UploadStats:
+        """上传目录下全部JSONL知识块文件，每个文件对应父级下的一个同名集合"""
+        files = sorted(chunk_dir.rglob("*.jsonl"))
+        plans = []
+        for path in files:
+            records = self._load(path)
+            pending = [r for r in records if not self._uploaded(r)]
+            self.stats.add(chunks=len(records), skipped=len(records) - len(pending))
+            plans.append((path.stem, records, pending))
+
+        self._total = sum(len(pending) for _, _, pending in plans)
+        self._done = 0
+        if not plans:
+            print(f"上传完成: {self.stats}")
+            return self.stats
+
+        # 只为有待上传知识块的文件创建集合，已有的集合都要核对已移除的知识块
+        collections = self._ensure_collections(
+            parent_id, [name for name, _, pending in plans if pending]
+        )
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            futures = []
+            for name, records, pending in plans:
+                collection_id = collections.get(name)
+                if collection_id is None or not self._sync_existing(
+                    collection_id, records, pending
+                ):
+                    if pending:
+                        self._finish_batch(pending, ok=False)
+                    continue
+                for i in range(0, len(pending), self.batch_size):
+                    batch = pending[i : i + self.batch_size]
+                    futures.append(
+                        executor.submit(self._upload_batch, collection_id, batch)
+                    )
+            for future in as_completed(futures):
+                future.result()
+
+        print(f"上传完成: {self.stats}")
+        return self.stats
+
+    @staticmethod
+    def _load(path: Path) -> List[Dict[str, Any]]:
+        records = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    record.setdefault("hash", content_hash(record["q"]))
+                    # 数据按 chunkIndex 排序，取知识块在文件中的序号
+                    record["index"] = len(records)
+                    records.append(record)
+        return records
+
+    def _uploaded(self, record: Dict[str, Any]) -> bool:
+        return (
+            self.journal is not None
+            and self.journal.get("upload", record["id"]) == record["hash"]
+        )
+
+    def _list_collections(self, parent_id: Optional[str]) -> Dict[str, str]:
+        """父级下的集合: 名称 -> 集合ID"""
+        names: Dict[str, str] = {}
+        page = 0
+        while True:
+            data = self.llm_client.get_collection_list(
+                parent_id, page, self.page_size
+            ).get("data", {})
+            items = data.get("list", [])
+            for item in items:
+                names.setdefault(item.get("name"), item.get("_id"))
+            page += 1
+            total = data.get("total")
+            if not items or (isinstance(total, int) and page * self.page_size >= total):
+                return names
+
+    def _ensure_collections(
+        self, parent_id: Optional[str], names: List[str]
+    ) -> Dict[str, str]:
+        """取得父级下已有的集合，names 中不存在的创建；创建请求失败后按名称核对，避免重复创建"""
+        try:
+            collections = self._list_collections(parent_id)
+        except TransportError as e:
+            print(f"获取集合列表失败: {e}")
+            return {}
+
+        transport = self.llm_client.transport
+        for name in names:
+            for attempt in range(transport.max_retries + 1):
+                if name in collections:
+                    break
+                try:
+                    collections[name] = self.llm_client.create_collection(
+                        name, parent_id
+                    )
+                    break
+                except TransportError as e:
+                    print(f"创建集合失败 {name}: {e}")
+                    if not _retryable(e) or attempt == transport.max_retries:
+                        break
+                    time.sleep(transport.backoff(attempt))
+                    try:
+                        # 请求可能已在服务端生效
+                        collections.update(self._list_collections(parent_id))
+                    except TransportError:
+                        pass
+        return collections
+
+    def _existing(self, collection_id: str) -> Dict[str, List[str]]:
+        """集合中已有的数据: ID_FIELD 的值 -> 数据ID列表，没有该字段的数据不计入"""
+        existing: Dict[str, List[str]] = {}
+        page = 0
+        while True:
+            data = self.llm_client.get_data_list(
+                collection_id, page, self.page_size
+            ).get("data", {})
+            items = data.get("list", [])
+            for item in items:
+                key = item.get(ID_FIELD)
+                if isinstance(key, str):
+                    existing.setdefault(key, []).append(item.get("_id"))
+            page += 1
+            total = data.get("total")
+            if not items or (isinstance(total, int) and page * self.page_size >= total):
+                return existing
+
+    def _sync_existing(
+        self,
+        collection_id: str,
+        records: List[Dict[str, Any]],
+        pending: List[Dict[str, Any]],
+    ) -> bool:
+        """
+        删除集合中待上传知识块的旧数据，以及本地JSONL已不包含的知识块；
+        失败时返回False，该文件的知识块本次不上传，避免与旧数据重复
+        """
+        local = {r["id"] for r in records}
+        pending_ids = {r["id"] for r in pending}
+        try:
+            for key, data_ids in self._existing(collection_id).items():
+                if key in pending_ids:
+                    counter = "replaced"
+                elif key not in local:
+                    counter = "removed"
+                else:
+                    continue
+                for data_id in data_ids:
+                    self.llm_client.delete_data(data_id)
+                    self.stats.add(**{counter: 1})
+            return True
+        except TransportError as e:
+            print(f"删除旧数据失败 {collection_id}: {e}")
+            return False
+
+    def _upload_batch(self, collection_id: str, batch: List[Dict[str, Any]]) -> None:
+        indexes = self._generate_indexes(batch) if self.with_indexes else {}
+        items = {
+            r["id"]: {
+                "q": r["q"],
+                "a": "",
+                "indexes": indexes.get(r["id"], []),
+                "chunkIndex": r["index"],
+                ID_FIELD: r["id"],
+            }
+            for r in batch
+        }
+        ok = self._push(collection_id, batch, items)
+        if ok and self.journal is not None:
+            for record in batch:
+                self.journal.record("upload", record["id"], record["hash"])
+        self._finish_batch(batch, ok)
+
+    def _generate_indexes(
+        self, batch: List[Dict[str, Any]]
+    ) -> Dict[str, List[Dict[str, str]]]:
+        """分组生成自定义索引，失败的分组不带索引写入"""
+        indexes: Dict[str, List[Dict[str, str]]] = {}
+        for i in range(0, len(batch), self.index_batch_size):
+            group = batch[i : i + self.index_batch_size]
+            try:
+                indexes.update(
+                    self.llm_client.generate_custom_indexes_batch(
+                        [(r["id"], r["q"]) for r in group]
+                    )
+                )
+            except TransportError as e:
+                print(f"生成索引失败: {e}")
+        return indexes
+
+    def _push(
+        self,
+        collection_id: str,
+        batch: List[Dict[str, Any]],
+        items: Dict[str, Dict[str, Any]],
+    ) -> bool:
+        """
+        写入一批数据；失败后等待训练队列清空，再查出服务端已有的数据，只重发缺少的部分
+
+        写入的数据排队训练完成后才出现在数据列表中，队列未清空时无法判断缺少哪些，不再重发
+        """
+        transport = self.llm_client.transport
+        remaining = list(batch)
+        for attempt in range(transport.max_retries + 1):
+            if attempt:
+                time.sleep(transport.backoff(attempt - 1))
+                try:
+                    if not self._wait_training():
+                        print(f"训练队列未清空，放弃重发 {collection_id}")
+                        return False
+                    existing = self._existing(collection_id)
+                except TransportError as e:
+                    print(f"核对已有数据失败 {collection_id}: {e}")
+                    continue
+                remaining = [r for r in remaining if r["id"] not in existing]
+                if not remaining:
+                    return True
+            try:
+                self.llm_client.push_data(
+                    collection_id, [items[r["id"]] for r in remaining]
+                )
+                return True
+            except TransportError as e:
+                print(f"写入数据失败 {collection_id}: {e}")
+                if not _retryable(e):
+                    return False
+        return False
+
+    def _wait_training(self) -> bool:
+        """等待数据集的训练队列清空，超过 queue_timeout 秒仍未清空时返回False"""
+        deadline = time.monotonic() + self.queue_timeout
+        while True:
+            data = self.llm_client.get_training_queue().get("data", {})
+            queued = data.get("trainingCount", 0) + data.get("rebuildingCount", 0)
+            if not queued:
+                return True
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(self.queue_interval)
+
+    def _finish_batch(self, batch: List[Dict[str, Any]], ok: bool) -> None:
+        if ok:
+            self.stats.add(uploaded=len(batch))
+        else:
+            self.stats.add(failed=len(batch))
+        with self._progress_lock:
+            self._done += len(batch)
+            print(f"上传进度: {self._done}/{self._total}")
+
+
+def _retryable(error: TransportError) -> bool:
+    """网络错误、限流和服务端临时错误可以重试"""
+    return error.status_code is None or error.status_code in RETRY_STATUS
@@ -0,0 +1,62 @@
+"""
+断点续跑模块
+以追加写入的JSONL日志逐条记录已完成的工作，中途失败后可从断点继续
+"""
+
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+
+
+class CheckpointJournal:
+    """断点日志"""
+
+    def __init__(self, journal_path: Path, resume: bool = False):
+        self.journal_path = journal_path
+        # (范围, 键) -> 记录的值
+        self.entries: Dict[Tuple[str, str], Any] = {}
+        self._lock = threading.Lock()
+
+        journal_path.parent.mkdir(parents=True, exist_ok=True)
+        if resume and journal_path.exists():
+            self._load()
+            print(f"从断点继续: 已完成 {len(self.entries)} 项 ({journal_path})")
+        # 不续跑时清空旧日志
+        self._file = open(journal_path, "a" if resume else "w", encoding="utf-8")
+
+    def _load(self) -> None:
+        with open(self.journal_path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except ValueError:
+                    # 写入中途中断的最后一行
+                    continue
+                self.entries[(entry["scope"], entry["key"])] = entry.get("value")
+
+    def done(self, scope: str, key: str) -> bool:
+        """该项是否已完成"""
+        with self._lock:
+            return (scope, key) in self.entries
+
+    def get(self, scope: str, key: str, default: Any = None) -> Any:
+        """读取已完成项记录的值"""
+        with self._lock:
+            return self.entries.get((scope, key), default)
+
+    def record(self, scope: str, key: str, value: Optional[Any] = None) -> None:
+        """记录一项已完成的工作，写入后立即落盘"""
+        line = json.dumps(
+            {"scope": scope, "key": key, "value": value}, ensure_ascii=False
+        )
+        with self._lock:
+            self.entries[(scope, key)] = value
+            self._file.write(line + "\n")
+            self._file.flush()
+            os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        with self._lock:
+            self._file.close()
@@ -0,0 +1,224 @@
+"""
+集合树遍历模块
+按层广度优先并发获取集合列表，并将集合树快照保存到本地，
+再次运行时只重新获取更新时间发生变化的文件夹子树
+"""
+
+import json
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from .http_transport import TransportError
+from .llm_client import LLMClient
+
+FOLDER_TYPE = "folder"
+
+
+class CollectionCrawler:
+    """集合树遍历器"""
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        page_size: int = 30,
+        workers: int = 8,
+        snapshot_path: Optional[Path] = None,
+    ):
+        self.llm_client = llm_client
+        self.page_size = page_size
+        self.workers = max(1, workers)
+        self.snapshot_path = snapshot_path
+
+        # 集合ID -> {parent_id, name, type, update_time}
+        self.nodes: Dict[str, Dict[str, Any]] = {}
+        # 子集合已完整记录在快照中的父级ID
+        self.listed: Set[str] = set()
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self) -> None:
+        if self.snapshot_path is None or not self.snapshot_path.exists():
+            return
+        try:
+            data = json.loads(self.snapshot_path.read_text(encoding="utf-8"))
+            self.nodes = data.get("collections", {})
+            self.listed = set(data.get("listed", []))
+        except (json.JSONDecodeError, OSError) as e:
+            print(f"集合快照读取失败，将重新获取全部集合: {e}")
+
+    def save(self) -> None:
+        """保存集合树快照"""
+        if self.snapshot_path is None:
+            return
+        self.snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+        data = {"collections": self.nodes, "listed": sorted(self.listed)}
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_text(
+            json.dumps(data, ensure_ascii=False, indent=2), encoding="utf-8"
+        )
+        tmp_path.replace(self.snapshot_path)
+
+    def children(self) -> Dict[str, List[str]]:
+        """父级ID -> 子集合ID列表"""
+        index: Dict[str, List[str]] = {}
+        for collection_id, node in self.nodes.items():
+            index.setdefault(node.get("parent_id"), []).append(collection_id)
+        return index
+
+    def crawl(self, parent_ids: List[str]) -> List[str]:
+        """
+        获取各父级下全部层级的集合，返回其中非文件夹集合的ID
+
+        父级本身每次都重新获取；子文件夹的更新时间与快照一致时沿用快照中的子树，
+        否则继续向下获取
+        """
+        self.requests = 0
+        frontier = list(dict.fromkeys(parent_ids))
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            while frontier:
+                listings = self._list_level(executor, frontier)
+                index = self.children()
+                frontier = []
+                for parent_id, items in listings.items():
+                    if items is None:
+                        # 获取失败时保留快照中的旧数据，下次运行重新获取
+                        self.listed.discard(parent_id)
+                        continue
+                    frontier.extend(self._apply_listing(parent_id, items, index))
+
+        self.save()
+        collection_ids = self._collections_under(parent_ids)
+        print(
+            f"集合遍历完成: 请求 {self.requests} 次, "
+            f"共 {len(self.nodes)} 个集合, 其中 {len(collection_ids)} 个待处理"
+        )
+        return collection_ids
+
+    def _list_level(
+        self, executor: ThreadPoolExecutor, parent_ids: List[str]
+    ) -> Dict[str, Optional[List[Dict[str, Any]]]]:
+        """并发获取一层父级的全部分页：先取首页得到总数，再并发获取其余分页"""
+        first_pages = list(
+            executor.map(lambda pid: self._fetch_page(pid, 0), parent_ids)
+        )
+
+        listings: Dict[str, Optional[List[Dict[str, Any]]]] = {}
+        rest: List[Tuple[str, int]] = []
+        for parent_id, page in zip(parent_ids, first_pages):
+            if page is None:
+                listings[parent_id] = None
+                continue
+            items, total = page
+            listings[parent_id] = items
+            if isinstance(total, int):
+                pages = -(-total // self.page_size)
+                rest.extend((parent_id, n) for n in range(1, pages))
+            elif len(items) >= self.page_size:
+                # 接口未返回总数时逐页获取直到空页
+                rest.append((parent_id, -1))
+
+        for (parent_id, _), items in zip(
+            rest, executor.map(lambda task: self._fetch_rest(*task), rest)
+        ):
+            if items is None or listings[parent_id] is None:
+                listings[parent_id] = None
+            else:
+                listings[parent_id].extend(items)
+        return listings
+
+    def _fetch_page(
+        self, parent_id: str, page: int
+    ) -> Optional[Tuple[List[Dict[str, Any]], Optional[int]]]:
+        try:
+            response = self.llm_client.get_collection_list(
+                parent_id, page, self.page_size
+            )
+        except TransportError as e:
+            print(f"获取集合列表失败 {parent_id}: {e}")
+            return None
+        with self._lock:
+            self.requests += 1
+        data = response.get("data", {})
+        return data.get("list", []), data.get("total")
+
+    def _fetch_rest(self, parent_id: str, page: int) -> Optional[List[Dict[str, Any]]]:
+        if page >= 0:
+            result = self._fetch_page(parent_id, page)
+            return None if result is None else result[0]
+
+        items: List[Dict[str, Any]] = []
+        page = 1
+        while True:
+            result = self._fetch_page(parent_id, page)
+            if result is None:
+                return None
+            if not result[0]:
+                return items
+            items.extend(result[0])
+            page += 1
+
+    def _apply_listing(
+        self,
+        parent_id: str,
+        items: List[Dict[str, Any]],
+        index: Dict[str, List[str]],
+    ) -> List[str]:
+        """用新获取的子集合替换快照中的旧记录，返回需要继续向下获取的文件夹"""
+        new_ids = {item.get("_id") for item in items}
+        for removed in set(index.get(parent_id, [])) - new_ids:
+            # 同一层中已被移动到其他父级下的集合不删除
+            if self.nodes.get(removed, {}).get("parent_id") == parent_id:
+                self._drop_subtree(removed, index)
+
+        changed = []
+        for item in items:
+            collection_id = item.get("_id")
+            node = {
+                "parent_id": parent_id,
+                "name": item.get("name"),
+                "type": item.get("type"),
+                "update_time": item.get("updateTime"),
+            }
+            old = self.nodes.get(collection_id)
+            self.nodes[collection_id] = node
+            if node["type"] != FOLDER_TYPE:
+                continue
+            if (
+                old is None
+                or old.get("update_time") != node["update_time"]
+                or collection_id not in self.listed
+            ):
+                changed.append(collection_id)
+        self.listed.add(parent_id)
+        return changed
+
+    def _drop_subtree(self, collection_id: str, index: Dict[str, List[str]]) -> None:
+        stack = [collection_id]
+        while stack:
+            node_id = stack.pop()
+            self.nodes.pop(node_id, None)
+            self.listed.discard(node_id)
+            stack.extend(index.get(node_id, []))
+
+    def _collections_under(self, parent_ids: List[str]) -> List[str]:
+        """按广度优先顺序返回各父级下的非文件夹集合ID"""
+        index = self.children()
+        result = []
+        seen = set()
+        queue = list(parent_ids)
+        while queue:
+            next_queue = []
+            for parent_id in queue:
+                for collection_id in index.get(parent_id, []):
+                    if collection_id in seen:
+                        continue
+                    seen.add(collection_id)
+                    if self.nodes[collection_id].get("type") == FOLDER_TYPE:
+                        next_queue.append(collection_id)
+                    else:
+                        result.append(collection_id)
+            queue = next_queue
+        return result
@@ -20,6 +20,8 @@ class IdKeyPair:
     def __init__(self, dic: Dict[str, str]):
         self.id = dic.get("id")
         self.key = dic.get("key")
+        # 多个应用并列使用时的显示名称
+        self.name = dic.get("name")
 
     def __str__(self) -> str:
         return f"  id: {self.mask(self.id)}\n" f"  key: {self.mask(self.key)}\n"
@@ -36,6 +38,240 @@ class Prompts:
         return f"  start: {self.start_prompt}\n" f"  continue: {self.continue_prompt}\n"
 
 
+class ConverterOptions:
+    """文件转换配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        self.libreoffice_path = dic.get("libreoffice_path")
+        # 与配置模板一致默认启用工作进程池，Excel文件加载一次即导出全部目标格式
+        self.workers = dic.get("workers", 4)
+
+    def __str__(self) -> str:
+        return (
+            f"  libreoffice_path: {self.libreoffice_path}\n"
+            f"  workers: {self.workers}\n"
+        )
+
+
+class PDFOptions:
+    """PDF处理配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        self.camelot_flavor = dic.get("camelot_flavor", "lattice")
+        self.page_workers = dic.get("page_workers", 0)
+        self.pages_per_chunk = dic.get("pages_per_chunk", 16)
+        self.file_workers = dic.get("file_workers", 0)
+        self.layout = dic.get("layout", "bbox")
+        # 表格提取页码范围，及按文件名通配模式单独指定的页码范围
+        self.table_pages = dic.get("table_pages", "all")
+        self.table_pages_by_file = dic.get("table_pages_by_file", {})
+        # Excel表格提取方式: camelot(转为PDF后识别) / workbook(直接读取工作簿)
+        self.table_engine = dic.get("table_engine", "camelot")
+        # workbook 方式下合并单元格的文本是否填充到整个区域
+        self.fill_merged = dic.get("fill_merged", False)
+
+    def __str__(self) -> str:
+        return (
+            f"  camelot_flavor: {self.camelot_flavor}\n"
+            f"  page_workers: {self.page_workers}\n"
+            f"  file_workers: {self.file_workers}\n"
+            f"  layout: {self.layout}\n"
+            f"  table_pages: {self.table_pages}\n"
+            f"  table_engine: {self.table_engine}\n"
+        )
+
+
+class HTMLOptions:
+    """HTML表格处理配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        self.compact_level = dic.get("compact_level", 1)
+        self.engine = dic.get("engine", "bs4")
+
+    def __str__(self) -> str:
+        return f"  compact_level: {self.compact_level}\n" f"  engine: {self.engine}\n"
+
+
+class LLMOptions:
+    """大模型调用配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 同时进行的独立对话数量上限
+        self.concurrency = dic.get("concurrency", 8)
+        # 表格增强使用SSE流式输出，边接收边写文件
+        self.stream = dic.get("stream", False)
+        # 表格增强分块：每块的token预算(0表示不分块)和每块重复的表头行数
+        self.chunk_tokens = dic.get("chunk_tokens", 4000)
+        self.header_rows = dic.get("header_rows", 1)
+        # 单段对话的最大轮数
+        self.max_rounds = dic.get("max_rounds", 20)
+
+        # 响应缓存：path 为空时不启用
+        cache = dic.get("cache", {})
+        self.cache_path = cache.get("path")
+        self.cache_ttl = cache.get("ttl_days", 30) * 24 * 3600
+        self.cache_max_entries = cache.get("max_entries", 100000)
+
+    def __str__(self) -> str:
+        return (
+            f"  concurrency: {self.concurrency}\n"
+            f"  chunk_tokens: {self.chunk_tokens}\n"
+            f"  max_rounds: {self.max_rounds}\n"
+            f"  cache: {self.cache_path}\n"
+        )
+
+
+class EvaluationOptions:
+    """问答评估配置类"""
+
+    def __init__(self, dic: Dict[str, Any], default_app: IdKeyPair):
+        # 参与评估的应用列表，未配置时只评估主应用
+        self.apps = [IdKeyPair(app) for app in dic.get("apps", [])]
+        if not self.apps:
+            self.apps = [
+                IdKeyPair(
+                    {"name": "对标", "id": default_app.id, "key": default_app.key}
+                )
+            ]
+        for i, app in enumerate(self.apps):
+            app.name = app.name or f"应用{i + 1}"
+
+    def __str__(self) -> str:
+        return f"  apps: {[app.name for app in self.apps]}\n"
+
+
+class IndexOptions:
+    """自定义索引生成配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 每次大模型请求处理的数据条数
+        self.batch_size = dic.get("batch_size", 5)
+        # 获取数据列表的分页大小及每个集合预取的分页数
+        self.page_size = dic.get("page_size", 30)
+        self.prefetch_pages = dic.get("prefetch_pages", 2)
+        # 同时处理的集合数
+        self.collection_workers = dic.get("collection_workers", 4)
+        # 遍历集合树时的并发请求数，以及集合树快照路径(为空时每次全部重新获取)
+        self.crawl_workers = dic.get("crawl_workers", 8)
+        self.snapshot_path = dic.get("snapshot_path")
+        # 断点日志路径，续跑时跳过已更新索引的数据
+        self.journal_path = dic.get("journal_path", "./data/index_checkpoint.jsonl")
+
+    def __str__(self) -> str:
+        return (
+            f"  batch_size: {self.batch_size}\n"
+            f"  page_size: {self.page_size}\n"
+            f"  prefetch_pages: {self.prefetch_pages}\n"
+            f"  collection_workers: {self.collection_workers}\n"
+            f"  crawl_workers: {self.crawl_workers}\n"
+            f"  snapshot_path: {self.snapshot_path}\n"
+            f"  journal_path: {self.journal_path}\n"
+        )
+
+
+class MetricsOptions:
+    """运行指标与日志配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 指标导出路径：.json 为JSON格式，其余为Prometheus文本格式；为空时不导出
+        self.path = dic.get("path")
+        # 日志级别，DEBUG 时输出完整的接口响应体
+        self.log_level = dic.get("log_level", "INFO")
+
+    def __str__(self) -> str:
+        return f"  path: {self.path}\n" f"  log_level: {self.log_level}\n"
+
+
+class ChunkOptions:
+    """知识块切分配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 是否在流水线末尾将文档切分为知识块(JSONL)
+        self.enabled = dic.get("enabled", True)
+        # 每块正文的token上限
+        self.max_tokens = dic.get("max_tokens", 800)
+
+    def __str__(self) -> str:
+        return f"  enabled: {self.enabled}\n" f"  max_tokens: {self.max_tokens}\n"
+
+
+class UploadOptions:
+    """知识块上传配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 集合所在的父级文件夹ID，为空时在数据集根目录下
+        self.parent_id = dic.get("parent_id")
+        # 每次写入请求的知识块数和同时进行的写入批次数
+        self.batch_size = dic.get("batch_size", 50)
+        self.workers = dic.get("workers", 4)
+        # 写入前生成自定义索引，随数据一起写入
+        self.with_indexes = dic.get("with_indexes", True)
+        # 上传记录：已上传的知识块及其内容hash，再次上传时跳过未变化的知识块
+        self.journal_path = dic.get("journal_path", "./data/upload_journal.jsonl")
+        # 写入失败后等待训练队列清空的轮询间隔和最长时间（秒），之后再核对已有数据
+        self.queue_interval = dic.get("queue_interval", 2.0)
+        self.queue_timeout = dic.get("queue_timeout", 120.0)
+
+    def __str__(self) -> str:
+        return (
+            f"  parent_id: {self.parent_id}\n"
+            f"  batch_size: {self.batch_size}\n"
+            f"  workers: {self.workers}\n"
+            f"  with_indexes: {self.with_indexes}\n"
+            f"  journal_path: {self.journal_path}\n"
+            f"  queue_interval: {self.queue_interval}\n"
+            f"  queue_timeout: {self.queue_timeout}\n"
+        )
+
+
+class MergeOptions:
+    """文档合并配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 并行合并的线程数，0或1时逐个合并
+        self.workers = dic.get("workers", 4)
+        # 流式拷贝的块大小（字节）
+        self.chunk_size = dic.get("chunk_size", 1024 * 1024)
+
+    def __str__(self) -> str:
+        return f"  workers: {self.workers}\n" f"  chunk_size: {self.chunk_size}\n"
+
+
+class PipelineOptions:
+    """流水线调度配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # dag: 按依赖关系逐文件流转，独立分支并行；sequential: 各步骤依次整体执行
+        self.scheduler = dic.get("scheduler", "dag")
+
+    def __str__(self) -> str:
+        return f"  scheduler: {self.scheduler}\n"
+
+
+class HTTPOptions:
+    """HTTP传输配置类"""
+
+    def __init__(self, dic: Dict[str, Any]):
+        # 接口路径片段 -> 超时秒数；对话接口生成时间长，数据集接口应快速失败
+        self.timeouts = dic.get(
+            "timeouts",
+            {"api/v1/chat/completions": 300, "api/core/dataset": 30},
+        )
+        self.default_timeout = dic.get("default_timeout", 60)
+        self.max_retries = dic.get("max_retries", 4)
+        self.backoff_base = dic.get("backoff_base", 0.5)
+        self.backoff_max = dic.get("backoff_max", 30)
+        self.breaker_threshold = dic.get("breaker_threshold", 5)
+        self.breaker_reset = dic.get("breaker_reset", 30)
+
+    def __str__(self) -> str:
+        return (
+            f"  timeouts: {self.timeouts}\n"
+            f"  max_retries: {self.max_retries}\n"
+            f"  breaker_threshold: {self.breaker_threshold}\n"
+        )
+
+
 class Config:
     """配置类"""
 
@@ -51,12 +287,38 @@ class Config:
         self.dataset = IdKeyPair(self.__config_dict__.get("dataset", {}))
         self.app = IdKeyPair(self.__config_dict__.get("app", {}))
         self.prompts = Prompts(self.__config_dict__.get("prompts", {}))
+        self.converter = ConverterOptions(self.__config_dict__.get("converter", {}))
+        self.pdf = PDFOptions(self.__config_dict__.get("pdf", {}))
+        self.html = HTMLOptions(self.__config_dict__.get("html", {}))
+        self.llm = LLMOptions(self.__config_dict__.get("llm", {}))
+        self.evaluation = EvaluationOptions(
+            self.__config_dict__.get("evaluation", {}), self.app
+        )
+        self.index = IndexOptions(self.__config_dict__.get("index", {}))
+        self.http = HTTPOptions(self.__config_dict__.get("http", {}))
+        self.metrics = MetricsOptions(self.__config_dict__.get("metrics", {}))
+        self.pipeline = PipelineOptions(self.__config_dict__.get("pipeline", {}))
+        self.merge = MergeOptions(self.__config_dict__.get("merge", {}))
+        self.chunk = ChunkOptions(self.__config_dict__.get("chunk", {}))
+        self.upload = UploadOptions(self.__config_dict__.get("upload", {}))
 
     def __str__(self) -> str:
         return (
             f"dataset: \n{self.dataset}"
             f"app: \n{self.app}"
             f"prompts: \n{self.prompts}"
+            f"converter: \n{self.converter}"
+            f"pdf: \n{self.pdf}"
+            f"html: \n{self.html}"
+            f"llm: \n{self.llm}"
+            f"evaluation: \n{self.evaluation}"
+            f"index: \n{self.index}"
+            f"http: \n{self.http}"
+            f"metrics: \n{self.metrics}"
+            f"pipeline: \n{self.pipeline}"
+            f"merge: \n{self.merge}"
+            f"chunk: \n{self.chunk}"
+            f"upload: \n{self.upload}"
         )
 
 
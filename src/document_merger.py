@@ -1,20 +1,107 @@
 """
 文档合并模块
-处理不同来源文档的合并操作
+处理不同来源文档的合并操作，按块流式拷贝文件内容，内存占用与文件大小无关
 """
 
+import os
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
-from typing import List
+from typing import Dict, Iterable, List, Optional, Tuple
+
+SEPARATOR = "\n\n---\n\n"
+
+
+def _line_ending(data: bytes) -> Optional[str]:
+    """数据中第一个换行使用的换行符，没有换行时返回None"""
+    pos = data.find(b"\n")
+    if pos < 0:
+        return None
+    return "\r\n" if data[pos - 1 : pos] == b"\r" else "\n"
 
 
 class DocumentMerger:
     """文档合并器"""
 
-    def __init__(self):
-        pass
+    def __init__(self, workers: int = 0, chunk_size: int = 1024 * 1024):
+        # 大于1时多个文件并行合并
+        self.workers = workers
+        # 流式拷贝的块大小（字节）
+        self.chunk_size = chunk_size
+
+    @staticmethod
+    def index_dir(directory: Path, suffix: str = ".md") -> Dict[str, Path]:
+        """扫描一次目录，返回 文件名 -> 路径，目录不存在时为空"""
+        if not directory.is_dir():
+            return {}
+        with os.scandir(directory) as entries:
+            return {
+                entry.name: directory / entry.name
+                for entry in entries
+                if entry.name.endswith(suffix) and entry.is_file()
+            }
+
+    def merge_files(
+        self, sources: List[Path], output_file: Path, separator: str = SEPARATOR
+    ) -> None:
+        """
+        按顺序流式拼接多个文件，先写入临时文件，完成后再替换
+
+        来源文件按字节原样拷贝；分隔符中的换行改用来源文件的换行符（以来源中出现的
+        第一个换行为准，都不含换行时为系统换行符），与原文本模式输出一样不混用 CRLF 和 LF
+        """
+        part_file = output_file.with_name(output_file.name + ".part")
+        newline: Optional[str] = None
+        try:
+            with open(part_file, "wb") as out:
+                for i, source in enumerate(sources):
+                    with open(source, "rb") as f:
+                        chunk = f.read(self.chunk_size)
+                        tail = b""
+                        # 先看本文件的首块，写分隔符时尽量已确定换行符
+                        if newline is None:
+                            newline = _line_ending(chunk)
+                        if i:
+                            sep = separator.replace("\r\n", "\n")
+                            sep = sep.replace("\n", newline or os.linesep)
+                            out.write(sep.encode("utf-8"))
+                        while chunk:
+                            out.write(chunk)
+                            if newline is None:
+                                # 带上前一块的末字节，\r\n 跨块时同样识别
+                                newline = _line_ending(tail + chunk)
+                                tail = chunk[-1:]
+                            chunk = f.read(self.chunk_size)
+            part_file.replace(output_file)
+        except BaseException:
+            part_file.unlink(missing_ok=True)
+            raise
+
+    def _run_merges(self, merges: Iterable[Tuple[str, List[Path], Path, str]]) -> None:
+        """执行 (显示名, 源文件列表, 输出文件, 分隔符) 合并任务，workers 大于1时并行"""
+
+        def merge(task: Tuple[str, List[Path], Path, str]) -> None:
+            name, sources, output_file, separator = task
+            try:
+                self.merge_files(sources, output_file, separator)
+            except OSError as e:
+                print(f"合并失败 {name}: {e}")
+                return
+            print(f"已合并: {name}")
+
+        if self.workers <= 1:
+            for task in merges:
+                merge(task)
+            return
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            for _ in executor.map(merge, merges):
+                pass
 
     def merge_md_files(
-        self, pdf_tab_dir: Path, llm_tab_dir: Path, merge_tab_dir: Path
+        self,
+        pdf_tab_dir: Path,
+        llm_tab_dir: Path,
+        merge_tab_dir: Path,
+        files: Optional[List[Path]] = None,
     ) -> None:
         """
         拼接pdf_tab和llm_tab中的同名MD文件，结果存入merge_tab
@@ -23,37 +110,34 @@ class DocumentMerger:
             pdf_tab_dir: 包含PDF生成MD文件的目录
             llm_tab_dir: 包含LLM生成MD文件的目录
             merge_tab_dir: 存放合并结果的目录
+            files: 只合并pdf_tab中的这些文件，默认全部
         """
         # 确保输出目录存在
         merge_tab_dir.mkdir(parents=True, exist_ok=True)
 
-        # 获取pdf_tab中的所有md文件
-        pdf_files = list(pdf_tab_dir.glob("*.md"))
-
-        # 遍历所有pdf文件
-        for pdf_file in pdf_files:
-            # 获取对应的llm文件路径
-            llm_file = llm_tab_dir / pdf_file.name
-
-            # 检查llm文件是否存在
-            if not llm_file.exists():
-                print(f"警告: {pdf_file.name} 在llm_tab中不存在，跳过")
-                continue
-
-            # 读取两个文件内容
-            pdf_content = pdf_file.read_text(encoding="utf-8")
-            llm_content = llm_file.read_text(encoding="utf-8")
-
-            # 拼接内容(pdf在前，llm在后)
-            merged_content = f"{pdf_content}\n\n---\n\n{llm_content}"
-
-            # 写入合并后的文件
-            output_file = merge_tab_dir / pdf_file.name
-            output_file.write_text(merged_content, encoding="utf-8")
-            print(f"已合并: {pdf_file.name}")
+        # 每个目录只扫描一次，之后按文件名查找
+        llm_index = self.index_dir(llm_tab_dir)
+        if files is None:
+            files = self.index_dir(pdf_tab_dir).values()
+
+        def merges() -> Iterable[Tuple[str, List[Path], Path, str]]:
+            for pdf_file in files:
+                llm_file = llm_index.get(pdf_file.name)
+                if llm_file is None:
+                    print(f"警告: {pdf_file.name} 在llm_tab中不存在，跳过")
+                    continue
+                # pdf在前，llm在后
+                yield (
+                    pdf_file.name,
+                    [pdf_file, llm_file],
+                    merge_tab_dir / pdf_file.name,
+                    SEPARATOR,
+                )
+
+        self._run_merges(merges())
 
     def merge_documents_from_dirs(
-        self, source_dirs: List[Path], output_dir: Path, separator: str = "\n\n---\n\n"
+        self, source_dirs: List[Path], output_dir: Path, separator: str = SEPARATOR
     ) -> None:
         """
         从多个目录合并同名文档
@@ -68,29 +152,26 @@ class DocumentMerger:
         if not source_dirs:
             return
 
-        # 以第一个目录的文件为基准
-        base_files = list(source_dirs[0].glob("*.md"))
-
-        for base_file in base_files:
-            contents = []
-
-            # 收集所有目录中的同名文件内容
-            for source_dir in source_dirs:
-                target_file = source_dir / base_file.name
-                if target_file.exists():
-                    content = target_file.read_text(encoding="utf-8")
-                    contents.append(content)
-                else:
-                    print(f"警告: {base_file.name} 在 {source_dir} 中不存在")
-
-            if contents:
-                # 合并内容
-                merged_content = separator.join(contents)
-
-                # 写入合并后的文件
-                output_file = output_dir / base_file.name
-                output_file.write_text(merged_content, encoding="utf-8")
-                print(f"已合并: {base_file.name} (来自 {len(contents)} 个源)")
+        # 每个目录只扫描一次，以第一个目录的文件为基准
+        indexes = [self.index_dir(source_dir) for source_dir in source_dirs]
+
+        def merges() -> Iterable[Tuple[str, List[Path], Path, str]]:
+            for name in indexes[0]:
+                # 收集所有目录中的同名文件
+                sources = []
+                for source_dir, index in zip(source_dirs, indexes):
+                    if name in index:
+                        sources.append(index[name])
+                    else:
+                        print(f"警告: {name} 在 {source_dir} 中不存在")
+                yield (
+                    f"{name} (来自 {len(sources)} 个源)",
+                    sources,
+                    output_dir / name,
+                    separator,
+                )
+
+        self._run_merges(merges())
 
 
 def main():
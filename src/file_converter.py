@@ -4,8 +4,11 @@
 """
 
 import subprocess
+from concurrent.futures import as_completed
 from pathlib import Path
-from typing import Dict, Optional
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from .office_pool import OfficeWorkerPool, Target
 
 
 class FileConverter:
@@ -14,8 +17,11 @@ class FileConverter:
     def __init__(
         self,
         libreoffice_path: str = "C:\\Program Files\\LibreOffice\\program\\soffice.exe",
+        workers: int = 0,
     ):
         self.libreoffice_path = libreoffice_path
+        # 大于0时使用常驻LibreOffice工作进程池，否则逐个文件启动soffice
+        self.workers = workers
 
         # 默认转换映射
         self.conversion_map = {
@@ -47,6 +53,18 @@ class FileConverter:
             print(f"❌ 转换失败: {result.stderr}")
             return False
 
+    def libre_convert_multi(self, input_path: Path, targets: List[Target]) -> bool:
+        """
+        通过LibreOffice命令行将文件依次转换为多个目标格式
+
+        命令行每次只能导出一种格式，每个目标格式都会单独启动一次soffice并重新加载文件；
+        只有工作进程池（workers 大于0）才能做到加载一次导出全部目标格式
+        """
+        ok = True
+        for format_to, out_dir in targets:
+            ok = self.libre_convert(input_path, format_to, out_dir) and ok
+        return ok
+
     def batch_convert(
         self,
         source_dir: Path,
@@ -60,14 +78,73 @@ class FileConverter:
         # 确保输出目录存在
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        for doc in source_dir.rglob("*.*"):
-            if doc.suffix in conversion_map:
-                target_format = conversion_map[doc.suffix]
-                self.libre_convert(doc, target_format, output_dir)
+        jobs = [
+            (doc, [(conversion_map[doc.suffix], output_dir)])
+            for doc in source_dir.rglob("*.*")
+            if doc.suffix in conversion_map
+        ]
+        self.run_jobs(jobs)
 
     def convert_excel_to_pdf(self, source_dir: Path, output_dir: Path) -> None:
         """专门转换Excel文件为PDF"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        for doc in source_dir.rglob("*.xls*"):
-            self.libre_convert(doc, "pdf", output_dir)
+        jobs = [(doc, [("pdf", output_dir)]) for doc in source_dir.rglob("*.xls*")]
+        self.run_jobs(jobs)
+
+    def batch_convert_multi(
+        self,
+        source_dir: Path,
+        target_map: Dict[str, List[Target]],
+        files: Optional[List[Path]] = None,
+    ) -> None:
+        """
+        单次遍历源目录的多目标转换，每个文档只加载一次即导出全部目标格式
+
+        参数:
+            source_dir: 源目录
+            target_map: 文件后缀 -> [(目标格式, 输出目录), ...]
+            files: 只转换指定的文件，默认转换源目录下全部匹配文件
+        """
+        for targets in target_map.values():
+            for _, out_dir in targets:
+                out_dir.mkdir(parents=True, exist_ok=True)
+
+        if files is None:
+            files = self.list_sources(source_dir, target_map)
+        jobs = [(doc, target_map[doc.suffix]) for doc in files]
+        self.run_jobs(jobs)
+
+    def list_sources(
+        self, source_dir: Path, target_map: Dict[str, List[Target]]
+    ) -> List[Path]:
+        """列出源目录下需要转换的文件"""
+        return [doc for doc in source_dir.rglob("*.*") if doc.suffix in target_map]
+
+    def run_jobs(self, jobs: List[Tuple[Path, List[Target]]]) -> None:
+        """执行转换任务列表，按配置选择串行或工作进程池"""
+        if self.workers <= 0 or not jobs:
+            for doc, targets in jobs:
+                self.libre_convert_multi(doc, targets)
+            return
+
+        with OfficeWorkerPool(self.libreoffice_path, self.workers) as pool:
+            for doc, targets in jobs:
+                pool.submit_multi(doc, targets)
+            pool.join()
+            pool.report()
+
+    def iter_jobs(
+        self, jobs: List[Tuple[Path, List[Target]]]
+    ) -> Iterator[Tuple[Path, bool]]:
+        """执行转换任务列表，按完成顺序逐个产出 (源文件, 是否成功)"""
+        if self.workers <= 0 or not jobs:
+            for doc, targets in jobs:
+                yield doc, self.libre_convert_multi(doc, targets)
+            return
+
+        with OfficeWorkerPool(self.libreoffice_path, self.workers) as pool:
+            futures = {pool.submit_multi(doc, targets): doc for doc, targets in jobs}
+            for future in as_completed(futures):
+                yield futures[future], future.result()
+            pool.report()
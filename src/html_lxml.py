@@ -0,0 +1,358 @@
+"""
+基于lxml的HTML表格简化模块
+通过lxml解析事件直接构建精简节点树，在解析过程中完成元素删除、属性清理和文本展平，
+输出与 HTMLTableProcessor 的 BeautifulSoup 流程逐字一致
+"""
+
+import re
+from typing import Dict, Iterator, List, Optional, Tuple, Union
+
+from lxml import etree
+
+from .table_serializer import (
+    TAG_MAPPING_COMMENT,
+    VOID_ELEMENTS,
+    CompactTableWriter,
+    escape_text,
+    format_attrs,
+)
+
+# 解析时直接丢弃的元素及其内容
+SKIP_TAGS = {
+    "style",
+    "script",
+    "comment",
+    "head",
+    "meta",
+    "link",
+    "colgroup",
+    "col",
+    "title",
+}
+# 只保留文本内容的元素
+FLATTEN_TAGS = {"font", "b"}
+# 保留的属性
+KEEP_ATTRS = ("colspan", "rowspan")
+# 这些元素内的文本不计入单元格文本
+AUX_STRING_TAGS = {"rt", "rp", "template", "script", "style"}
+# 内部文本不做格式化缩进的元素
+PRESERVE_WHITESPACE_TAGS = {"pre", "textarea"}
+CELL_TAGS = ("td", "th")
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+
+BASIC_TABLE_STYLES = {"border": "1", "cellspacing": "0", "cellpadding": "4"}
+
+# 字符串节点类型
+TEXT, AUX, COMMENT, DOCTYPE, PI = range(5)
+
+
+class _Str:
+    """字符串节点"""
+
+    __slots__ = ("value", "kind")
+
+    def __init__(self, value: str, kind: int = TEXT):
+        self.value = value
+        self.kind = kind
+
+
+class _Element:
+    """元素节点"""
+
+    __slots__ = ("name", "attrs", "children", "parent")
+
+    def __init__(self, name: Optional[str], attrs: Dict[str, str], parent=None):
+        self.name = name
+        self.attrs = attrs
+        self.children: List[Union["_Element", _Str]] = []
+        self.parent = parent
+
+    def iter(self, names: Tuple[str, ...]) -> Iterator["_Element"]:
+        """按文档顺序遍历指定名称的后代元素"""
+        stack = list(reversed(self.children))
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _Element):
+                if node.name in names:
+                    yield node
+                stack.extend(reversed(node.children))
+
+    def is_blank(self) -> bool:
+        """文本内容是否为空白"""
+        stack = list(self.children)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, _Element):
+                stack.extend(node.children)
+            elif node.kind == TEXT and node.value.strip():
+                return False
+        return True
+
+    def clear(self) -> None:
+        for child in self.children:
+            if isinstance(child, _Element):
+                child.parent = None
+        self.children = []
+
+    def detach(self) -> None:
+        if self.parent is not None:
+            self.parent.children.remove(self)
+            self.parent = None
+
+    def attached(self) -> bool:
+        node = self
+        while node.parent is not None:
+            node = node.parent
+        return node.name is None
+
+
+class _TreeBuilder:
+    """lxml解析目标：边解析边清理，生成精简节点树"""
+
+    def __init__(self):
+        self.root = _Element(None, {})
+        self.stack = [self.root]
+        self.tables: List[_Element] = []
+        self.rows: List[_Element] = []
+        self._data: List[str] = []
+        self._skip_depth = 0
+        self._aux_depth = 0
+        self._preserve_depth = 0
+        # 正在展平的 font/b 元素嵌套深度及其文本片段
+        self._flatten_depth = 0
+        self._flatten_parts: List[str] = []
+
+    def _flush(self) -> None:
+        if not self._data:
+            return
+        value = "".join(self._data)
+        self._data = []
+        if not self._preserve_depth and not value.strip(ASCII_SPACES):
+            value = "\n" if "\n" in value else " "
+
+        kind = AUX if self._aux_depth else TEXT
+        if self._flatten_depth:
+            value = value.strip()
+            if kind == TEXT and value:
+                self._flatten_parts.append(value)
+            return
+        self.stack[-1].children.append(_Str(value, kind))
+
+    def _append(self, node: _Str) -> None:
+        self._flush()
+        if not self._flatten_depth:
+            self.stack[-1].children.append(node)
+
+    def start(self, tag: str, attrib, nsmap=None) -> None:
+        if self._skip_depth or tag in SKIP_TAGS:
+            self._skip_depth += 1
+            return
+        self._flush()
+        if tag in AUX_STRING_TAGS:
+            self._aux_depth += 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth += 1
+        if self._flatten_depth or tag in FLATTEN_TAGS:
+            self._flatten_depth += 1
+            return
+
+        attrs = {key: attrib[key] for key in KEEP_ATTRS if key in attrib}
+        parent = self.stack[-1]
+        element = _Element(tag, attrs, parent)
+        parent.children.append(element)
+        self.stack.append(element)
+        if tag == "table":
+            self.tables.append(element)
+        elif tag == "tr":
+            self.rows.append(element)
+
+    def end(self, tag: str) -> None:
+        if self._skip_depth:
+            self._skip_depth -= 1
+            return
+        self._flush()
+        if tag in AUX_STRING_TAGS:
+            self._aux_depth -= 1
+        if tag in PRESERVE_WHITESPACE_TAGS:
+            self._preserve_depth -= 1
+        if self._flatten_depth:
+            self._flatten_depth -= 1
+            if not self._flatten_depth:
+                value = " ".join(self._flatten_parts)
+                self._flatten_parts = []
+                self.stack[-1].children.append(_Str(value))
+            return
+
+        for i in range(len(self.stack) - 1, 0, -1):
+            if self.stack[i].name == tag:
+                del self.stack[i:]
+                break
+
+    def data(self, data: str) -> None:
+        if not self._skip_depth:
+            self._data.append(data)
+
+    def comment(self, text: str) -> None:
+        if not self._skip_depth:
+            self._append(_Str(text, COMMENT))
+
+    def pi(self, target: str, data: str) -> None:
+        if not self._skip_depth:
+            self._append(_Str(target + " " + data, PI))
+
+    def doctype(self, name: str, pubid: Optional[str], system: Optional[str]) -> None:
+        value = name or ""
+        if pubid is not None:
+            value += f' PUBLIC "{pubid}"'
+            if system is not None:
+                value += f' "{system}"'
+        elif system is not None:
+            value += f' SYSTEM "{system}"'
+        self._append(_Str(value, DOCTYPE))
+
+    def close(self) -> _Element:
+        self._flush()
+        return self.root
+
+
+class LxmlTableSimplifier:
+    """基于lxml的HTML表格简化器"""
+
+    def parse(self, html_content: str) -> _TreeBuilder:
+        """解析HTML，同时完成无关元素删除、属性清理和 font/b 展平"""
+        builder = _TreeBuilder()
+        parser = etree.HTMLParser(target=builder, recover=True)
+        parser.feed(html_content)
+        parser.close()
+        return builder
+
+    def remove_empty_rows(self, rows: List[_Element]) -> None:
+        """清空空白单元格，并移除全部单元格为空的行"""
+        for tr in rows:
+            cells = list(tr.iter(CELL_TAGS))
+            for cell in cells:
+                if cell.children and cell.is_blank():
+                    cell.clear()
+            if tr.is_blank() or all(not cell.children for cell in tr.iter(CELL_TAGS)):
+                tr.detach()
+
+    def remove_trailing_empty_cells(self, table: _Element) -> int:
+        """移除表格每行末尾共有的空白单元格"""
+        rows = list(table.iter(("tr",)))
+        trailing_empty_counts = []
+        for tr in rows:
+            empty_cnt = 0
+            for cell in reversed(list(tr.iter(CELL_TAGS))):
+                if not cell.is_blank():
+                    break
+                empty_cnt += 1
+            trailing_empty_counts.append(empty_cnt)
+
+        if not trailing_empty_counts:
+            return 0
+
+        common_empty_cnt = min(trailing_empty_counts)
+        if common_empty_cnt > 0:
+            for tr in rows:
+                cells = list(tr.iter(CELL_TAGS))
+                for cell in cells[len(cells) - min(common_empty_cnt, len(cells)) :]:
+                    cell.detach()
+        return common_empty_cnt
+
+    def _events(
+        self, node: _Element, skip_tables: bool
+    ) -> Iterator[Tuple[str, Union[_Element, _Str]]]:
+        """按文档顺序生成 start/end/string 事件，skip_tables 为真时跳过嵌套表格"""
+        stack: List[Tuple[Union[_Element, _Str], bool]] = [
+            (child, False) for child in reversed(node.children)
+        ]
+        while stack:
+            item, closing = stack.pop()
+            if isinstance(item, _Str):
+                yield "string", item
+            elif closing:
+                yield "end", item
+            elif skip_tables and item.name == "table":
+                continue
+            else:
+                yield "start", item
+                stack.append((item, True))
+                stack.extend((child, False) for child in reversed(item.children))
+
+    def _string(self, node: _Str) -> str:
+        if node.kind == COMMENT:
+            return "<!--" + node.value + "-->"
+        if node.kind == DOCTYPE:
+            return "<!DOCTYPE " + node.value + ">\n"
+        if node.kind == PI:
+            return "<?" + node.value + ">"
+        return escape_text(node.value)
+
+    def _serialize(self, node: _Element, styled: bool = False) -> str:
+        """不带缩进的序列化，styled 为真时为表格添加基础样式"""
+        pieces = []
+        for event, item in self._events(node, skip_tables=False):
+            if event == "string":
+                pieces.append(self._string(item))
+            elif event == "start":
+                attrs = item.attrs
+                if styled and item.name == "table":
+                    attrs = {**attrs, **BASIC_TABLE_STYLES}
+                if not item.children and item.name in VOID_ELEMENTS:
+                    pieces.append(f"<{item.name}{format_attrs(attrs)}/>")
+                else:
+                    pieces.append(f"<{item.name}{format_attrs(attrs)}>")
+            elif item.children or item.name not in VOID_ELEMENTS:
+                pieces.append(f"</{item.name}>")
+        return "".join(pieces)
+
+    def _write_table(self, table: _Element, writer: CompactTableWriter) -> None:
+        """将表格（不含嵌套表格）写入压缩格式写出器"""
+        writer.start(table.name, table.attrs)
+        literal_end = None
+        for event, item in self._events(table, skip_tables=True):
+            if literal_end is not None:
+                if item is literal_end:
+                    literal_end = None
+                continue
+            if event == "string":
+                if item.kind in (TEXT, AUX):
+                    writer.text(escape_text(item.value))
+                else:
+                    writer.raw(self._string(item).strip())
+            elif event == "start":
+                if not item.children and item.name in VOID_ELEMENTS:
+                    literal_end = item
+                    writer.void(item.name, item.attrs)
+                elif item.name in PRESERVE_WHITESPACE_TAGS:
+                    literal_end = item
+                    wrapper = _Element(None, {})
+                    wrapper.children = [item]
+                    writer.raw(self._serialize(wrapper))
+                else:
+                    writer.start(item.name, item.attrs)
+            else:
+                writer.end(item.name)
+        writer.end(table.name)
+
+    def simplify(self, html_content: str, compact_level: int = 0) -> str:
+        """简化HTML表格内容，compact_level 含义与 HTMLTableProcessor 相同"""
+        builder = self.parse(html_content)
+        self.remove_empty_rows(builder.rows)
+
+        tables = [table for table in builder.tables if table.attached()]
+        for table in tables:
+            if table.attached():
+                self.remove_trailing_empty_cells(table)
+
+        if compact_level == 0:
+            return re.sub(r"\s+", " ", self._serialize(builder.root, styled=True))
+
+        writer = CompactTableWriter(compact=compact_level != 1)
+        for table in tables:
+            if table.attached():
+                self._write_table(table, writer)
+
+        if compact_level == 1:
+            return writer.getvalue().strip()
+        return TAG_MAPPING_COMMENT + "\n" + writer.getvalue()
@@ -6,14 +6,21 @@ HTML处理模块
 import re
 from pathlib import Path
 from bs4 import BeautifulSoup
-from typing import Optional
+from bs4.element import NavigableString, PreformattedString, Tag
+from typing import List, Optional
+
+from .html_lxml import LxmlTableSimplifier
+from .table_serializer import TAG_MAPPING_COMMENT, CompactTableWriter, escape_text
 
 
 class HTMLTableProcessor:
     """HTML表格处理器"""
 
-    def __init__(self):
-        pass
+    def __init__(self, compact_level: int = 1, engine: str = "bs4"):
+        # html_to_markdown 输出使用的压缩级别
+        self.compact_level = compact_level
+        # 解析引擎: bs4 / lxml，两者输出一致，lxml 更快且占用内存更少
+        self.engine = engine
 
     def get_first_table(self, soup: BeautifulSoup) -> BeautifulSoup:
         """只保留第一个table标签"""
@@ -120,39 +127,55 @@ class HTMLTableProcessor:
                     attrs[attr] = tag[attr]
             tag.attrs = attrs
 
-    def prettify(self, soup: BeautifulSoup, compact: bool = False) -> str:
-        """格式化HTML输出"""
-        out = soup.prettify()
-        tab = " "
+    def serialize_tables(self, soup: BeautifulSoup, compact: bool = False) -> str:
+        """遍历表格节点直接写出压缩格式，compact 为真时使用 <r>/<d>/<h> 标签"""
+        writer = CompactTableWriter(compact=compact)
+        stack = [(child, False) for child in reversed(soup.contents)]
+        while stack:
+            node, closing = stack.pop()
+            if closing:
+                writer.end(node.name)
+            elif isinstance(node, PreformattedString):
+                # 注释等
+                writer.raw(node.output_ready().strip())
+            elif isinstance(node, NavigableString):
+                writer.text(escape_text(node))
+            elif not isinstance(node, Tag):
+                continue
+            elif node.is_empty_element:
+                writer.void(node.name, self._attr_strings(node))
+            elif node.name in (node.preserve_whitespace_tags or ()):
+                # pre/textarea 等保留空白的元素（由解析器决定），内容原样输出
+                writer.raw(node.decode())
+            else:
+                writer.start(node.name, self._attr_strings(node))
+                stack.append((node, True))
+                stack.extend((child, False) for child in reversed(node.contents))
+        return writer.getvalue()
 
-        out = re.sub(r"(</?t[rdable].*?>)\n\s+", r"\1\n", out)
-        out = re.sub(r"\s+(</t[rdable]>)", r"\n\1", out)
-        out = re.sub(r"(<td.*?>)\n(.*?)\n(</td>)", r"\1\2\3", out)
-        out = re.sub(r"(<td.*?>)\n(</td>)", r"\1\2", out)
-        out = re.sub(r"<td", tab * 2 + r"<td", out)
-        out = re.sub(r"(</*tr)", tab + r"\1", out)
+    def prettify(self, soup: BeautifulSoup, compact: bool = False) -> str:
+        """格式化表格输出（保留原接口，现由 serialize_tables 实现，不再输出XML声明）"""
+        return self.serialize_tables(soup, compact)
 
-        if compact:
-            out = re.sub(r"(</*)t([drh].*?>)", r"\1\2", out)
-        return out
+    def _attr_strings(self, tag: Tag) -> dict:
+        return {
+            key: " ".join(value) if isinstance(value, list) else value
+            for key, value in tag.attrs.items()
+        }
 
     def medium_compact(self, soup: BeautifulSoup) -> str:
         """中等压缩格式"""
-        output = self.prettify(soup)
-        output = re.sub(r"<\?xml.*?\?>", "", output).strip()
-        return output
+        return self.serialize_tables(soup).strip()
 
     def high_compact(self, soup: BeautifulSoup) -> str:
         """高压缩格式"""
-        output = self.prettify(soup, compact=True)
-        output = re.sub(r"<\?xml.*?\?>", "", output)
-        output = (
-            r"<!-- 标签映射表={<table>:<t>,<tr>:<r>,<td>:<d>,<th>:<h>} -->" + output
-        )
-        return output
+        return TAG_MAPPING_COMMENT + "\n" + self.serialize_tables(soup, compact=True)
 
     def simplify_html_table(self, html_content: str, compact_level: int = 0) -> str:
         """主函数：简化XHTML表格内容"""
+        if self.engine == "lxml":
+            return LxmlTableSimplifier().simplify(html_content, compact_level)
+
         soup = BeautifulSoup(html_content, "lxml")
 
         # 处理流程
@@ -181,18 +204,25 @@ class HTMLTableProcessor:
         with open(html_path, "r", encoding="utf-8") as f:
             html_content = f.read()
 
-        simplified_html = self.simplify_html_table(html_content, compact_level=1)
+        simplified_html = self.simplify_html_table(
+            html_content, compact_level=self.compact_level
+        )
         md = "```markdown\n" + simplified_html + "\n```"
 
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(md)
 
-    def batch_process_html(self, source_dir: Path, output_dir: Path) -> None:
-        """批量处理HTML文件"""
+    def batch_process_html(
+        self, source_dir: Path, output_dir: Path, files: Optional[List[Path]] = None
+    ) -> None:
+        """批量处理HTML文件，files 指定时只处理这些文件"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        if files is None:
+            files = list(source_dir.glob("*.html"))
+
         cnt = 0
-        for html_file in source_dir.glob("*.html"):
+        for html_file in files:
             cnt += 1
             print(f"Processing file {cnt}: {html_file.stem}")
             output_file = output_dir / html_file.with_suffix(".md").name
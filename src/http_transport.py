@@ -0,0 +1,222 @@
+"""
+HTTP传输模块
+提供长连接池、按接口超时、指数退避重试和熔断保护
+"""
+
+import random
+import threading
+import time
+from typing import Any, Dict, Optional
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from .metrics import MetricsRegistry
+
+# 需要重试的状态码：限流和服务端临时错误
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class TransportError(Exception):
+    """请求最终失败"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class CircuitOpenError(TransportError):
+    """熔断器处于打开状态，请求被直接拒绝"""
+
+
+class CircuitBreaker:
+    """熔断器：连续失败达到阈值后暂停请求，冷却后放行一次试探请求"""
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._half_open_trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """当前状态: closed / open / half_open"""
+        with self._lock:
+            return self._state()
+
+    def _state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return "half_open"
+        return "open"
+
+    def allow(self) -> bool:
+        """判断是否允许发出请求"""
+        with self._lock:
+            state = self._state()
+            if state == "closed":
+                return True
+            if state == "half_open" and not self._half_open_trial:
+                self._half_open_trial = True
+                return True
+            return False
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._half_open_trial = False
+
+    def release(self) -> None:
+        """请求未得到结果（非网络原因的异常）时归还试探名额，状态不变"""
+        with self._lock:
+            self._half_open_trial = False
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self._half_open_trial or self.failures >= self.failure_threshold:
+                self.opened_at = time.monotonic()
+            self._half_open_trial = False
+
+
+class HTTPTransport:
+    """共享的HTTP传输层"""
+
+    def __init__(
+        self,
+        pool_size: int = 10,
+        timeouts: Optional[Dict[str, float]] = None,
+        default_timeout: float = 30.0,
+        max_retries: int = 4,
+        backoff_base: float = 0.5,
+        backoff_max: float = 30.0,
+        breaker: Optional[CircuitBreaker] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        # 接口路径片段 -> 读超时(秒)，按最长匹配选取
+        self.timeouts = timeouts or {}
+        self.default_timeout = default_timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.breaker = breaker or CircuitBreaker()
+        self.metrics = metrics or MetricsRegistry()
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=4, pool_maxsize=pool_size)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def timeout_for(self, url: str) -> float:
+        """获取接口对应的超时时间"""
+        matches = [key for key in self.timeouts if key in url]
+        if not matches:
+            return self.default_timeout
+        return self.timeouts[max(matches, key=len)]
+
+    @staticmethod
+    def endpoint(url: str) -> str:
+        """指标中使用的接口名：URL路径"""
+        return urlsplit(url).path.lstrip("/")
+
+    def backoff(self, attempt: int, retry_after: Optional[str] = None) -> float:
+        """计算第 attempt 次重试前的等待时间（全抖动指数退避，优先遵循Retry-After）"""
+        if retry_after:
+            try:
+                return min(float(retry_after), self.backoff_max)
+            except ValueError:
+                pass
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2**attempt))
+
+    def request(
+        self,
+        method: str,
+        url: str,
+        max_retries: Optional[int] = None,
+        **kwargs: Any,
+    ) -> requests.Response:
+        """
+        发送请求，对429/5xx和网络错误按指数退避重试
+
+        成功(2xx)时返回响应；重试耗尽、非重试类错误或熔断打开时抛出 TransportError。
+        非幂等请求传入 max_retries=0，由调用方确认服务端状态后再决定是否重发
+        """
+        if max_retries is None:
+            max_retries = self.max_retries
+        kwargs.setdefault("timeout", self.timeout_for(url))
+        endpoint = self.endpoint(url)
+        last_error = ""
+        status_code = None
+
+        for attempt in range(max_retries + 1):
+            if not self.breaker.allow():
+                self.metrics.observe_request(endpoint, method, "circuit_open")
+                raise CircuitOpenError(f"熔断中，拒绝请求: {url}")
+
+            retry_after = None
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                self.metrics.observe_request(
+                    endpoint, method, "error", time.perf_counter() - start
+                )
+                self.breaker.record_failure()
+                last_error = f"网络错误: {e}"
+            except BaseException:
+                # 其他异常不能说明服务端状态，否则半开状态的试探名额不会被释放
+                self.breaker.release()
+                raise
+            else:
+                status_code = response.status_code
+                # 收到非重试类响应即说明服务端可用，先更新熔断状态再记录指标
+                if status_code in RETRY_STATUS:
+                    self.breaker.record_failure()
+                else:
+                    self.breaker.record_success()
+                self._observe(endpoint, method, response, start, kwargs.get("stream"))
+                if response.ok:
+                    return response
+                if status_code not in RETRY_STATUS:
+                    # 客户端错误说明请求本身有问题，重试无意义
+                    raise TransportError(
+                        f"请求失败, 状态码: {status_code}, url: {url}", status_code
+                    )
+                last_error = f"状态码: {status_code}"
+                retry_after = response.headers.get("Retry-After")
+
+            if attempt < max_retries:
+                time.sleep(self.backoff(attempt, retry_after))
+
+        raise TransportError(
+            f"请求失败(已重试{max_retries}次), {last_error}, url: {url}",
+            status_code,
+        )
+
+    def _observe(
+        self,
+        endpoint: str,
+        method: str,
+        response: requests.Response,
+        start: float,
+        stream: bool,
+    ) -> None:
+        """记录一次得到响应的请求；流式响应的接收字节数由调用方逐段记录"""
+        seconds = time.perf_counter() - start
+        body = response.request.body if response.request is not None else None
+        if isinstance(body, str):
+            body = body.encode("utf-8")
+        bytes_in = 0 if stream else len(response.content)
+        self.metrics.observe_request(
+            endpoint,
+            method,
+            str(response.status_code),
+            seconds,
+            bytes_out=len(body) if isinstance(body, bytes) else 0,
+            bytes_in=bytes_in,
+        )
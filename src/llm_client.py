@@ -3,59 +3,281 @@
 处理与大模型API的交互
 """
 
-import requests
+import json
+import logging
 import re
-from typing import List, Dict, Any, Optional
-from .config import Config
-from .utils import clean_content, mask
+import shutil
+import tempfile
+import threading
+import requests
+from contextlib import closing
+from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Dict,
+    Any,
+    Optional,
+    TextIO,
+    Tuple,
+    TypeVar,
+)
+from .config import Config, IdKeyPair
+from .http_transport import CircuitBreaker, HTTPTransport, TransportError
+from .metrics import MetricsRegistry
+from .response_cache import ResponseCache
+from .table_chunker import TableChunker
+from .utils import StreamCleaner, clean_content, mask
+
+T = TypeVar("T")
+R = TypeVar("R")
+
+logger = logging.getLogger(__name__)
+
+# 自定义索引生成提示词
+INDEX_PROMPT = """
+你是一个制度条款关键词概括助手，请你充分理解我提供给你的条款段落，提取出索引列表，要求如下：1.提取出一组字符串列表。2.输出格式为[关键词1,关键词2,关键词3,可能的问题1,可能的问题2]，禁止输出其他无关内容。3.五个索引的提取思路各不相同，关键词1结合父级标题和段落正文内容为这个条款拟定一个具体的细化到当前条款的小标题，重点强调该条款在父级标题之下体现的独特规范作用侧重点；关键词2对段落正文规定的是什么进行一句话全面概括，尽量不要漏掉细节；关键词3提取出当前条款所适用的省市机构名称信息；问题1和问题2从不了解制度文档的员工视角进行提问，提出两个用户最有可能针对这个条款提出的两个长问题。以下是条款内容,请结合上述要求输出包含五个字符串索引的列表：\n
+"""
+
+# 多条数据合并生成索引的提示词，要求按编号输出JSON
+BATCH_INDEX_PROMPT = (
+    INDEX_PROMPT.split("以下是条款内容")[0]
+    + "以下共有多个条款，每个条款以【编号】开头。请对每个条款分别按上述要求提取五个索引，"
+    + '只输出一个JSON对象，键为条款编号，值为包含五个字符串的列表，例如{"1": ["索引1", "索引2", "索引3", "索引4", "索引5"]}，禁止输出其他无关内容：\n\n'
+)
+
+
+class LLMResponseError(TransportError):
+    """接口返回的数据格式异常"""
+
+
+class _TeeWriter:
+    """将写入的文本同时写到 out 并记录下来"""
+
+    def __init__(self, out: TextIO):
+        self.out = out
+        self.parts: List[str] = []
+
+    def write(self, text: str) -> int:
+        self.parts.append(text)
+        return self.out.write(text)
+
+    def getvalue(self) -> str:
+        return "".join(self.parts)
 
 
 class LLMClient:
     """大模型API客户端"""
 
-    def __init__(self, config: Config):
+    def __init__(
+        self,
+        config: Config,
+        concurrency: Optional[int] = None,
+        bypass_cache: bool = False,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
         self.config = config
-
-    def chat(self, question: str, chat_id: str) -> str:
-        """发送聊天请求"""
+        self.metrics = metrics or MetricsRegistry()
+        # 为True时不读取缓存（仍写入新结果），用于强制重新生成
+        self.bypass_cache = bypass_cache
+        self.cache = None
+        if config.llm.cache_path:
+            self.cache = ResponseCache(
+                Path(config.llm.cache_path),
+                ttl_seconds=config.llm.cache_ttl,
+                max_entries=config.llm.cache_max_entries,
+            )
+        self.concurrency = max(
+            1, concurrency if concurrency is not None else config.llm.concurrency
+        )
+        # 同时进行的表格对话数量上限（文件和分块两层并发共用）
+        self._table_slots = threading.BoundedSemaphore(self.concurrency)
+        self.chunker = TableChunker(config.llm.chunk_tokens, config.llm.header_rows)
+        # 单段对话的最大轮数，超过后仍未出现<EOF>视为失败
+        self.max_rounds = config.llm.max_rounds
+
+        # 所有请求共用一个传输层，连接池大小与并发上限一致，保持长连接复用
+        http = config.http
+        self.transport = HTTPTransport(
+            pool_size=max(10, self.concurrency),
+            timeouts=http.timeouts,
+            default_timeout=http.default_timeout,
+            max_retries=http.max_retries,
+            backoff_base=http.backoff_base,
+            backoff_max=http.backoff_max,
+            breaker=CircuitBreaker(http.breaker_threshold, http.breaker_reset),
+            metrics=self.metrics,
+        )
+
+    def map_concurrent(self, func: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """
+        并发执行相互独立的任务，结果按输入顺序返回
+
+        每个任务内部的多轮对话仍在同一线程中按顺序进行，
+        同时进行的任务数不超过 concurrency。
+        """
+        items = list(items)
+        if self.concurrency <= 1 or len(items) <= 1:
+            return [func(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=self.concurrency) as executor:
+            return list(executor.map(func, items))
+
+    def _chat_request(
+        self,
+        question: str,
+        chat_id: str,
+        stream: bool,
+        app: Optional[IdKeyPair] = None,
+    ) -> tuple:
+        """构造聊天请求的url、请求头和请求体，app 为空时使用配置中的应用"""
+        app = app or self.config.app
         url = self.config.url + "api/v1/chat/completions"
         headers = {
-            "Authorization": "Bearer " + self.config.app.key,
+            "Authorization": "Bearer " + app.key,
             "Content-Type": "application/json",
         }
         data = {
             "chatId": chat_id,
-            "stream": False,
+            "stream": stream,
             "detail": False,
             "messages": [
                 {"role": "user", "content": [{"type": "text", "text": question}]}
             ],
         }
+        return url, headers, data
+
+    def chat(self, question: str, chat_id: str) -> str:
+        """发送聊天请求"""
+        return self.chat_completion(question, chat_id)[0]
+
+    def chat_completion(
+        self, question: str, chat_id: str, app: Optional[IdKeyPair] = None
+    ) -> Tuple[str, Dict[str, int]]:
+        """发送聊天请求，返回清理后的回答和接口返回的token用量"""
+        url, headers, data = self._chat_request(question, chat_id, False, app)
 
-        response = requests.post(url, headers=headers, json=data)
-        if response.status_code == 200:
-            data = response.json()
+        response = self.transport.request("POST", url, headers=headers, json=data)
+        data = response.json()
+        try:
             content = data["choices"][0]["message"]["content"]
-            print(f"请求成功, data:\n {data}")
-            return clean_content(content)
-        else:
-            print(f"请求失败, 状态码: {response.status_code}")
-            return ""
+        except (KeyError, IndexError, TypeError):
+            raise LLMResponseError(f"响应格式异常, chat_id: {chat_id}, data: {data}")
+        # 完整响应体只在DEBUG级别输出，且由logging延迟格式化，大段回答时格式化本身开销明显
+        logger.debug("请求成功, data:\n %s", data)
+        logger.info("请求成功, chat_id: %s", chat_id)
+        usage = data.get("usage") or {}
+        self.metrics.add_tokens(usage)
+        return clean_content(content), usage
+
+    def chat_stream(self, question: str, chat_id: str) -> Iterator[str]:
+        """以SSE流式方式发送聊天请求，逐段产出未经清理的回答内容"""
+        url, headers, data = self._chat_request(question, chat_id, stream=True)
+
+        response = self.transport.request(
+            "POST", url, headers=headers, json=data, stream=True
+        )
+        response.encoding = "utf-8"
+        try:
+            yield from self._iter_stream_deltas(response, chat_id)
+        except requests.RequestException as e:
+            raise TransportError(f"流式响应中断, chat_id: {chat_id}: {e}")
+        finally:
+            response.close()
+
+    def _iter_stream_deltas(
+        self, response: requests.Response, chat_id: str
+    ) -> Iterator[str]:
+        """解析SSE事件流中的增量内容"""
+        received = 0
+        try:
+            for line in response.iter_lines(decode_unicode=True):
+                received += len(line.encode("utf-8")) + 1
+                # 只处理data行，忽略空行、注释和event行
+                if not line or not line.startswith("data:"):
+                    continue
+                payload = line[len("data:") :].strip()
+                if payload == "[DONE]":
+                    break
+
+                try:
+                    event = json.loads(payload)
+                    delta = event["choices"][0].get("delta", {}).get("content")
+                except (ValueError, KeyError, IndexError, TypeError, AttributeError):
+                    raise LLMResponseError(
+                        f"流式响应格式异常, chat_id: {chat_id}, data: {payload}"
+                    )
+                if delta:
+                    yield delta
+        finally:
+            self.metrics.add_bytes_in(self.transport.endpoint(response.url), received)
+
+    def stream_answer(self, question: str, chat_id: str, out: TextIO) -> bool:
+        """
+        流式获取一轮回答并边接收边写入 out，不在内存中保留整段回答
+
+        返回值表示回答中是否出现了<EOF>；出现后立即停止接收
+        """
+        cleaner = StreamCleaner()
+        tail = ""  # 上一段末尾，用于识别跨段的<EOF>
+
+        with closing(self.chat_stream(question, chat_id)) as deltas:
+            for delta in deltas:
+                text = cleaner.feed(delta)
+                if not text:
+                    continue
+                out.write(text)
+                window = tail + text
+                if "<EOF>" in window:
+                    return True
+                tail = window[-(len("<EOF>") - 1) :]
+
+        rest = cleaner.flush()
+        out.write(rest)
+        return "<EOF>" in tail + rest
+
+    def _cache_get(self, prefix: List[str], prompt: str) -> Any:
+        if self.cache is None or self.bypass_cache:
+            return None
+        return self.cache.get(
+            ResponseCache.make_key(self.config.app.id, prefix, prompt)
+        )
+
+    def _cache_put(self, prefix: List[str], prompt: str, value: Any) -> None:
+        if self.cache is not None:
+            key = ResponseCache.make_key(self.config.app.id, prefix, prompt)
+            self.cache.put(key, value)
+
+    def chat_once(self, question: str, chat_id: str, use_cache: bool = True) -> str:
+        """清空对话后发送单轮请求，相同的提问直接使用缓存的回答"""
+        if use_cache:
+            cached = self._cache_get([], question)
+            if cached is not None:
+                return cached
+
+        self.delete_one_chat(chat_id)
+        answer = self.chat(question, chat_id)
+        if use_cache:
+            self._cache_put([], question, answer)
+        return answer
 
-    def delete_one_chat(self, chat_id: str) -> Dict[str, Any]:
+    def delete_one_chat(
+        self, chat_id: str, app: Optional[IdKeyPair] = None
+    ) -> Dict[str, Any]:
         """删除单个聊天记录"""
+        app = app or self.config.app
         url = self.config.url + "api/core/chat/delHistory"
         headers = {
-            "Authorization": "Bearer " + self.config.app.key,
+            "Authorization": "Bearer " + app.key,
         }
-        params = {"chatId": chat_id, "appId": self.config.app.id}
+        params = {"chatId": chat_id, "appId": app.id}
 
-        response = requests.delete(url, headers=headers, params=params)
+        response = self.transport.request("DELETE", url, headers=headers, params=params)
 
-        if response.status_code == 200:
-            print(f"删除成功, chat_id: {chat_id}")
-        else:
-            print(f"删除失败, 状态码: {response.status_code}")
+        logger.info("删除成功, chat_id: %s", chat_id)
         return response.json()
 
     def delete_all_chats(self) -> Dict[str, Any]:
@@ -66,14 +288,11 @@ class LLMClient:
         }
         params = {"appId": self.config.app.id}
 
-        response = requests.delete(url, headers=headers, params=params)
+        response = self.transport.request("DELETE", url, headers=headers, params=params)
 
-        if response.status_code == 200:
-            print(
-                f"所有聊天记录清除成功\n app_id = {mask(self.config.app.id)}\n app_key = {mask(self.config.app.key)}"
-            )
-        else:
-            print(f"清除聊天记录失败, 状态码: {response.status_code}")
+        print(
+            f"所有聊天记录清除成功\n app_id = {mask(self.config.app.id)}\n app_key = {mask(self.config.app.key)}"
+        )
         return response.json()
 
     def delete_one_collection(self, collection_id: str) -> Dict[str, Any]:
@@ -81,16 +300,13 @@ class LLMClient:
         url = self.config.url + "api/core/dataset/collection/delete"
         headers = {"Authorization": "Bearer " + self.config.dataset.key}
         params = {"id": collection_id}
-        response = requests.delete(url, headers=headers, params=params)
+        response = self.transport.request("DELETE", url, headers=headers, params=params)
 
-        if response.status_code == 200:
-            print(f"单个集合清除成功\n col_id = {collection_id}\n")
-        else:
-            print(f"清除单个集合失败, 状态码: {response.status_code}")
+        print(f"单个集合清除成功\n col_id = {collection_id}\n")
         return response.json()
 
     def get_collection_list(
-        self, parent_id: Optional[str] = None, page: int = 0
+        self, parent_id: Optional[str] = None, page: int = 0, page_size: int = 30
     ) -> Dict[str, Any]:
         """获取集合列表"""
         url = self.config.url + "api/core/dataset/collection/listV2"
@@ -99,22 +315,21 @@ class LLMClient:
             "Content-Type": "application/json",
         }
         data = {
-            "offset": 30 * page,
-            "pageSize": 30,
+            "offset": page_size * page,
+            "pageSize": page_size,
             "datasetId": self.config.dataset.id,
             "parentId": parent_id,
             "searchText": "",
         }
 
-        response = requests.post(url, headers=headers, json=data)
+        response = self.transport.request("POST", url, headers=headers, json=data)
 
-        if response.status_code == 200:
-            print(f"成功获取集合列表")
-        else:
-            print(f"获取集合列表失败, 状态码: {response.status_code}")
+        logger.info("成功获取集合列表")
         return response.json()
 
-    def get_data_list(self, collection_id: str, page: int = 0) -> Dict[str, Any]:
+    def get_data_list(
+        self, collection_id: str, page: int = 0, page_size: int = 30
+    ) -> Dict[str, Any]:
         """获取数据列表"""
         url = self.config.url + "api/core/dataset/data/v2/list"
         headers = {
@@ -122,18 +337,74 @@ class LLMClient:
             "Content-Type": "application/json",
         }
         data = {
-            "offset": 30 * page,
-            "pageSize": 30,
+            "offset": page_size * page,
+            "pageSize": page_size,
             "collectionId": collection_id,
             "searchText": "",
         }
 
-        response = requests.post(url, headers=headers, json=data)
+        response = self.transport.request("POST", url, headers=headers, json=data)
 
-        if response.status_code == 200:
-            print(f"数据列表获取成功")
-        else:
-            print(f"获取数据列表失败, 状态码: {response.status_code}")
+        logger.info("数据列表获取成功")
+        return response.json()
+
+    def create_collection(self, name: str, parent_id: Optional[str] = None) -> str:
+        """创建虚拟集合，返回集合ID；不自动重试，避免重复创建"""
+        url = self.config.url + "api/core/dataset/collection/create"
+        headers = {
+            "Authorization": "Bearer " + self.config.dataset.key,
+            "Content-Type": "application/json",
+        }
+        data = {
+            "datasetId": self.config.dataset.id,
+            "parentId": parent_id,
+            "name": name,
+            "type": "virtual",
+        }
+
+        response = self.transport.request(
+            "POST", url, max_retries=0, headers=headers, json=data
+        )
+
+        logger.info("集合创建成功")
+        return response.json()["data"]
+
+    def push_data(
+        self, collection_id: str, items: List[Dict[str, Any]]
+    ) -> Dict[str, Any]:
+        """向集合批量写入数据(q/a/indexes)；不自动重试，避免重复写入"""
+        url = self.config.url + "api/core/dataset/data/pushData"
+        headers = {
+            "Authorization": "Bearer " + self.config.dataset.key,
+            "Content-Type": "application/json",
+        }
+        data = {"collectionId": collection_id, "trainingType": "chunk", "data": items}
+
+        response = self.transport.request(
+            "POST", url, max_retries=0, headers=headers, json=data
+        )
+
+        logger.info("数据批量写入成功")
+        return response.json()
+
+    def get_training_queue(self) -> Dict[str, Any]:
+        """获取数据集待训练的数据数；写入的数据训练完成后才出现在数据列表中"""
+        url = self.config.url + "api/core/dataset/training/getDatasetTrainingQueue"
+        headers = {"Authorization": "Bearer " + self.config.dataset.key}
+        params = {"datasetId": self.config.dataset.id}
+        response = self.transport.request("GET", url, headers=headers, params=params)
+
+        logger.info("训练队列获取成功")
+        return response.json()
+
+    def delete_data(self, data_id: str) -> Dict[str, Any]:
+        """删除单条数据"""
+        url = self.config.url + "api/core/dataset/data/delete"
+        headers = {"Authorization": "Bearer " + self.config.dataset.key}
+        params = {"id": data_id}
+        response = self.transport.request("DELETE", url, headers=headers, params=params)
+
+        logger.info("数据删除成功")
         return response.json()
 
     def add_index(
@@ -147,45 +418,173 @@ class LLMClient:
         }
         data = {"dataId": data_id, "q": data_q, "indexes": index_list}
 
-        response = requests.put(url, headers=headers, json=data)
+        response = self.transport.request("PUT", url, headers=headers, json=data)
 
-        if response.status_code == 200:
-            print(f"数据索引更新成功")
-        else:
-            print(f"索引更新失败, 状态码: {response.status_code}")
+        logger.info("数据索引更新成功")
         return response.json()
 
-    def process_table_with_llm(self, md_content: str, chat_id: str) -> str:
-        """使用LLM处理表格内容"""
-        self.delete_one_chat(chat_id)
-        answer_list = []
-
-        # 发送初始问题
-        answer = self.chat(self.config.prompts.start_prompt + md_content, chat_id)
-        answer_list.append(answer)
+    def _check_rounds(self, rounds: int, chat_id: str) -> None:
+        if rounds >= self.max_rounds:
+            raise LLMResponseError(
+                f"对话已达最大轮数 {self.max_rounds} 仍未结束, chat_id: {chat_id}"
+            )
 
-        # 继续对话直到结束
-        while "<EOF>" not in answer:
-            answer = self.chat(self.config.prompts.continue_prompt, chat_id)
+    def process_table_with_llm(self, md_content: str, chat_id: str) -> str:
+        """使用LLM处理表格内容，超出token预算的表格分块并发处理后按顺序拼接"""
+        chunks = self.chunker.split(md_content)
+        if len(chunks) == 1:
+            return self._process_table_chunk(md_content, chat_id)
+
+        # 每块是一段独立的对话
+        answers = self.map_concurrent(
+            lambda item: self._process_table_chunk(item[1], f"{chat_id}_{item[0]}"),
+            list(enumerate(chunks)),
+        )
+        return "\n".join(answers)
+
+    def _process_table_chunk(self, md_content: str, chat_id: str) -> str:
+        """在一段多轮对话中处理一块表格内容"""
+        # 多轮对话整体缓存：键为首轮提问和续写提示，值为全部轮次的回答
+        start_question = self.config.prompts.start_prompt + md_content
+        continue_prompt = self.config.prompts.continue_prompt
+        cached = self._cache_get([start_question], continue_prompt)
+        if cached is not None:
+            return "\n".join(cached)
+
+        with self._table_slots:
+            self.delete_one_chat(chat_id)
+            answer_list = []
+
+            # 发送初始问题
+            answer = self.chat(start_question, chat_id)
             answer_list.append(answer)
 
+            # 继续对话直到结束
+            while "<EOF>" not in answer:
+                self._check_rounds(len(answer_list), chat_id)
+                answer = self.chat(continue_prompt, chat_id)
+                answer_list.append(answer)
+
+        self._cache_put([start_question], continue_prompt, answer_list)
         return "\n".join(answer_list)
 
+    def process_table_with_llm_stream(
+        self, md_content: str, chat_id: str, out: TextIO
+    ) -> None:
+        """使用LLM处理表格内容（流式），各轮回答边生成边写入 out"""
+        chunks = self.chunker.split(md_content)
+        if len(chunks) == 1:
+            self._process_table_chunk_stream(md_content, chat_id, out)
+            return
+
+        def run(item) -> TextIO:
+            # 各块并发生成到临时文件，全部完成后按顺序写入 out
+            i, chunk = item
+            buffer = tempfile.TemporaryFile("w+", encoding="utf-8")
+            try:
+                self._process_table_chunk_stream(chunk, f"{chat_id}_{i}", buffer)
+            except BaseException:
+                buffer.close()
+                raise
+            return buffer
+
+        buffers = self.map_concurrent(run, list(enumerate(chunks)))
+        for i, buffer in enumerate(buffers):
+            with buffer:
+                if i:
+                    out.write("\n")
+                buffer.seek(0)
+                shutil.copyfileobj(buffer, out)
+
+    def _process_table_chunk_stream(
+        self, md_content: str, chat_id: str, out: TextIO
+    ) -> None:
+        """在一段多轮对话中流式处理一块表格内容"""
+        start_question = self.config.prompts.start_prompt + md_content
+        continue_prompt = self.config.prompts.continue_prompt
+        cached = self._cache_get([start_question], continue_prompt)
+        if cached is not None:
+            out.write("\n".join(cached))
+            return
+
+        # 启用缓存时记录各轮写出的回答，对话完整结束后与非流式方式一样写入缓存
+        answer_list: List[str] = []
+
+        def stream_round(question: str) -> bool:
+            if self.cache is None:
+                return self.stream_answer(question, chat_id, out)
+            tee = _TeeWriter(out)
+            finished = self.stream_answer(question, chat_id, tee)
+            answer_list.append(tee.getvalue())
+            return finished
+
+        with self._table_slots:
+            self.delete_one_chat(chat_id)
+
+            # 发送初始问题，之后继续对话直到出现<EOF>
+            rounds = 1
+            finished = stream_round(start_question)
+            while not finished:
+                self._check_rounds(rounds, chat_id)
+                out.write("\n")
+                finished = stream_round(continue_prompt)
+                rounds += 1
+
+        if self.cache is not None:
+            self._cache_put([start_question], continue_prompt, answer_list)
+
     def generate_custom_indexes(
         self, content: str, data_id: str
     ) -> List[Dict[str, str]]:
         """生成自定义索引"""
-        sum_prompt = """
-你是一个制度条款关键词概括助手，请你充分理解我提供给你的条款段落，提取出索引列表，要求如下：1.提取出一组字符串列表。2.输出格式为[关键词1,关键词2,关键词3,可能的问题1,可能的问题2]，禁止输出其他无关内容。3.五个索引的提取思路各不相同，关键词1结合父级标题和段落正文内容为这个条款拟定一个具体的细化到当前条款的小标题，重点强调该条款在父级标题之下体现的独特规范作用侧重点；关键词2对段落正文规定的是什么进行一句话全面概括，尽量不要漏掉细节；关键词3提取出当前条款所适用的省市机构名称信息；问题1和问题2从不了解制度文档的员工视角进行提问，提出两个用户最有可能针对这个条款提出的两个长问题。以下是条款内容,请结合上述要求输出包含五个字符串索引的列表：\n
-"""
-
-        chat_id = data_id
-        self.delete_one_chat(chat_id)
-        ans = self.chat(sum_prompt + content, chat_id)
+        ans = self.chat_once(INDEX_PROMPT + content, data_id)
 
         # 解析回答中的索引
         return self._parse_index_response(ans)
 
+    def generate_custom_indexes_batch(
+        self, items: List[Tuple[str, str]]
+    ) -> Dict[str, List[Dict[str, str]]]:
+        """
+        一次请求为多条数据生成自定义索引
+
+        items 为 (数据ID, 内容) 列表，返回 数据ID -> 索引列表；
+        回答中缺失或格式不正确的条目不出现在结果中
+        """
+        if len(items) == 1:
+            data_id, content = items[0]
+            return {data_id: self.generate_custom_indexes(content, data_id)}
+
+        question = BATCH_INDEX_PROMPT + "\n\n".join(
+            f"【{i}】{content}" for i, (_, content) in enumerate(items, 1)
+        )
+        ans = self.chat_once(question, "batch_" + items[0][0])
+        return self._parse_batch_index_response(ans, [data_id for data_id, _ in items])
+
+    def _parse_batch_index_response(
+        self, ans: str, data_ids: List[str]
+    ) -> Dict[str, List[Dict[str, str]]]:
+        """解析按编号输出的JSON索引回答"""
+        match = re.search(r"\{.*\}", ans, re.DOTALL)
+        if not match:
+            return {}
+        try:
+            parsed = json.loads(match.group(0))
+        except ValueError as e:
+            print(f"解析批量索引回答失败: {e}")
+            return {}
+        if not isinstance(parsed, dict):
+            return {}
+
+        result = {}
+        for i, data_id in enumerate(data_ids, 1):
+            values = parsed.get(str(i))
+            if isinstance(values, list) and values:
+                result[data_id] = [
+                    {"type": "custom", "text": str(value).strip()} for value in values
+                ]
+        return result
+
     def _parse_index_response(self, ans: str) -> List[Dict[str, str]]:
         """解析索引回答"""
         try:
@@ -3,16 +3,31 @@
 协调各个模块完成完整的文档处理流程
 """
 
-import pandas as pd
+import logging
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterator, Optional, Tuple
 
+from .build_cache import Artifact, BuildManifest
+from .bulk_indexer import BulkIndexer
+from .bulk_uploader import BulkUploader
+from .checkpoint import CheckpointJournal
+from .collection_crawler import CollectionCrawler
 from .config import load_config
 from .file_converter import FileConverter
+from .http_transport import TransportError
 from .html_processor import HTMLTableProcessor
 from .pdf_processor import PDFProcessor
+from .qa_evaluator import QAEvaluator
 from .llm_client import LLMClient
 from .document_merger import DocumentMerger
+from .md_chunker import MarkdownChunker
+from .metrics import MetricsRegistry, timed_stage
+from .pipeline_dag import PipelineScheduler, Stage
+from .workbook_table import WORKBOOK_SUFFIXES, WorkbookTableExtractor
 from .utils import read_md, load_json_to_dict
 
 
@@ -21,209 +36,841 @@ class DocumentProcessor:
 
     def __init__(self, config_path: Path):
         self.config = load_config(config_path)
-        self.converter = FileConverter()
-        self.html_processor = HTMLTableProcessor()
-        self.pdf_processor = PDFProcessor()
-        self.llm_client = LLMClient(self.config)
-        self.merger = DocumentMerger()
+        # 各接口请求和各处理步骤的运行指标
+        self.metrics = MetricsRegistry()
+        self.converter = self._create_converter()
+        self.html_processor = HTMLTableProcessor(
+            compact_level=self.config.html.compact_level,
+            engine=self.config.html.engine,
+        )
+        self.pdf_processor = PDFProcessor(
+            camelot_flavor=self.config.pdf.camelot_flavor,
+            page_workers=self.config.pdf.page_workers,
+            pages_per_chunk=self.config.pdf.pages_per_chunk,
+            file_workers=self.config.pdf.file_workers,
+            layout=self.config.pdf.layout,
+            table_pages=self.config.pdf.table_pages,
+            table_pages_by_file=self.config.pdf.table_pages_by_file,
+        )
+        self.workbook_extractor = WorkbookTableExtractor(
+            fill_merged=self.config.pdf.fill_merged,
+            workers=self.config.pdf.file_workers,
+        )
+        self.llm_client = LLMClient(self.config, metrics=self.metrics)
+        self.chunker = MarkdownChunker(max_tokens=self.config.chunk.max_tokens)
+        self.merger = DocumentMerger(
+            workers=self.config.merge.workers,
+            chunk_size=self.config.merge.chunk_size,
+        )
+        # 增量构建清单，为None时每次全部重新处理
+        self.manifest: Optional[BuildManifest] = None
+        self._manifest_lock = threading.Lock()
+        # 断点日志，为None时不记录进度
+        self.journal: Optional[CheckpointJournal] = None
+
+    def _create_converter(self) -> FileConverter:
+        """根据配置创建文件转换器"""
+        options = self.config.converter
+        if options.libreoffice_path:
+            return FileConverter(options.libreoffice_path, workers=options.workers)
+        return FileConverter(workers=options.workers)
+
+    def export_metrics(self) -> None:
+        """按配置导出运行指标"""
+        if self.config.metrics.path:
+            self.metrics.export(Path(self.config.metrics.path))
+
+    def _stage_config(self, stage: str) -> Dict[str, Any]:
+        """各步骤影响产物内容的配置，配置变化时产物需要重新构建"""
+        if stage == "html_table":
+            return {"compact_level": self.html_processor.compact_level}
+        if stage == "pdf_doc":
+            return {
+                "camelot_flavor": self.pdf_processor.camelot_flavor,
+                "layout": self.pdf_processor.layout,
+            }
+        if stage == "pdf_table":
+            if self.config.pdf.table_engine == "workbook":
+                return {
+                    "engine": "workbook",
+                    "fill_merged": self.config.pdf.fill_merged,
+                }
+            return {
+                "camelot_flavor": self.pdf_processor.camelot_flavor,
+                "pages": self.pdf_processor.table_pages,
+                "pages_by_file": self.pdf_processor.table_pages_by_file,
+            }
+        if stage == "chunk":
+            return {"max_tokens": self.chunker.max_tokens}
+        if stage == "llm":
+            return {
+                "app": self.config.app.id,
+                "start": self.config.prompts.start_prompt,
+                "continue": self.config.prompts.continue_prompt,
+                "chunk_tokens": self.config.llm.chunk_tokens,
+                "header_rows": self.config.llm.header_rows,
+            }
+        return {}
+
+    def _conversion_targets(
+        self, output_dir: Path, pdf_tab_dir: Path
+    ) -> Tuple[Dict[str, List[Tuple[str, Path]]], Dict[str, Any]]:
+        """文件后缀 -> 转换目标列表，以及转换步骤的配置"""
+        # 单次遍历: Excel文件加载一次，同时导出HTML(表格处理)和PDF(表格提取)
+        target_map = {
+            suffix: [(target_format, output_dir)]
+            for suffix, target_format in self.converter.conversion_map.items()
+        }
+        # 直接读取工作簿提取表格时不需要导出PDF
+        if self.config.pdf.table_engine != "workbook":
+            for suffix in WORKBOOK_SUFFIXES:
+                target_map.setdefault(suffix, []).append(("pdf", pdf_tab_dir))
+
+        config = {
+            suffix: [target_format for target_format, _ in targets]
+            for suffix, targets in target_map.items()
+        }
+        return target_map, config
+
+    def _is_fresh(self, stage: str, artifact: Artifact, config: Dict[str, Any]) -> bool:
+        """单个产物是否已是最新（流水线调度时各步骤并发调用）"""
+        if self.manifest is None:
+            return False
+        with self._manifest_lock:
+            return self.manifest.is_fresh(stage, artifact, config)
+
+    def _select_stale(
+        self, stage: str, artifacts: List[Artifact], config: Dict[str, Any]
+    ) -> Tuple[List[Artifact], float]:
+        """返回需要重新构建的产物和本次构建的开始时间"""
+        started_at = time.time()
+        if self.manifest is None:
+            return artifacts, started_at
+        return self.manifest.filter_stale(stage, artifacts, config), started_at
+
+    def _record_built(
+        self,
+        stage: str,
+        artifacts: List[Artifact],
+        config: Dict[str, Any],
+        started_at: float,
+    ) -> None:
+        """把本次构建成功的产物记入清单"""
+        if self.manifest is not None:
+            with self._manifest_lock:
+                self.manifest.record(stage, artifacts, config, started_at)
+
+    @contextmanager
+    def _checkpoint(
+        self, journal_path: Path, resume: bool
+    ) -> Iterator[CheckpointJournal]:
+        """使用已打开的断点日志，没有时打开指定路径的日志"""
+        if self.journal is not None:
+            yield self.journal
+            return
+        self.journal = CheckpointJournal(journal_path, resume=resume)
+        try:
+            yield self.journal
+        finally:
+            self.journal.close()
+            self.journal = None
+
+    def _run_stage(self, stage: str, func, *args) -> None:
+        """
+        执行流水线步骤，续跑时跳过已完成的步骤
+
+        步骤返回失败项数时，有失败项则不记为完成，续跑时再次执行（已逐项记录的部分跳过）
+        """
+        if self.journal is not None and self.journal.done("stage", stage):
+            print(f"[{stage}] 已在上次运行中完成，跳过")
+            return
+        failures = func(*args)
+        if failures:
+            print(f"[{stage}] {failures} 项失败，未记为完成")
+            return
+        if self.journal is not None:
+            self.journal.record("stage", stage)
 
-    def process_file_conversion(self, source_dir: Path, output_dir: Path) -> None:
+    @timed_stage("convert")
+    def process_file_conversion(
+        self, source_dir: Path, output_dir: Path, pdf_tab_dir: Optional[Path] = None
+    ) -> None:
         """执行文件格式转换"""
         print("开始文件格式转换...")
-        self.converter.batch_convert(source_dir, output_dir)
-
-        # 专门处理Excel转PDF
-        pdf_tab_dir = Path("./data/pdf_tab")
-        self.converter.convert_excel_to_pdf(source_dir, pdf_tab_dir)
+        if pdf_tab_dir is None:
+            pdf_tab_dir = Path("./data/pdf_tab")
+
+        target_map, config = self._conversion_targets(output_dir, pdf_tab_dir)
+        artifacts = [
+            (
+                str(doc.relative_to(source_dir)),
+                [doc],
+                [
+                    out_dir / f"{doc.stem}.{fmt}"
+                    for fmt, out_dir in target_map[doc.suffix]
+                ],
+            )
+            for doc in self.converter.list_sources(source_dir, target_map)
+        ]
+        stale, started_at = self._select_stale("convert", artifacts, config)
+
+        self.converter.batch_convert_multi(
+            source_dir, target_map, files=[inputs[0] for _, inputs, _ in stale]
+        )
+        self._record_built("convert", stale, config, started_at)
         print("文件格式转换完成")
 
+    @timed_stage("html_table")
     def process_html_tables(self, source_dir: Path, output_dir: Path) -> None:
         """处理HTML表格"""
         print("开始处理HTML表格...")
-        self.html_processor.batch_process_html(source_dir, output_dir)
+        config = self._stage_config("html_table")
+        artifacts = [
+            (f.name, [f], [output_dir / f.with_suffix(".md").name])
+            for f in source_dir.glob("*.html")
+        ]
+        stale, started_at = self._select_stale("html_table", artifacts, config)
+
+        self.html_processor.batch_process_html(
+            source_dir, output_dir, files=[inputs[0] for _, inputs, _ in stale]
+        )
+        self._record_built("html_table", stale, config, started_at)
         print("HTML表格处理完成")
 
+    @timed_stage("pdf_doc")
     def process_pdf_documents(self, source_dir: Path, output_dir: Path) -> None:
         """处理PDF文档"""
         print("开始处理PDF文档...")
-        self.pdf_processor.batch_process_pdfs(source_dir, output_dir)
+        config = self._stage_config("pdf_doc")
+        artifacts = []
+        for f in source_dir.glob("*.pdf"):
+            output_path = self.pdf_processor.doc_output_path(f, output_dir)
+            artifacts.append((f.name, [f], [output_path] if output_path else []))
+        stale, started_at = self._select_stale("pdf_doc", artifacts, config)
+
+        self.pdf_processor.batch_process_pdfs(
+            source_dir, output_dir, files=[inputs[0] for _, inputs, _ in stale]
+        )
+        self._record_built("pdf_doc", stale, config, started_at)
         print("PDF文档处理完成")
 
+    @timed_stage("pdf_table")
     def process_pdf_tables(self, source_dir: Path, output_dir: Path) -> None:
         """处理PDF表格"""
         print("开始处理PDF表格...")
-        self.pdf_processor.batch_process_pdf_tables(source_dir, output_dir)
+        config = self._stage_config("pdf_table")
+        artifacts = [
+            (f.name, [f], [output_dir / f.with_suffix(".md").name])
+            for f in source_dir.glob("*.pdf")
+        ]
+        stale, started_at = self._select_stale("pdf_table", artifacts, config)
+
+        self.pdf_processor.batch_process_pdf_tables(
+            source_dir, output_dir, files=[inputs[0] for _, inputs, _ in stale]
+        )
+        self._record_built("pdf_table", stale, config, started_at)
         print("PDF表格处理完成")
 
-    def process_llm_enhancement(self, source_dir: Path, output_dir: Path) -> None:
-        """使用LLM增强表格内容"""
+    @timed_stage("pdf_table")
+    def process_workbook_tables(self, source_dir: Path, output_dir: Path) -> None:
+        """直接从Excel工作簿提取表格，输出与PDF表格处理相同"""
+        print("开始提取Excel表格...")
+        config = self._stage_config("pdf_table")
+        artifacts = [
+            (
+                str(f.relative_to(source_dir)),
+                [f],
+                [output_dir / f.with_suffix(".md").name],
+            )
+            for f in source_dir.rglob("*.*")
+            if f.suffix in WORKBOOK_SUFFIXES
+        ]
+        stale, started_at = self._select_stale("pdf_table", artifacts, config)
+
+        self.workbook_extractor.batch_process_workbooks(
+            source_dir, output_dir, files=[inputs[0] for _, inputs, _ in stale]
+        )
+        self._record_built("pdf_table", stale, config, started_at)
+        print("Excel表格提取完成")
+
+    @timed_stage("llm")
+    def process_llm_enhancement(self, source_dir: Path, output_dir: Path) -> int:
+        """使用LLM增强表格内容，返回失败的文件数"""
         print("开始LLM增强处理...")
         output_dir.mkdir(parents=True, exist_ok=True)
 
-        for md_file in source_dir.glob("*.md"):
-            md_content = read_md(md_file)
-            chat_id = md_file.stem
+        config = self._stage_config("llm")
+        artifacts = [
+            (f.name, [f], [output_dir / f.name]) for f in source_dir.glob("*.md")
+        ]
+        stale, started_at = self._select_stale("llm", artifacts, config)
+
+        # 每个文件是一段独立的多轮对话，文件之间并发执行
+        results = self.llm_client.map_concurrent(
+            lambda md_file: self._enhance_file(md_file, output_dir),
+            [inputs[0] for _, inputs, _ in stale],
+        )
 
+        self._record_built("llm", stale, config, started_at)
+        print("LLM增强处理完成")
+        return results.count(False)
+
+    def _enhance_file(self, md_file: Path, output_dir: Path) -> bool:
+        """对单个表格文件进行LLM增强，失败时不写出结果并返回False"""
+        output_file = output_dir / md_file.name
+        if (
+            self.journal is not None
+            and self.journal.done("llm", md_file.name)
+            and output_file.exists()
+        ):
+            return True
+        md_content = read_md(md_file)
+        chat_id = md_file.stem
+
+        if self.config.llm.stream:
+            # 先写入临时文件，完整结束后再替换，避免留下不完整的结果
+            part_file = output_file.with_name(output_file.name + ".part")
+            try:
+                with open(part_file, "w", encoding="utf-8") as f:
+                    self.llm_client.process_table_with_llm_stream(
+                        md_content, chat_id, f
+                    )
+            except TransportError as e:
+                print(f"LLM增强失败 {md_file.name}: {e}")
+                part_file.unlink()
+                return False
+            part_file.replace(output_file)
+            self._record_file("llm", md_file.name)
+            return True
+
+        try:
             enhanced_content = self.llm_client.process_table_with_llm(
                 md_content, chat_id
             )
+        except TransportError as e:
+            # 不写入不完整的结果，下次运行时重新处理
+            print(f"LLM增强失败 {md_file.name}: {e}")
+            return False
 
-            output_file = output_dir / md_file.name
-            with open(output_file, "w", encoding="utf-8") as f:
-                f.write(enhanced_content)
+        with open(output_file, "w", encoding="utf-8") as f:
+            f.write(enhanced_content)
+        self._record_file("llm", md_file.name)
+        return True
 
-        print("LLM增强处理完成")
+    def _record_file(self, stage: str, name: str) -> None:
+        if self.journal is not None:
+            self.journal.record(stage, name)
 
+    @timed_stage("merge")
     def merge_documents(self, pdf_dir: Path, llm_dir: Path, output_dir: Path) -> None:
         """合并文档"""
         print("开始合并文档...")
-        self.merger.merge_md_files(pdf_dir, llm_dir, output_dir)
+        artifacts = [
+            (f.name, [f, llm_dir / f.name], [output_dir / f.name])
+            for f in pdf_dir.glob("*.md")
+        ]
+        stale, started_at = self._select_stale("merge", artifacts, {})
+
+        self.merger.merge_md_files(
+            pdf_dir, llm_dir, output_dir, files=[inputs[0] for _, inputs, _ in stale]
+        )
+        self._record_built("merge", stale, {}, started_at)
         print("文档合并完成")
 
-    def evaluate_qa_performance(self, qa_file: Path, output_file: Path) -> None:
-        """评估问答性能"""
+    @timed_stage("chunk")
+    def process_chunks(self, source_dirs: List[Path], output_dir: Path) -> None:
+        """将文档按章、节、条切分为知识块，每个文档输出一个JSONL"""
+        print("开始切分知识块...")
+        config = self._stage_config("chunk")
+        artifacts = [
+            (
+                f"{source_dir.name}/{f.name}",
+                [f],
+                [output_dir / source_dir.name / f.with_suffix(".jsonl").name],
+            )
+            for source_dir in source_dirs
+            for f in source_dir.glob("*.md")
+        ]
+        stale, started_at = self._select_stale("chunk", artifacts, config)
+
+        total = 0
+        for artifact_id, inputs, outputs in stale:
+            total += self.chunker.chunk_file(inputs[0], outputs[0], artifact_id)
+        self._record_built("chunk", stale, config, started_at)
+        print(f"知识块切分完成: {len(stale)} 个文档, {total} 块")
+
+    @timed_stage("qa")
+    def evaluate_qa_performance(
+        self, qa_file: Path, output_file: Path, resume: bool = False
+    ) -> int:
+        """评估问答性能，resume 为True时复用上次中断前已得到的回答；返回请求失败的问题数"""
         print("开始评估问答性能...")
 
         qa_list = load_json_to_dict(qa_file)
         if not qa_list:
             print("无法加载QA数据")
-            return
-
-        role_prompt = """<context>你的角色是"财务制度库查询助手"，主要职责是帮助用户快速准确地查找公司内部的财务制度、政策文件以及相关的指导原则。请遵循以下指导来完成任务：
-
-理解查询需求：首先，你需要理解用户的查询需求。这可能包括具体的政策名称、关键词或者与某个特定主题相关的信息。
-数据库搜索：使用内部数据库或知识库进行搜索，找到与用户请求最相关的规章制度或文件。确保搜索范围包括但不限于公司手册、员工守则、合规指南等文档。
-提供结果摘要：为用户提供搜索结果的简要概述，并附上直接链接或附件（如果适用），以便他们可以进一步阅读完整内容。
-确认与反馈：询问用户是否找到了他们所需要的信息，如果没有找到，请进一步澄清他们的需求并再次尝试提供帮助；如果找到了，询问是否有其他问题需要解答。
-记录查询情况：在每次交互后，记录下查询的情况，包括查询主题、提供的资料、用户满意度等信息，以便于后续分析和改进服务。
-请以礼貌且专业的态度回应所有请求，并确保所提供的信息是最新的且准确无误。</context>\n 问题如下：\n"""
-
-        exp_dict = {"问题": [], "标答": [], "对标": [], "优化": []}
-
-        # 基础评估
-        for qa in qa_list:
-            question = qa["问题"]
-            answer = qa["答案"]
-            chat_id = question
+            return 0
 
-            self.llm_client.delete_one_chat(chat_id)
-            response = self.llm_client.chat(role_prompt + question, chat_id)
-
-            exp_dict["问题"].append(question)
-            exp_dict["标答"].append(answer)
-            exp_dict["对标"].append(response)
-
-        # 优化评估（可选的部分数据）
-        for qa in qa_list[:6]:  # 只处理前6个
-            question = qa["问题"]
-            chat_id = "0" + question
-
-            self.llm_client.delete_one_chat(chat_id)
-            response = self.llm_client.chat(role_prompt + question, chat_id)
-            exp_dict["优化"].append(response)
-
-        # 保存结果
-        exp_df = pd.DataFrame(exp_dict)
-        exp_df.to_excel(output_file, index=False)
-        print(f"评估结果已保存到: {output_file}")
-
-    def add_custom_indexes(self, parent_ids: List[str]) -> None:
-        """为数据添加自定义索引"""
+        # 全部问题并发发送给配置中的各个应用，结果逐条写入CSV后导出Excel
+        with self._checkpoint(output_file.with_suffix(".checkpoint.jsonl"), resume):
+            evaluator = QAEvaluator(
+                self.llm_client, self.config.evaluation.apps, journal=self.journal
+            )
+            evaluator.run(qa_list, output_file)
+        return evaluator.failures
+
+    def add_custom_indexes(self, parent_ids: List[str], resume: bool = False) -> None:
+        """为数据添加自定义索引，resume 为True时跳过上次中断前已更新的数据"""
+        options = self.config.index
+        try:
+            with self._checkpoint(Path(options.journal_path), resume):
+                with self.metrics.stage("index"):
+                    self._add_custom_indexes(parent_ids)
+        finally:
+            self.export_metrics()
+
+    def _add_custom_indexes(self, parent_ids: List[str]) -> None:
         print("开始添加自定义索引...")
 
-        # 收集所有集合ID
-        all_collection_ids = []
-        for parent_id in parent_ids:
-            collections = self._get_all_collections_recursive(parent_id)
-            all_collection_ids.extend(collections)
-
-        # 为每个集合中的数据添加索引
-        for collection_id in all_collection_ids:
-            self._add_indexes_to_collection(collection_id)
+        # 遍历集合树，收集所有集合ID
+        options = self.config.index
+        crawler = CollectionCrawler(
+            self.llm_client,
+            page_size=options.page_size,
+            workers=options.crawl_workers,
+            snapshot_path=(
+                Path(options.snapshot_path) if options.snapshot_path else None
+            ),
+        )
+        all_collection_ids = crawler.crawl(parent_ids)
+
+        # 分批生成索引，多个集合并发处理
+        indexer = BulkIndexer(
+            self.llm_client,
+            batch_size=options.batch_size,
+            page_size=options.page_size,
+            prefetch_pages=options.prefetch_pages,
+            collection_workers=options.collection_workers,
+            journal=self.journal,
+        )
+        indexer.index_collections(all_collection_ids)
 
         print("自定义索引添加完成")
 
-    def _get_all_collections_recursive(self, parent_id: str) -> List[str]:
-        """递归获取所有集合ID"""
-        collection_ids = []
-        page = 0
+    def upload_chunks(
+        self,
+        chunk_dir: Path = Path("./data/out/chunks"),
+        parent_id: Optional[str] = None,
+    ) -> None:
+        """将本地切分的知识块连同自定义索引批量写入数据集，已上传且未变化的知识块跳过"""
+        options = self.config.upload
+        print("开始上传知识块...")
+        # 上传记录需要跨运行保留，始终以续写方式打开
+        journal = CheckpointJournal(Path(options.journal_path), resume=True)
+        try:
+            with self.metrics.stage("upload"):
+                uploader = BulkUploader(
+                    self.llm_client,
+                    batch_size=options.batch_size,
+                    workers=options.workers,
+                    with_indexes=options.with_indexes,
+                    index_batch_size=self.config.index.batch_size,
+                    page_size=self.config.index.page_size,
+                    journal=journal,
+                    queue_interval=options.queue_interval,
+                    queue_timeout=options.queue_timeout,
+                )
+                uploader.upload_dir(chunk_dir, parent_id or options.parent_id)
+        finally:
+            journal.close()
+            self.export_metrics()
 
-        while True:
-            response = self.llm_client.get_collection_list(parent_id, page)
-            collections = response.get("data", {}).get("list", [])
+    def run_full_pipeline(
+        self,
+        source_dir: Path,
+        base_output_dir: Path,
+        qa_file: Path = None,
+        incremental: bool = True,
+        resume: bool = False,
+    ) -> None:
+        """
+        运行完整的处理流水线
 
-            if not collections:
-                break
+        incremental 为True时跳过输入和配置均未变化的产物；
+        resume 为True时从上次中断处继续，跳过已完成的步骤、文件和问答
+        """
+        print("开始运行完整的文档处理流水线...")
+        if incremental:
+            self.manifest = BuildManifest(base_output_dir / ".build_manifest.json")
+
+        try:
+            with self._checkpoint(base_output_dir / ".checkpoint.jsonl", resume):
+                if self.config.pipeline.scheduler == "sequential":
+                    self._run_pipeline_stages(source_dir, base_output_dir, qa_file)
+                else:
+                    self._run_pipeline_dag(source_dir, base_output_dir, qa_file)
+        finally:
+            # 中途失败时也导出已统计的指标
+            self.export_metrics()
 
-            collection_ids.extend([col.get("_id") for col in collections])
-            page += 1
+        print("完整流水线处理完成！")
 
-        return collection_ids
+    def _run_pipeline_stages(
+        self, source_dir: Path, base_output_dir: Path, qa_file: Optional[Path]
+    ) -> None:
+        """按原方式逐个步骤整体执行流水线，续跑时跳过已完成的步骤"""
+        # 创建输出目录结构
+        mid_dir = base_output_dir / "mid"
+        pdf_tab_dir = base_output_dir / "pdf_tab"
+        out_dir = base_output_dir / "out"
+        table_dir = out_dir / "table"
+        doc_dir = out_dir / "doc"
+        llm_tab_dir = out_dir / "llm_tab"
+        merge_tab_dir = out_dir / "merge_tab"
 
-    def _add_indexes_to_collection(self, collection_id: str) -> None:
-        """为集合中的数据添加索引"""
-        page = 0
+        # 步骤1: 文件格式转换
+        self._run_stage(
+            "convert", self.process_file_conversion, source_dir, mid_dir, pdf_tab_dir
+        )
 
-        while True:
-            response = self.llm_client.get_data_list(collection_id, page)
-            data_list = response.get("data", {}).get("list", [])
+        # 步骤2: 处理HTML表格
+        self._run_stage("html_table", self.process_html_tables, mid_dir, table_dir)
 
-            if not data_list:
-                break
+        # 步骤3: 处理PDF文档
+        self._run_stage("pdf_doc", self.process_pdf_documents, mid_dir, doc_dir)
+
+        # 步骤4: 处理PDF表格（workbook 方式直接读取原始Excel文件）
+        if self.config.pdf.table_engine == "workbook":
+            self._run_stage(
+                "pdf_table",
+                self.process_workbook_tables,
+                source_dir,
+                out_dir / "pdf_tab",
+            )
+        else:
+            self._run_stage(
+                "pdf_table", self.process_pdf_tables, pdf_tab_dir, out_dir / "pdf_tab"
+            )
 
-            for data_item in data_list:
-                data_id = data_item["_id"]
-                data_q = data_item["q"]
+        # 步骤5: LLM增强处理（逐文件记录进度）
+        self._run_stage("llm", self.process_llm_enhancement, table_dir, llm_tab_dir)
 
-                try:
-                    index_list = self.llm_client.generate_custom_indexes(
-                        data_q, data_id
-                    )
-                    if index_list:
-                        self.llm_client.add_index(data_id, data_q, index_list)
-                except Exception as e:
-                    print(f"为数据 {data_id} 添加索引失败: {e}")
+        # 步骤6: 合并文档
+        self._run_stage(
+            "merge",
+            self.merge_documents,
+            out_dir / "pdf_tab",
+            llm_tab_dir,
+            merge_tab_dir,
+        )
+
+        # 步骤7: 切分知识块（可选）
+        if self.config.chunk.enabled:
+            self._run_stage(
+                "chunk",
+                self.process_chunks,
+                [doc_dir, merge_tab_dir],
+                out_dir / "chunks",
+            )
 
-            page += 1
+        # 步骤8: 评估QA性能（可选，逐个问题记录回答）
+        if qa_file and qa_file.exists():
+            self._run_stage(
+                "qa",
+                self.evaluate_qa_performance,
+                qa_file,
+                base_output_dir / "qa_results.xlsx",
+            )
 
-    def run_full_pipeline(
-        self, source_dir: Path, base_output_dir: Path, qa_file: Path = None
+    def _run_pipeline_dag(
+        self, source_dir: Path, base_output_dir: Path, qa_file: Optional[Path]
     ) -> None:
-        """运行完整的处理流水线"""
-        print("开始运行完整的文档处理流水线...")
+        """按依赖关系调度各步骤：每个文件完成一步即进入下一步，独立分支并行执行"""
+        pdf_options = self.config.pdf
+        # PDF文档和表格识别为CPU密集型，两个分支共用一个进程池
+        pdf_pool = None
+        if pdf_options.file_workers > 1:
+            pdf_pool = ProcessPoolExecutor(max_workers=pdf_options.file_workers)
+        try:
+            stages = self._build_pipeline_stages(source_dir, base_output_dir, pdf_pool)
+            scheduler = PipelineScheduler(stages)
+            try:
+                with self.metrics.stage("pipeline"):
+                    scheduler.run()
+            finally:
+                # 各步骤交错执行，按调度器统计的时间段和线程CPU时间记入指标；
+                # 进程池子进程和LibreOffice的CPU时间只计入 pipeline
+                for name, entry in scheduler.summary().items():
+                    self.metrics.record_stage(name, **entry)
+        finally:
+            if pdf_pool is not None:
+                pdf_pool.shutdown()
+
+        # 问答评估依赖知识库中的全部文档，在流水线结束后执行
+        if qa_file and qa_file.exists():
+            self._run_stage(
+                "qa",
+                self.evaluate_qa_performance,
+                qa_file,
+                base_output_dir / "qa_results.xlsx",
+            )
 
-        # 创建输出目录结构
+    def _build_pipeline_stages(
+        self,
+        source_dir: Path,
+        base_output_dir: Path,
+        pdf_pool: Optional[ProcessPoolExecutor] = None,
+    ) -> List[Stage]:
+        """
+        构建流水线步骤图
+
+        convert ─┬─ html_table ── llm ─┐
+                 ├─ pdf_doc            ├─ merge
+                 └─ pdf_table ─────────┘
+        pdf_doc 和 merge 的产出再交给 chunk 切分知识块；
+        workbook 方式下 pdf_table 的上游为直接列出原始Excel文件的 workbook 步骤；
+        各步骤逐文件检查构建清单，已是最新的产物不再处理但仍交给下游
+        """
+        file_workers = self.config.pdf.file_workers
         mid_dir = base_output_dir / "mid"
         pdf_tab_dir = base_output_dir / "pdf_tab"
         out_dir = base_output_dir / "out"
         table_dir = out_dir / "table"
         doc_dir = out_dir / "doc"
+        pdf_md_dir = out_dir / "pdf_tab"
         llm_tab_dir = out_dir / "llm_tab"
         merge_tab_dir = out_dir / "merge_tab"
 
-        # 步骤1: 文件格式转换
-        self.process_file_conversion(source_dir, mid_dir)
+        started_at = time.time()
+        # 步骤名 -> 本次构建的产物，步骤结束时记入清单
+        built: Dict[str, List[Artifact]] = {}
+        built_lock = threading.Lock()
+
+        def build(
+            stage: str, artifact: Artifact, func, *args, config=None
+        ) -> List[Path]:
+            """产物不是最新时执行 func，返回已存在的输出文件"""
+            if config is None:
+                config = self._stage_config(stage)
+            if not self._is_fresh(stage, artifact, config):
+                func(*args)
+                with built_lock:
+                    built.setdefault(stage, []).append(artifact)
+            return [path for path in artifact[2] if path.exists()]
+
+        def run_pdf(func, *args) -> None:
+            if pdf_pool is None:
+                func(*args)
+            else:
+                pdf_pool.submit(func, *args).result()
+
+        def finish(stage: str, config: Optional[Dict[str, Any]] = None):
+            def on_finish() -> None:
+                self._record_built(
+                    stage,
+                    built.get(stage, []),
+                    self._stage_config(stage) if config is None else config,
+                    started_at,
+                )
+
+            return on_finish
+
+        # 步骤1: 文件格式转换，已是最新的文件先交给下游，其余边转换边交给下游
+        target_map, convert_config = self._conversion_targets(mid_dir, pdf_tab_dir)
+
+        def convert() -> Iterator[Path]:
+            artifacts = {}
+            for doc in self.converter.list_sources(source_dir, target_map):
+                outputs = [
+                    out / f"{doc.stem}.{fmt}" for fmt, out in target_map[doc.suffix]
+                ]
+                artifacts[doc] = (str(doc.relative_to(source_dir)), [doc], outputs)
+
+            jobs = []
+            for doc, artifact in artifacts.items():
+                if self._is_fresh("convert", artifact, convert_config):
+                    yield from artifact[2]
+                else:
+                    jobs.append((doc, target_map[doc.suffix]))
+
+            for doc, ok in self.converter.iter_jobs(jobs):
+                artifact = artifacts[doc]
+                if ok:
+                    with built_lock:
+                        built.setdefault("convert", []).append(artifact)
+                for path in artifact[2]:
+                    if path.exists():
+                        yield path
 
         # 步骤2: 处理HTML表格
-        self.process_html_tables(mid_dir, table_dir)
+        def html_table(html_file: Path) -> List[Path]:
+            output = table_dir / html_file.with_suffix(".md").name
+            return build(
+                "html_table",
+                (html_file.name, [html_file], [output]),
+                self.html_processor.html_to_markdown,
+                html_file,
+                output,
+            )
 
         # 步骤3: 处理PDF文档
-        self.process_pdf_documents(mid_dir, doc_dir)
+        def pdf_doc(pdf_file: Path) -> List[Path]:
+            output = self.pdf_processor.doc_output_path(pdf_file, doc_dir)
+            return build(
+                "pdf_doc",
+                (pdf_file.name, [pdf_file], [output] if output else []),
+                run_pdf,
+                self.pdf_processor.process_pdf_file,
+                pdf_file,
+                doc_dir,
+                pdf_pool is None,
+            )
 
-        # 步骤4: 处理PDF表格
-        self.process_pdf_tables(pdf_tab_dir, out_dir / "pdf_tab")
+        # 步骤4: 处理PDF表格，workbook 方式下直接读取原始Excel文件
+        workbook_engine = self.config.pdf.table_engine == "workbook"
+
+        def workbooks() -> Iterator[Path]:
+            for f in sorted(source_dir.rglob("*.*")):
+                if f.suffix in WORKBOOK_SUFFIXES:
+                    yield f
+
+        def workbook_table(path: Path) -> List[Path]:
+            output = pdf_md_dir / path.with_suffix(".md").name
+            return build(
+                "pdf_table",
+                (str(path.relative_to(source_dir)), [path], [output]),
+                run_pdf,
+                self.workbook_extractor.workbook_to_markdown,
+                path,
+                output,
+            )
 
-        # 步骤5: LLM增强处理
-        self.process_llm_enhancement(table_dir, llm_tab_dir)
+        def pdf_table(pdf_file: Path) -> List[Path]:
+            output = pdf_md_dir / pdf_file.with_suffix(".md").name
+            return build(
+                "pdf_table",
+                (pdf_file.name, [pdf_file], [output]),
+                run_pdf,
+                self.pdf_processor.pdf_table_to_markdown,
+                pdf_file,
+                output,
+                pdf_pool is None,
+            )
 
-        # 步骤6: 合并文档
-        self.merge_documents(out_dir / "pdf_tab", llm_tab_dir, merge_tab_dir)
+        # 步骤5: LLM增强处理（逐文件记录进度）
+        def llm(md_file: Path) -> List[Path]:
+            return build(
+                "llm",
+                (md_file.name, [md_file], [llm_tab_dir / md_file.name]),
+                self._enhance_file,
+                md_file,
+                llm_tab_dir,
+            )
 
-        # 步骤7: 评估QA性能（可选）
-        if qa_file and qa_file.exists():
-            self.evaluate_qa_performance(qa_file, base_output_dir / "qa_results.xlsx")
+        # 步骤6: 合并同名的PDF表格和LLM增强结果
+        def merge(group: Dict[str, Path]) -> List[Path]:
+            pdf_md = group["pdf_table"]
+            sources = [pdf_md, group["llm"]]
+            output = merge_tab_dir / pdf_md.name
+            return build(
+                "merge",
+                (pdf_md.name, sources, [output]),
+                self.merger.merge_files,
+                sources,
+                output,
+                config={},
+            )
 
-        print("完整流水线处理完成！")
+        # 步骤7: 切分知识块
+        chunk_dir = out_dir / "chunks"
+
+        def chunk(md_file: Path) -> List[Path]:
+            source = f"{md_file.parent.name}/{md_file.name}"
+            output = (
+                chunk_dir / md_file.parent.name / md_file.with_suffix(".jsonl").name
+            )
+            return build(
+                "chunk",
+                (source, [md_file], [output]),
+                self.chunker.chunk_file,
+                md_file,
+                output,
+                source,
+            )
+
+        stages = [
+            Stage(
+                "convert",
+                source=convert,
+                outputs=[mid_dir, pdf_tab_dir],
+                on_finish=finish("convert", convert_config),
+            ),
+            Stage(
+                "html_table",
+                html_table,
+                inputs=["convert"],
+                outputs=[table_dir],
+                accept=lambda p: p.parent == mid_dir and p.suffix == ".html",
+                on_finish=finish("html_table"),
+            ),
+            Stage(
+                "pdf_doc",
+                pdf_doc,
+                inputs=["convert"],
+                outputs=[doc_dir],
+                workers=file_workers,
+                accept=lambda p: p.parent == mid_dir and p.suffix == ".pdf",
+                on_finish=finish("pdf_doc"),
+            ),
+            Stage(
+                "pdf_table",
+                workbook_table if workbook_engine else pdf_table,
+                inputs=["workbook"] if workbook_engine else ["convert"],
+                outputs=[pdf_md_dir],
+                workers=file_workers,
+                accept=None if workbook_engine else lambda p: p.parent == pdf_tab_dir,
+                on_finish=finish("pdf_table"),
+            ),
+            Stage(
+                "llm",
+                llm,
+                inputs=["html_table"],
+                outputs=[llm_tab_dir],
+                workers=self.llm_client.concurrency,
+                on_finish=finish("llm"),
+            ),
+            Stage(
+                "merge",
+                merge,
+                inputs=["pdf_table", "llm"],
+                outputs=[merge_tab_dir],
+                workers=self.merger.workers,
+                join_key=lambda p: p.name,
+                on_finish=finish("merge", {}),
+            ),
+        ]
+        if workbook_engine:
+            stages.append(Stage("workbook", source=workbooks))
+        if self.config.chunk.enabled:
+            stages.append(
+                Stage(
+                    "chunk",
+                    chunk,
+                    inputs=["pdf_doc", "merge"],
+                    outputs=[chunk_dir],
+                    accept=lambda p: p.suffix == ".md",
+                    on_finish=finish("chunk"),
+                )
+            )
+        return stages
+
+
+def setup_logging(log_level: str) -> None:
+    """配置根日志，只在程序入口调用，作为库使用时不改动调用方的日志配置"""
+    logging.basicConfig(
+        level=getattr(logging, log_level.upper(), logging.INFO),
+        format="%(message)s",
+    )
 
 
 def main():
@@ -233,6 +880,7 @@ def main():
 
     # 创建处理器实例
     processor = DocumentProcessor(config_path)
+    setup_logging(processor.config.metrics.log_level)
 
     # 定义路径
     source_dir = Path("./data/ori")
@@ -0,0 +1,135 @@
+"""
+Markdown分块模块
+按 md_formatter 生成的标题层级（# 文档、## 章、### 节、#### 条）将文档切分为条级知识块，
+每块带上级标题作为上下文，超出token上限时再按表格行或段落拆分，结果写为JSONL
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+from .table_chunker import TableChunker, estimate_tokens
+
+# 一至四级标题；##### 等更深的标题和 # 后没有空格的行按正文处理
+_HEADING = re.compile(r"^(#{1,4})(?!#)[ \t]+(.*?)\s*$")
+
+
+class MarkdownChunker:
+    """Markdown分块器"""
+
+    def __init__(self, max_tokens: int = 800):
+        # 每块正文的token上限（不含上级标题），不大于0时不拆分
+        self.max_tokens = max_tokens
+        self.table_chunker = TableChunker(token_budget=max_tokens, header_rows=0)
+
+    def sections(self, content: str) -> List[Tuple[List[str], str, str]]:
+        """按标题切分，返回 (上级标题路径, 条标题, 正文) 列表"""
+        sections: List[Tuple[List[str], str, str]] = []
+        # 标题级别 -> 标题文本
+        path: Dict[int, str] = {}
+        body: List[str] = []
+
+        def flush() -> None:
+            text = "\n".join(body).strip()
+            if text:
+                parents = [path[level] for level in sorted(path) if level < 4]
+                sections.append((parents, path.get(4, ""), text))
+            body.clear()
+
+        for line in content.split("\n"):
+            match = _HEADING.match(line)
+            if not match or not match.group(2):
+                body.append(line)
+                continue
+            level = len(match.group(1))
+            flush()
+            for deeper in [k for k in path if k >= level]:
+                del path[deeper]
+            path[level] = match.group(2)
+        flush()
+        return sections
+
+    def split_text(self, text: str) -> List[str]:
+        """将超出上限的正文按表格行（重复表头）或段落拆分"""
+        if self.max_tokens <= 0 or estimate_tokens(text) <= self.max_tokens:
+            return [text]
+
+        parts = []
+        for part in self.table_chunker.split(text):
+            if estimate_tokens(part) <= self.max_tokens:
+                parts.append(part)
+            else:
+                parts.extend(self._split_paragraphs(part))
+        return parts
+
+    def _split_paragraphs(self, text: str) -> List[str]:
+        """按行贪心装箱，单行超出上限时按字符硬切"""
+        parts: List[str] = []
+        current: List[str] = []
+        used = 0
+        for line in text.split("\n"):
+            for piece in self._split_line(line):
+                cost = estimate_tokens(piece) + 1
+                if current and used + cost > self.max_tokens:
+                    parts.append("\n".join(current).strip())
+                    current, used = [], 0
+                current.append(piece)
+                used += cost
+        if current:
+            parts.append("\n".join(current).strip())
+        return [part for part in parts if part]
+
+    def _split_line(self, line: str) -> List[str]:
+        if estimate_tokens(line) <= self.max_tokens:
+            return [line]
+        # 每个字符至多估为一个token
+        size = self.max_tokens
+        return [line[i : i + size] for i in range(0, len(line), size)]
+
+    def chunk(self, content: str, source: str) -> List[Dict[str, Any]]:
+        """
+        切分文档，返回知识块记录
+
+        id 由来源、标题路径、同一路径的出现次序和拆分序号决定，内容修改后保持不变；
+        hash 为内容摘要，用于判断知识块是否需要重新上传
+        """
+        records = []
+        seen: Dict[Tuple[str, ...], int] = {}
+        for parents, article, text in self.sections(content):
+            key = tuple(parents) + (article,)
+            occurrence = seen.get(key, 0)
+            seen[key] = occurrence + 1
+            # 条标题与上级标题一起作为每个拆分块的上下文
+            headings = parents + [article] if article else parents
+            for part_index, part in enumerate(self.split_text(text)):
+                q = "\n".join(headings + [part])
+                chunk_id = hashlib.sha1(
+                    "\x00".join(
+                        [source, *key, str(occurrence), str(part_index)]
+                    ).encode("utf-8")
+                ).hexdigest()[:16]
+                records.append(
+                    {
+                        "id": chunk_id,
+                        "source": source,
+                        "index": len(records),
+                        "headings": headings,
+                        "q": q,
+                        "tokens": estimate_tokens(q),
+                        "hash": hashlib.sha1(q.encode("utf-8")).hexdigest()[:16],
+                    }
+                )
+        return records
+
+    def chunk_file(self, md_path: Path, output_path: Path, source: str) -> int:
+        """切分单个Markdown文件写为JSONL，返回知识块数量"""
+        records = self.chunk(md_path.read_text(encoding="utf-8"), source)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = output_path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        tmp_path.replace(output_path)
+        return len(records)
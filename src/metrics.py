@@ -0,0 +1,252 @@
+"""
+运行指标模块
+统计各接口的请求次数、耗时分布、收发字节数、token用量以及各处理步骤的耗时，
+可导出为JSON或Prometheus文本格式
+"""
+
+import functools
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple
+
+# 请求耗时直方图的桶上界(秒)
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+
+PREFIX = "kb"
+
+
+class Histogram:
+    """累计直方图"""
+
+    def __init__(self, buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.buckets = buckets
+        # 每个桶的计数（非累计），最后一个为 +Inf
+        self.counts = [0] * (len(buckets) + 1)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, value: float) -> None:
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        else:
+            self.counts[-1] += 1
+        self.count += 1
+        self.sum += value
+
+    def cumulative(self) -> List[Tuple[str, int]]:
+        """(桶上界, 累计计数) 列表"""
+        result = []
+        total = 0
+        for bound, n in zip(list(self.buckets) + ["+Inf"], self.counts):
+            total += n
+            result.append((str(bound), total))
+        return result
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "buckets": dict(self.cumulative()),
+        }
+
+
+class MetricsRegistry:
+    """指标登记表，线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        # (接口, 方法, 状态) -> 请求次数；状态为HTTP状态码、error 或 circuit_open
+        self.requests: Dict[Tuple[str, str, str], int] = {}
+        self.latency: Dict[str, Histogram] = {}
+        self.bytes_out: Dict[str, int] = {}
+        self.bytes_in: Dict[str, int] = {}
+        # prompt / completion -> token数
+        self.tokens: Dict[str, int] = {}
+        # 步骤名 -> {runs, wall_seconds, cpu_seconds}，流水线调度的步骤另有 items, failures
+        self.stages: Dict[str, Dict[str, float]] = {}
+
+    def observe_request(
+        self,
+        endpoint: str,
+        method: str,
+        status: str,
+        seconds: Optional[float] = None,
+        bytes_out: int = 0,
+        bytes_in: int = 0,
+    ) -> None:
+        """记录一次请求尝试（重试的每一次都单独记录）"""
+        with self._lock:
+            key = (endpoint, method, status)
+            self.requests[key] = self.requests.get(key, 0) + 1
+            if seconds is not None:
+                self.latency.setdefault(endpoint, Histogram()).observe(seconds)
+            self.bytes_out[endpoint] = self.bytes_out.get(endpoint, 0) + bytes_out
+            self.bytes_in[endpoint] = self.bytes_in.get(endpoint, 0) + bytes_in
+
+    def add_bytes_in(self, endpoint: str, n: int) -> None:
+        """记录流式响应逐段接收的字节数"""
+        with self._lock:
+            self.bytes_in[endpoint] = self.bytes_in.get(endpoint, 0) + n
+
+    def add_tokens(self, usage: Dict[str, Any]) -> None:
+        """累加接口返回的token用量"""
+        with self._lock:
+            for kind in ("prompt", "completion"):
+                n = usage.get(f"{kind}_tokens")
+                if isinstance(n, int):
+                    self.tokens[kind] = self.tokens.get(kind, 0) + n
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """统计代码块的墙钟时间和CPU时间（含本进程各线程及已结束的子进程）"""
+        wall_start = time.perf_counter()
+        cpu_start = _cpu_seconds()
+        try:
+            yield
+        finally:
+            wall = time.perf_counter() - wall_start
+            cpu = _cpu_seconds() - cpu_start
+            self.record_stage(name, wall, cpu)
+            print(f"[{name}] 耗时 {wall:.2f}s, CPU {cpu:.2f}s")
+
+    def record_stage(
+        self,
+        name: str,
+        wall_seconds: float,
+        cpu_seconds: float,
+        items: Optional[int] = None,
+        failures: Optional[int] = None,
+    ) -> None:
+        """累加一次步骤运行的耗时，items / failures 为处理的文件数和失败数"""
+        with self._lock:
+            entry = self.stages.setdefault(
+                name, {"runs": 0, "wall_seconds": 0.0, "cpu_seconds": 0.0}
+            )
+            entry["runs"] += 1
+            entry["wall_seconds"] += wall_seconds
+            entry["cpu_seconds"] += cpu_seconds
+            for key, n in (("items", items), ("failures", failures)):
+                if n is not None:
+                    entry[key] = entry.get(key, 0) + n
+
+    def to_dict(self) -> Dict[str, Any]:
+        """导出为可JSON序列化的字典"""
+        with self._lock:
+            requests = [
+                {"endpoint": e, "method": m, "status": s, "count": n}
+                for (e, m, s), n in sorted(self.requests.items())
+            ]
+            return {
+                "requests": requests,
+                "latency_seconds": {
+                    e: h.to_dict() for e, h in sorted(self.latency.items())
+                },
+                "bytes_out": dict(sorted(self.bytes_out.items())),
+                "bytes_in": dict(sorted(self.bytes_in.items())),
+                "tokens": dict(sorted(self.tokens.items())),
+                "stages": {
+                    name: {k: round(v, 6) for k, v in entry.items()}
+                    for name, entry in self.stages.items()
+                },
+            }
+
+    def to_prometheus(self) -> str:
+        """导出为Prometheus文本格式"""
+        data = self.to_dict()
+        lines: List[str] = []
+
+        def header(name: str, kind: str, help_text: str) -> None:
+            lines.append(f"# HELP {PREFIX}_{name} {help_text}")
+            lines.append(f"# TYPE {PREFIX}_{name} {kind}")
+
+        def sample(name: str, labels: Dict[str, str], value: Any) -> None:
+            label_str = ",".join(f'{k}="{_escape(str(v))}"' for k, v in labels.items())
+            lines.append(f"{PREFIX}_{name}{{{label_str}}} {value}")
+
+        header("http_requests_total", "counter", "HTTP request attempts")
+        for item in data["requests"]:
+            labels = {k: item[k] for k in ("endpoint", "method", "status")}
+            sample("http_requests_total", labels, item["count"])
+
+        header("http_request_duration_seconds", "histogram", "HTTP request latency")
+        for endpoint, hist in data["latency_seconds"].items():
+            for bound, n in hist["buckets"].items():
+                sample(
+                    "http_request_duration_seconds_bucket",
+                    {"endpoint": endpoint, "le": bound},
+                    n,
+                )
+            sample(
+                "http_request_duration_seconds_sum", {"endpoint": endpoint}, hist["sum"]
+            )
+            sample(
+                "http_request_duration_seconds_count",
+                {"endpoint": endpoint},
+                hist["count"],
+            )
+
+        for key, name, help_text in (
+            ("bytes_out", "http_request_bytes_total", "HTTP request body bytes"),
+            ("bytes_in", "http_response_bytes_total", "HTTP response body bytes"),
+        ):
+            header(name, "counter", help_text)
+            for endpoint, n in data[key].items():
+                sample(name, {"endpoint": endpoint}, n)
+
+        header("llm_tokens_total", "counter", "LLM tokens reported by the API")
+        for kind, n in data["tokens"].items():
+            sample("llm_tokens_total", {"kind": kind}, n)
+
+        for key, kind, help_text in (
+            ("runs", "counter", "Pipeline stage runs"),
+            ("wall_seconds", "counter", "Pipeline stage wall time"),
+            ("cpu_seconds", "counter", "Pipeline stage CPU time"),
+            ("items", "counter", "Files processed by scheduled pipeline stages"),
+            ("failures", "counter", "Files failed in scheduled pipeline stages"),
+        ):
+            name = f"stage_{key}_total"
+            header(name, kind, help_text)
+            for stage, entry in data["stages"].items():
+                if key in entry:
+                    sample(name, {"stage": stage}, entry[key])
+
+        return "\n".join(lines) + "\n"
+
+    def export(self, path: Path) -> None:
+        """按后缀导出：.json 为JSON，其余为Prometheus文本格式"""
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.suffix == ".json":
+            text = json.dumps(self.to_dict(), ensure_ascii=False, indent=2)
+        else:
+            text = self.to_prometheus()
+        path.write_text(text, encoding="utf-8")
+        print(f"运行指标已保存到: {path}")
+
+
+def timed_stage(name: str) -> Callable:
+    """方法装饰器：以 self.metrics 统计方法的耗时"""
+
+    def decorator(func: Callable) -> Callable:
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.metrics.stage(name):
+                return func(self, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _cpu_seconds() -> float:
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,359 @@
+"""
+LibreOffice工作进程池模块
+维护多个常驻的无界面LibreOffice实例，通过任务队列分发文件转换
+"""
+
+import queue
+import shutil
+import socket
+import subprocess
+import tempfile
+import threading
+import time
+from concurrent.futures import Future
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Tuple
+
+# 转换目标: (目标格式, 输出目录)
+Target = Tuple[str, Path]
+
+
+def find_free_port() -> int:
+    """获取一个本地空闲端口"""
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class UnoOfficeBackend:
+    """常驻LibreOffice实例，通过UNO套接字连接执行转换"""
+
+    # 文档类型 -> (UNO服务名, {目标格式: 导出过滤器})
+    FILTERS = {
+        "calc": (
+            "com.sun.star.sheet.SpreadsheetDocument",
+            {"pdf": "calc_pdf_Export", "html": "HTML (StarCalc)"},
+        ),
+        "impress": (
+            "com.sun.star.presentation.PresentationDocument",
+            {"pdf": "impress_pdf_Export", "html": "impress_html_Export"},
+        ),
+        "draw": (
+            "com.sun.star.drawing.DrawingDocument",
+            {"pdf": "draw_pdf_Export", "html": "draw_html_Export"},
+        ),
+        "writer": (
+            "com.sun.star.text.TextDocument",
+            {"pdf": "writer_pdf_Export", "html": "HTML (StarWriter)"},
+        ),
+    }
+
+    def __init__(
+        self, libreoffice_path: str, profile_dir: Path, startup_timeout: float = 60.0
+    ):
+        self.libreoffice_path = libreoffice_path
+        self.profile_dir = profile_dir
+        self.startup_timeout = startup_timeout
+        self.process = None
+        self.desktop = None
+
+    def start(self) -> None:
+        """启动LibreOffice实例并建立UNO连接"""
+        import uno  # LibreOffice自带的Python绑定，仅在该后端中需要
+
+        port = find_free_port()
+        cmd = [
+            self.libreoffice_path,
+            "--headless",
+            "--invisible",
+            "--nologo",
+            "--norestore",
+            "--nodefault",
+            "--nolockcheck",
+            f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}",
+            f"--accept=socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext",
+        ]
+        self.process = subprocess.Popen(
+            cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+        )
+
+        local_ctx = uno.getComponentContext()
+        resolver = local_ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.bridge.UnoUrlResolver", local_ctx
+        )
+        url = f"uno:socket,host=127.0.0.1,port={port};urp;StarOffice.ComponentContext"
+
+        deadline = time.monotonic() + self.startup_timeout
+        while True:
+            try:
+                ctx = resolver.resolve(url)
+                break
+            except Exception:
+                if self.process.poll() is not None or time.monotonic() > deadline:
+                    self.stop()
+                    raise RuntimeError(f"LibreOffice实例启动失败: {self.profile_dir}")
+                time.sleep(0.5)
+
+        self.desktop = ctx.ServiceManager.createInstanceWithContext(
+            "com.sun.star.frame.Desktop", ctx
+        )
+
+    def is_alive(self) -> bool:
+        """检查实例是否仍在运行"""
+        return self.process is not None and self.process.poll() is None
+
+    def _property(self, name: str, value) -> object:
+        from com.sun.star.beans import PropertyValue
+
+        prop = PropertyValue()
+        prop.Name = name
+        prop.Value = value
+        return prop
+
+    def _doc_family(self, doc) -> Optional[str]:
+        for family, (service, _) in self.FILTERS.items():
+            if doc.supportsService(service):
+                return family
+        return None
+
+    def convert(self, input_path: Path, targets: List[Target]) -> bool:
+        """在常驻实例中打开文档一次，依次导出为各目标格式"""
+        import uno
+
+        doc = self.desktop.loadComponentFromURL(
+            uno.systemPathToFileUrl(str(input_path.resolve())),
+            "_blank",
+            0,
+            (self._property("Hidden", True),),
+        )
+        if doc is None:
+            return False
+
+        try:
+            filters = self.FILTERS.get(self._doc_family(doc), (None, {}))[1]
+            ok = True
+            for format_to, out_dir in targets:
+                filter_name = filters.get(format_to)
+                if filter_name is None:
+                    print(f"❌ 不支持的转换: {input_path.suffix} -> {format_to}")
+                    ok = False
+                    continue
+
+                output_path = out_dir.resolve() / f"{input_path.stem}.{format_to}"
+                doc.storeToURL(
+                    uno.systemPathToFileUrl(str(output_path)),
+                    (
+                        self._property("FilterName", filter_name),
+                        self._property("Overwrite", True),
+                    ),
+                )
+            return ok
+        finally:
+            doc.close(True)
+
+    def stop(self) -> None:
+        """关闭LibreOffice实例"""
+        if self.desktop is not None:
+            try:
+                self.desktop.terminate()
+            except Exception:
+                pass
+            self.desktop = None
+
+        if self.process is not None:
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+            self.process = None
+
+
+class SubprocessOfficeBackend:
+    """独立配置目录的命令行转换（UNO绑定不可用时的后备方案）"""
+
+    def __init__(self, libreoffice_path: str, profile_dir: Path):
+        self.libreoffice_path = libreoffice_path
+        self.profile_dir = profile_dir
+
+    def start(self) -> None:
+        pass
+
+    def is_alive(self) -> bool:
+        return True
+
+    def convert(self, input_path: Path, targets: List[Target]) -> bool:
+        """每个目标格式调用一次soffice，各工作线程使用各自的配置目录互不加锁"""
+        ok = True
+        for format_to, out_dir in targets:
+            cmd = [
+                self.libreoffice_path,
+                "--headless",
+                f"-env:UserInstallation={self.profile_dir.resolve().as_uri()}",
+                "--convert-to",
+                format_to,
+                "--outdir",
+                str(out_dir),
+                str(input_path),
+            ]
+            result = subprocess.run(cmd, capture_output=True, text=True)
+            if result.returncode != 0:
+                print(f"❌ 转换失败: {result.stderr}")
+                ok = False
+        return ok
+
+    def stop(self) -> None:
+        pass
+
+
+def default_backend_factory(libreoffice_path: str, profile_dir: Path):
+    """优先使用常驻UNO实例，缺少uno模块时退回命令行方式"""
+    try:
+        import uno  # noqa: F401
+
+        return UnoOfficeBackend(libreoffice_path, profile_dir)
+    except ImportError:
+        return SubprocessOfficeBackend(libreoffice_path, profile_dir)
+
+
+class WorkerStats:
+    """单个工作进程的吞吐统计"""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.files = 0
+        self.failures = 0
+        self.busy_seconds = 0.0
+
+    @property
+    def throughput(self) -> float:
+        """每秒完成的文件数"""
+        return self.files / self.busy_seconds if self.busy_seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (
+            f"{self.name}: 文件 {self.files} 个, 失败 {self.failures} 个, "
+            f"耗时 {self.busy_seconds:.1f}s, 吞吐 {self.throughput:.2f} 文件/秒"
+        )
+
+
+class OfficeWorkerPool:
+    """LibreOffice工作进程池"""
+
+    def __init__(
+        self,
+        libreoffice_path: str,
+        workers: int = 4,
+        backend_factory: Optional[Callable[[str, Path], object]] = None,
+        profile_root: Optional[Path] = None,
+    ):
+        self.libreoffice_path = libreoffice_path
+        self.workers = max(1, workers)
+        self.backend_factory = backend_factory or default_backend_factory
+        self.profile_root = profile_root
+
+        self.stats: List[WorkerStats] = []
+        self.results: Dict[Path, bool] = {}
+        self._queue: "queue.Queue" = queue.Queue()
+        self._threads: List[threading.Thread] = []
+        self._lock = threading.Lock()
+        self._tmp_root: Optional[str] = None
+
+    def __enter__(self) -> "OfficeWorkerPool":
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self.close()
+
+    def start(self) -> None:
+        """启动所有工作线程，每个线程持有一个独立配置目录的LibreOffice实例"""
+        if self.profile_root is None:
+            self._tmp_root = tempfile.mkdtemp(prefix="lo_pool_")
+            root = Path(self._tmp_root)
+        else:
+            root = self.profile_root
+
+        for i in range(self.workers):
+            profile_dir = root / f"worker_{i}"
+            profile_dir.mkdir(parents=True, exist_ok=True)
+            stats = WorkerStats(f"worker_{i}")
+            self.stats.append(stats)
+
+            thread = threading.Thread(
+                target=self._worker_loop, args=(profile_dir, stats), daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+
+    def submit(self, input_path: Path, format_to: str, out_dir: Path) -> None:
+        """提交一个转换任务"""
+        self.submit_multi(input_path, [(format_to, out_dir)])
+
+    def submit_multi(self, input_path: Path, targets: List[Target]) -> Future:
+        """提交一个多目标转换任务，文档只加载一次；返回的Future在转换结束后给出是否成功"""
+        future: Future = Future()
+        self._queue.put((input_path, targets, future))
+        return future
+
+    def join(self) -> Dict[Path, bool]:
+        """等待队列中的任务全部完成，返回各任务的转换结果"""
+        self._queue.join()
+        return self.results
+
+    def close(self) -> None:
+        """结束工作线程并清理临时配置目录"""
+        for _ in self._threads:
+            self._queue.put(None)
+        for thread in self._threads:
+            thread.join()
+        self._threads = []
+
+        if self._tmp_root is not None:
+            shutil.rmtree(self._tmp_root, ignore_errors=True)
+            self._tmp_root = None
+
+    def report(self) -> None:
+        """打印每个工作进程的吞吐量"""
+        for stats in self.stats:
+            print(stats)
+
+    def _worker_loop(self, profile_dir: Path, stats: WorkerStats) -> None:
+        backend = None
+        try:
+            while True:
+                job = self._queue.get()
+                if job is None:
+                    self._queue.task_done()
+                    break
+
+                input_path, targets, future = job
+                start = time.perf_counter()
+                try:
+                    if backend is None or not backend.is_alive():
+                        backend = self.backend_factory(
+                            self.libreoffice_path, profile_dir
+                        )
+                        backend.start()
+                    ok = backend.convert(input_path, targets)
+                except Exception as e:
+                    print(f"❌ 转换异常: {input_path}: {e}")
+                    ok = False
+                    if backend is not None and not backend.is_alive():
+                        backend = None
+
+                stats.busy_seconds += time.perf_counter() - start
+                stats.files += 1
+                if ok:
+                    print(f"✅ 转换成功: {input_path}")
+                else:
+                    print(f"❌ 转换失败: {input_path}")
+                    stats.failures += 1
+
+                with self._lock:
+                    self.results[input_path] = ok
+                future.set_result(ok)
+                self._queue.task_done()
+        finally:
+            if backend is not None:
+                backend.stop()
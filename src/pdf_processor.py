@@ -4,58 +4,87 @@ PDF处理模块
 """
 
 import re
+import shutil
+from fnmatch import fnmatch
 import pandas as pd
 import pdfplumber
 import camelot
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import List, Any
+from typing import Dict, List, Any, Optional, Tuple
+
+from .utils import tables_to_markdown
+
+# 文档结构规则合并为一个预编译的交替模式，一次扫描完成全部替换
+# 各规则匹配的文本互不重叠，且替换结果不会产生新的匹配，因此与逐条依次替换等价
+MD_PATTERN = re.compile(
+    r"(?P<chapter>第[一二三四五六七八九十百]+章)"
+    r"|(?P<article>第[一二三四五六七八九十百]+条)"
+    r"|(?P<section>第[一二三四五六七八九十百]+节)"
+    r"|(?P<item>（[一二三四五六七八九十百]+）)"
+    r"|(?P<number>\d+)\."
+    r"|(?P<attachment>附件：)"
+)
+
+MD_REPLACEMENTS = {
+    "chapter": "\n\n## {} ",
+    "article": "\n\n#### {}\n",
+    "section": "\n\n### {} ",
+    "item": "\n\n{}",
+    "number": "\n\n（{}）",
+    "attachment": "\n\n## {}\n",
+}
+
+# 拼接词语时使用的分隔符，任何规则都不会跨越它匹配
+WORD_SEPARATOR = "\x00"
+
+
+def _md_replace(match: "re.Match") -> str:
+    kind = match.lastgroup
+    return MD_REPLACEMENTS[kind].format(match.group(kind))
 
 
 class PDFProcessor:
     """PDF处理器"""
 
-    def __init__(self):
-        pass
+    def __init__(
+        self,
+        camelot_flavor: str = "lattice",
+        page_workers: int = 0,
+        pages_per_chunk: int = 16,
+        file_workers: int = 0,
+        layout: str = "bbox",
+        table_pages: str = "all",
+        table_pages_by_file: Optional[Dict[str, str]] = None,
+    ):
+        # camelot表格识别方式: lattice(有框线) / stream(无框线)
+        self.camelot_flavor = camelot_flavor
+        # 文档版面还原方式: bbox(按坐标去重并排序) / text(按首个单元格文本匹配插入表格)
+        self.layout = layout
+        # 大于1时按页范围拆分单个PDF，多进程并行提取
+        self.page_workers = page_workers
+        self.pages_per_chunk = pages_per_chunk
+        # 大于1时批量处理按文件多进程并行（此时单个文件内部不再拆分页）
+        self.file_workers = file_workers
+        # 表格提取的页码范围（camelot格式，如 "1"、"1,3-5"、"2-end"、"all"）
+        self.table_pages = table_pages
+        # 文件名通配模式 -> 页码范围，按顺序取第一个匹配的模式
+        self.table_pages_by_file = table_pages_by_file or {}
 
     def md_formatter(self, str_in: str) -> str:
         """格式化文档文本为Markdown格式"""
-        if "章" in str_in:
-            str_in = re.sub(
-                r"(第[一二三四五六七八九十百]+章)",
-                r"\n\n## \1 ",
-                str_in,
-            )
-        if "条" in str_in:
-            str_in = re.sub(
-                r"(第[一二三四五六七八九十百]+条)",
-                r"\n\n#### \1\n",
-                str_in,
-            )
-        if "节" in str_in:
-            str_in = re.sub(
-                r"(第[一二三四五六七八九十百]+节)",
-                r"\n\n### \1 ",
-                str_in,
-            )
-        if "（" in str_in:
-            str_in = re.sub(
-                r"(（[一二三四五六七八九十百]+）)",
-                r"\n\n\1",
-                str_in,
-            )
-        if "." in str_in:
-            str_in = re.sub(
-                r"(\d+)\.",
-                r"\n\n（\1）",
-                str_in,
-            )
-        if "附件" in str_in:
-            str_in = re.sub(
-                r"(附件：)",
-                r"\n\n## \1\n",
-                str_in,
-            )
-        return str_in
+        return MD_PATTERN.sub(_md_replace, str_in)
+
+    def format_words(self, text_list: List[str]) -> str:
+        """
+        格式化一页的词语列表并拼接，结果与逐词调用 md_formatter 后拼接相同
+
+        词语以分隔符拼接后整体扫描一次，分隔符阻止规则跨词匹配
+        """
+        if any(WORD_SEPARATOR in text for text in text_list):
+            return "".join(self.md_formatter(text) for text in text_list)
+        joined = WORD_SEPARATOR.join(text_list)
+        return self.md_formatter(joined).replace(WORD_SEPARATOR, "")
 
     def format_table(self, table: List[List[str]]) -> str:
         """格式化表格为Markdown"""
@@ -102,98 +131,324 @@ class PDFProcessor:
 
         return None
 
+    def build_word_index(self, text_list: List[str]) -> Dict[str, List[int]]:
+        """建立非空词语到其所有出现位置的索引"""
+        index: Dict[str, List[int]] = {}
+        for i, text in enumerate(text_list):
+            if text is not None and text.strip() != "":
+                index.setdefault(text, []).append(i)
+        return index
+
     def replace_table_in_text(
         self, tables: List[List[List[str]]], text_list: List[str]
     ) -> List[str]:
-        """在文本中替换表格"""
-        inserted_list = text_list.copy()
+        """
+        将所有表格插入到文本中首个单元格内容所在的位置
+
+        先建立词语位置索引为每个表格定位（首个单元格相同的多个表格依次占用后续出现位置），
+        再一次遍历词语列表完成合并。找不到定位的表格不插入。
+        """
+        word_index = self.build_word_index(text_list)
+        used: Dict[str, int] = {}
+        insertions: Dict[int, List[str]] = {}
 
         for table in tables:
-            table_inserted = self.format_table(table)
-            h_idx = self.find_non_empty_indexes(inserted_list, table)
-            if h_idx is not None:
-                inserted_list = text_list[:h_idx] + [table_inserted] + text_list[h_idx:]
-            else:
-                inserted_list = text_list
+            if not table or not table[0] or table[0][0] is None:
+                continue
+            anchor = table[0][0]
+            positions = word_index.get(anchor, [])
+            n_used = used.get(anchor, 0)
+            if n_used >= len(positions):
+                continue
+            used[anchor] = n_used + 1
+            insertions.setdefault(positions[n_used], []).append(
+                self.format_table(table)
+            )
+
+        if not insertions:
+            return list(text_list)
 
+        inserted_list = []
+        for i, text in enumerate(text_list):
+            inserted_list.extend(insertions.get(i, ()))
+            inserted_list.append(text)
         return inserted_list
 
-    def pdf_doc_to_markdown(self, pdf_path: Path, output_path: Path) -> None:
-        """将PDF文档转换为Markdown"""
-        with pdfplumber.open(pdf_path) as pdf:
-            page_list = []
-            for page in pdf.pages:
-                words = page.extract_words(x_tolerance=3, y_tolerance=3)
-                tables = page.extract_tables()
-                text_list = [w.get("text") for w in words]
+    @staticmethod
+    def _inside_any(word: Dict[str, Any], bboxes: List[Tuple[float, ...]]) -> bool:
+        """词语中心点是否落在任一表格区域内"""
+        cx = (word["x0"] + word["x1"]) / 2
+        cy = (word["top"] + word["bottom"]) / 2
+        return any(
+            x0 <= cx <= x1 and top <= cy <= bottom for x0, top, x1, bottom in bboxes
+        )
+
+    def layout_blocks(self, page) -> List[str]:
+        """
+        按版面坐标组织页面内容
+
+        表格只检测一次，其区域和内容都取自同一组Table对象；落在表格区域内的词语被丢弃，
+        避免与表格重复；表格按上边界插入到阅读顺序中的对应位置。
+        """
+        tables = page.find_tables()
+        words = page.extract_words(x_tolerance=3, y_tolerance=3)
 
-                text_list = self.replace_table_in_text(tables, text_list)
-                if text_list:
-                    text_list.pop()  # 移除最后一个元素
+        if words:
+            words.pop()  # 移除最后一个词语（页脚）
+        bboxes = [table.bbox for table in tables]
+        kept = [w for w in words if not self._inside_any(w, bboxes)]
+
+        table_blocks = sorted(
+            ((table.bbox[1], table.bbox[0], i) for i, table in enumerate(tables))
+        )
+        blocks = []
+        t_idx = 0
+        for word in kept:
+            while t_idx < len(table_blocks) and table_blocks[t_idx][0] <= word["top"]:
+                blocks.append(
+                    self.format_table(tables[table_blocks[t_idx][2]].extract())
+                )
+                t_idx += 1
+            blocks.append(word["text"])
+        for _, _, i in table_blocks[t_idx:]:
+            blocks.append(self.format_table(tables[i].extract()))
+        return blocks
+
+    def page_to_markdown(self, page) -> str:
+        """将单个PDF页面转换为Markdown文本"""
+        if self.layout == "bbox":
+            return self.format_words(self.layout_blocks(page))
+
+        words = page.extract_words(x_tolerance=3, y_tolerance=3)
+        tables = page.extract_tables()
+        text_list = [w.get("text") for w in words]
+
+        text_list = self.replace_table_in_text(tables, text_list)
+        if text_list:
+            text_list.pop()  # 移除最后一个元素
+
+        return self.format_words(text_list)
+
+    def pages_to_markdown(self, pdf_path: Path, page_range: Tuple[int, int]) -> str:
+        """转换指定页范围[start, end)，供进程池中的子进程独立打开PDF调用"""
+        start, end = page_range
+        with pdfplumber.open(pdf_path) as pdf:
+            return "".join(self.page_to_markdown(page) for page in pdf.pages[start:end])
 
-                text_list = [self.md_formatter(l) for l in text_list]
-                page_list.append("".join(text_list))
+    def pdf_doc_to_markdown(
+        self, pdf_path: Path, output_path: Path, parallel: bool = True
+    ) -> None:
+        """将PDF文档转换为Markdown，页数较多时按页范围并行提取"""
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+            if (
+                not parallel
+                or self.page_workers <= 1
+                or page_count <= self.pages_per_chunk
+            ):
+                content = "# " + "".join(
+                    self.page_to_markdown(page) for page in pdf.pages
+                )
+            else:
+                content = None
 
-            content = "# " + "".join(page_list)
+        if content is None:
+            ranges = [
+                (start, min(start + self.pages_per_chunk, page_count))
+                for start in range(0, page_count, self.pages_per_chunk)
+            ]
+            with ProcessPoolExecutor(max_workers=self.page_workers) as executor:
+                # map按提交顺序返回结果，拼接后与串行结果一致
+                parts = executor.map(
+                    self.pages_to_markdown, [pdf_path] * len(ranges), ranges
+                )
+                content = "# " + "".join(parts)
 
         with open(output_path, "w", encoding="utf-8") as f:
             f.write(content)
 
-    def pdf_table_to_markdown(self, pdf_path: Path, output_path: Path) -> None:
-        """将PDF表格转换为Markdown"""
+    def pages_for(self, pdf_path: Path) -> str:
+        """确定文件的表格提取页码范围"""
+        for pattern, pages in self.table_pages_by_file.items():
+            if fnmatch(pdf_path.name, pattern):
+                return str(pages)
+        return str(self.table_pages)
+
+    @staticmethod
+    def page_numbers(pages: str, page_count: int) -> List[int]:
+        """将页码范围展开为页码列表（从1开始，去重并保持顺序）"""
+        if pages.strip() == "all":
+            return list(range(1, page_count + 1))
+        numbers: List[int] = []
+        for part in pages.split(","):
+            part = part.strip()
+            if not part:
+                continue
+            if "-" in part:
+                start, end = part.split("-", 1)
+                end = page_count if end.strip() == "end" else int(end)
+                numbers.extend(range(int(start), min(end, page_count) + 1))
+            elif int(part) <= page_count:
+                numbers.append(int(part))
+        return list(dict.fromkeys(n for n in numbers if n >= 1))
+
+    def table_page_chunks(self, pdf_path: Path) -> List[str]:
+        """按 pages_per_chunk 将文件的提取页拆分为若干组，每组为camelot页码字符串"""
+        with pdfplumber.open(pdf_path) as pdf:
+            page_count = len(pdf.pages)
+        numbers = self.page_numbers(self.pages_for(pdf_path), page_count)
+        size = max(1, self.pages_per_chunk)
+        return [
+            ",".join(str(n) for n in numbers[i : i + size])
+            for i in range(0, len(numbers), size)
+        ]
+
+    def read_tables(self, pdf_path: Path, pages: str) -> List[str]:
+        """提取指定页的表格，返回各表格的Markdown，供进程池中的子进程调用"""
+        ctabs = camelot.io.read_pdf(
+            str(pdf_path), pages=pages, flavor=self.camelot_flavor, strip_text="\n"
+        )
+        return [ctab.df.to_markdown(index=False) for ctab in ctabs]
+
+    def write_tables(
+        self, pdf_path: Path, tables: List[str], output_path: Path
+    ) -> None:
+        """将按页序排列的表格写为Markdown文件"""
+        with open(output_path, "w", encoding="utf-8") as f:
+            f.write(tables_to_markdown(pdf_path.stem, tables))
+
+    def pdf_table_to_markdown(
+        self, pdf_path: Path, output_path: Path, parallel: bool = True
+    ) -> None:
+        """
+        将PDF表格转换为Markdown，页数较多时按页范围并行提取
+
+        串行和并行都按 page_numbers 展开的页码提取，超出页数的部分同样忽略，结果与工作进程数无关
+        """
         try:
-            ctabs = camelot.io.read_pdf(
-                str(pdf_path), pages="1", flavor="lattice", strip_text="\n"
-            )
-            md = f"# {pdf_path.stem}\n\n" + "\n\n".join(
-                [ctab.df.to_markdown(index=False) for ctab in ctabs]
-            )
+            chunks = self.table_page_chunks(pdf_path)
+            if not (parallel and self.page_workers > 1) and chunks:
+                chunks = [",".join(chunks)]
 
-            md = re.sub(r"( {2,})", r" ", md)
-            md = re.sub(r"(-{3,})", r"-----", md)
+            if len(chunks) > 1:
+                with ProcessPoolExecutor(max_workers=self.page_workers) as executor:
+                    # map按提交顺序返回结果，表格顺序与串行提取一致
+                    parts = executor.map(
+                        self.read_tables, [pdf_path] * len(chunks), chunks
+                    )
+                    tables = [table for part in parts for table in part]
+            else:
+                tables = self.read_tables(pdf_path, chunks[0]) if chunks else []
 
-            with open(output_path, "w", encoding="utf-8") as f:
-                f.write(md)
+            self.write_tables(pdf_path, tables, output_path)
         except Exception as e:
             print(f"处理PDF表格时出错 {pdf_path}: {e}")
 
-    def batch_process_pdfs(self, source_dir: Path, output_dir: Path) -> None:
-        """批量处理PDF文件"""
+    def doc_output_path(self, pdf_file: Path, output_dir: Path) -> Optional[Path]:
+        """按文件名分类确定PDF文档的输出路径，无法分类的文件返回None"""
+        if "通知" in pdf_file.name:
+            return output_dir / pdf_file.name
+        if any(
+            k in pdf_file.name for k in ["表", "单", "签报", "标准", "细则", "办法"]
+        ):
+            return output_dir / pdf_file.with_suffix(".md").name
+        return None
+
+    def batch_process_pdfs(
+        self, source_dir: Path, output_dir: Path, files: Optional[List[Path]] = None
+    ) -> None:
+        """批量处理PDF文件，files 指定时只处理这些文件"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        if files is None:
+            files = list(source_dir.glob("*.pdf"))
+
+        if self.file_workers > 1 and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=self.file_workers) as executor:
+                futures = []
+                for cnt, pdf_file in enumerate(files):
+                    print(f"文件{cnt}开始处理（{pdf_file.stem}）")
+                    futures.append(
+                        executor.submit(
+                            self.process_pdf_file, pdf_file, output_dir, False
+                        )
+                    )
+                for future in futures:
+                    future.result()
+            return
+
         cnt = 0
-        for pdf_file in source_dir.glob("*.pdf"):
+        for pdf_file in files:
             print(f"文件{cnt}开始处理（{pdf_file.stem}）")
-            output_path = output_dir / pdf_file.with_suffix(".md").name
-
-            if "通知" in pdf_file.name:
-                # 直接复制通知类文件
-                import shutil
+            self.process_pdf_file(pdf_file, output_dir)
+            cnt += 1
 
-                shutil.copyfile(pdf_file, output_dir / pdf_file.name)
-            elif (
-                "表" in pdf_file.name
-                or "单" in pdf_file.name
-                or "签报" in pdf_file.name
-            ):
-                print("处理表格文件")
-                self.pdf_table_to_markdown(pdf_file, output_path)
-            elif (
-                "标准" in pdf_file.name
-                or "细则" in pdf_file.name
-                or "办法" in pdf_file.name
-            ):
-                self.pdf_doc_to_markdown(pdf_file, output_path)
+    def process_pdf_file(
+        self, pdf_file: Path, output_dir: Path, parallel: bool = True
+    ) -> None:
+        """按文件名分类处理单个PDF文件"""
+        output_path = output_dir / pdf_file.with_suffix(".md").name
 
-            cnt += 1
+        if "通知" in pdf_file.name:
+            # 直接复制通知类文件
+            shutil.copyfile(pdf_file, output_dir / pdf_file.name)
+        elif "表" in pdf_file.name or "单" in pdf_file.name or "签报" in pdf_file.name:
+            print("处理表格文件")
+            # 在进程池中调用时 parallel 为False，不再嵌套创建进程池
+            self.pdf_table_to_markdown(pdf_file, output_path, parallel=parallel)
+        elif (
+            "标准" in pdf_file.name
+            or "细则" in pdf_file.name
+            or "办法" in pdf_file.name
+        ):
+            self.pdf_doc_to_markdown(pdf_file, output_path, parallel=parallel)
 
-    def batch_process_pdf_tables(self, source_dir: Path, output_dir: Path) -> None:
-        """批量处理PDF表格文件"""
+    def batch_process_pdf_tables(
+        self, source_dir: Path, output_dir: Path, files: Optional[List[Path]] = None
+    ) -> None:
+        """批量处理PDF表格文件，files 指定时只处理这些文件"""
         output_dir.mkdir(parents=True, exist_ok=True)
 
+        if files is None:
+            files = list(source_dir.glob("*.pdf"))
+
+        if self.file_workers > 1 and files:
+            self._batch_tables_parallel(files, output_dir)
+            return
+
         cnt = 0
-        for pdf_file in source_dir.glob("*.pdf"):
+        for pdf_file in files:
             print(f"文件{cnt}开始处理（{pdf_file.stem}）")
             output_path = output_dir / pdf_file.with_suffix(".md").name
             self.pdf_table_to_markdown(pdf_file, output_path)
             cnt += 1
+
+    def _batch_tables_parallel(self, files: List[Path], output_dir: Path) -> None:
+        """
+        各文件按页分组后一起提交到进程池，文件和页同时并行
+
+        结果按文件及页序收集，输出与串行一致；某个文件出错时只跳过该文件
+        """
+        with ProcessPoolExecutor(max_workers=self.file_workers) as executor:
+            submitted = []
+            for cnt, pdf_file in enumerate(files):
+                print(f"文件{cnt}开始处理（{pdf_file.stem}）")
+                try:
+                    chunks = self.table_page_chunks(pdf_file)
+                except Exception as e:
+                    print(f"处理PDF表格时出错 {pdf_file}: {e}")
+                    continue
+                futures = [
+                    executor.submit(self.read_tables, pdf_file, pages)
+                    for pages in chunks
+                ]
+                submitted.append((pdf_file, futures))
+
+            for pdf_file, futures in submitted:
+                try:
+                    tables = [table for f in futures for table in f.result()]
+                except Exception as e:
+                    print(f"处理PDF表格时出错 {pdf_file}: {e}")
+                    continue
+                output_path = output_dir / pdf_file.with_suffix(".md").name
+                self.write_tables(pdf_file, tables, output_path)
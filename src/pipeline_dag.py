@@ -0,0 +1,275 @@
+"""
+流水线调度模块
+按步骤间的依赖关系组成有向无环图，上游每产出一个文件即交给下游处理，
+相互独立的分支并行执行，步骤之间没有整体等待
+"""
+
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence
+
+
+class PipelineError(Exception):
+    """流水线中有文件处理失败"""
+
+
+class Stage:
+    """
+    流水线步骤
+
+    没有上游的步骤由 source 产出文件；其余步骤对上游产出的每个文件调用 process，
+    返回的文件再交给下游。inputs 声明上游步骤，outputs 声明本步骤写出文件的目录（运行前创建）；
+    accept 用于筛选上游产出中本步骤需要的文件；
+    设置 join_key 时，按键把各上游的同名产出凑齐后以 {上游步骤名: 文件} 调用 process
+    """
+
+    def __init__(
+        self,
+        name: str,
+        process: Optional[Callable[[Any], Iterable[Any]]] = None,
+        inputs: Sequence[str] = (),
+        outputs: Sequence[Path] = (),
+        workers: int = 1,
+        source: Optional[Callable[[], Iterable[Any]]] = None,
+        accept: Optional[Callable[[Any], bool]] = None,
+        join_key: Optional[Callable[[Any], Any]] = None,
+        on_finish: Optional[Callable[[], None]] = None,
+    ):
+        if (source is None) == (process is None):
+            raise ValueError(f"步骤 {name} 需要且只能指定 source 或 process 之一")
+        if source is not None and inputs:
+            raise ValueError(f"步骤 {name} 有上游时不能指定 source")
+        if process is not None and not inputs:
+            # 没有上游的处理步骤永远收不到文件，也不会结束
+            raise ValueError(f"步骤 {name} 指定 process 时必须有上游")
+        self.name = name
+        self.process = process
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.workers = max(1, workers)
+        self.source = source
+        self.accept = accept
+        self.join_key = join_key
+        self.on_finish = on_finish
+
+
+class _StageState:
+    """步骤的运行状态"""
+
+    def __init__(self, stage: Stage):
+        self.stage = stage
+        self.downstream: List[Stage] = []
+        self.upstream_done = 0
+        # 数据源步骤的产出是否已全部给出
+        self.source_done = False
+        self.inflight = 0
+        self.finished = False
+        self.items = 0
+        self.failures = 0
+        # 执行本步骤的线程所用的CPU时间，不含进程池子进程和外部进程
+        self.cpu_seconds = 0.0
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        # join 步骤: 键 -> {上游步骤名: 文件}
+        self.pending: Dict[Any, Dict[str, Any]] = {}
+        self.executor: Optional[ThreadPoolExecutor] = None
+
+
+class PipelineScheduler:
+    """有向无环图流水线调度器"""
+
+    def __init__(self, stages: List[Stage]):
+        self.stages = stages
+        self.states: Dict[str, _StageState] = {}
+        for stage in stages:
+            if stage.name in self.states:
+                raise ValueError(f"步骤名重复: {stage.name}")
+            self.states[stage.name] = _StageState(stage)
+        for stage in stages:
+            for upstream in stage.inputs:
+                if upstream not in self.states:
+                    raise ValueError(f"步骤 {stage.name} 的上游 {upstream} 不存在")
+                self.states[upstream].downstream.append(stage)
+        self.order = self._topological_order()
+
+        self.errors: List[BaseException] = []
+        self._lock = threading.RLock()
+        self._all_done = threading.Event()
+
+    def _topological_order(self) -> List[str]:
+        """检查依赖关系无环并返回拓扑顺序"""
+        indegree = {name: len(s.stage.inputs) for name, s in self.states.items()}
+        ready = [name for name, n in indegree.items() if n == 0]
+        order = []
+        while ready:
+            name = ready.pop(0)
+            order.append(name)
+            for downstream in self.states[name].downstream:
+                indegree[downstream.name] -= 1
+                if indegree[downstream.name] == 0:
+                    ready.append(downstream.name)
+        if len(order) != len(self.states):
+            raise ValueError("流水线步骤之间存在循环依赖")
+        return order
+
+    def run(self) -> None:
+        """运行全部步骤，等待结束；有文件处理失败时在全部结束后抛出 PipelineError"""
+        if not self.states:
+            return
+        for state in self.states.values():
+            for directory in state.stage.outputs:
+                directory.mkdir(parents=True, exist_ok=True)
+            if state.stage.process is not None:
+                state.executor = ThreadPoolExecutor(
+                    max_workers=state.stage.workers,
+                    thread_name_prefix=f"stage_{state.stage.name}",
+                )
+
+        sources = [
+            threading.Thread(target=self._run_source, args=(s,), daemon=True)
+            for s in self.states.values()
+            if s.stage.source is not None
+        ]
+        # 先检查一遍各步骤，已满足结束条件的步骤（如没有数据源的图）不会让等待一直阻塞
+        with self._lock:
+            for state in self.states.values():
+                self._check_done(state)
+        for thread in sources:
+            thread.start()
+        self._all_done.wait()
+        for thread in sources:
+            thread.join()
+        for state in self.states.values():
+            if state.executor is not None:
+                state.executor.shutdown(wait=True)
+
+        self.report()
+        if self.errors:
+            raise PipelineError(
+                f"流水线有 {len(self.errors)} 个文件处理失败"
+            ) from self.errors[0]
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """
+        各步骤的统计，按拓扑顺序排列
+
+        items / failures 为处理的文件数和失败数，wall_seconds 为从收到第一个文件到步骤结束的时间，
+        cpu_seconds 为执行该步骤的线程所用的CPU时间
+        """
+        result = {}
+        with self._lock:
+            for name in self.order:
+                state = self.states[name]
+                wall = 0.0
+                if state.started_at is not None and state.finished_at is not None:
+                    wall = state.finished_at - state.started_at
+                result[name] = {
+                    "items": state.items,
+                    "failures": state.failures,
+                    "wall_seconds": wall,
+                    "cpu_seconds": state.cpu_seconds,
+                }
+        return result
+
+    def report(self) -> None:
+        """打印各步骤处理的文件数和耗时"""
+        for name, entry in self.summary().items():
+            print(
+                f"[{name}] 处理 {entry['items']} 个, 失败 {entry['failures']} 个, "
+                f"耗时 {entry['wall_seconds']:.2f}s"
+            )
+
+    def _run_source(self, state: _StageState) -> None:
+        state.started_at = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            for item in state.stage.source():
+                with self._lock:
+                    state.items += 1
+                self._emit(state, item)
+        except Exception as e:
+            self._fail(state, None, e)
+        with self._lock:
+            state.cpu_seconds += time.thread_time() - cpu_start
+            state.source_done = True
+            self._check_done(state)
+
+    def _emit(self, state: _StageState, item: Any) -> None:
+        """将产出交给接受它的下游步骤"""
+        for downstream in state.downstream:
+            if downstream.accept is None or downstream.accept(item):
+                self._deliver(self.states[downstream.name], state.stage.name, item)
+
+    def _deliver(self, state: _StageState, upstream: str, item: Any) -> None:
+        stage = state.stage
+        if stage.join_key is not None:
+            with self._lock:
+                group = state.pending.setdefault(stage.join_key(item), {})
+                group[upstream] = item
+                if len(group) < len(stage.inputs):
+                    return
+                del state.pending[stage.join_key(item)]
+            item = group
+
+        with self._lock:
+            state.inflight += 1
+            if state.started_at is None:
+                state.started_at = time.perf_counter()
+        state.executor.submit(self._run_item, state, item)
+
+    def _run_item(self, state: _StageState, item: Any) -> None:
+        cpu_start = time.thread_time()
+        try:
+            outputs = state.stage.process(item) or []
+            for output in outputs:
+                self._emit(state, output)
+        except Exception as e:
+            self._fail(state, item, e)
+        finally:
+            with self._lock:
+                state.cpu_seconds += time.thread_time() - cpu_start
+                state.items += 1
+                state.inflight -= 1
+                self._check_done(state)
+
+    def _fail(self, state: _StageState, item: Any, error: BaseException) -> None:
+        print(f"[{state.stage.name}] 处理失败 {item}: {error}")
+        with self._lock:
+            state.failures += 1
+            self.errors.append(error)
+
+    def _check_done(self, state: _StageState) -> None:
+        """上游全部结束且没有进行中的任务时结束该步骤，并逐级通知下游"""
+        worklist = [state]
+        while worklist:
+            state = worklist.pop()
+            if state.finished or state.inflight:
+                continue
+            if state.upstream_done < len(state.stage.inputs):
+                continue
+            if state.stage.source is not None and not state.source_done:
+                continue
+
+            state.finished = True
+            state.finished_at = time.perf_counter()
+            if state.started_at is None:
+                state.started_at = state.finished_at
+            for key, group in state.pending.items():
+                missing = [name for name in state.stage.inputs if name not in group]
+                print(f"[{state.stage.name}] {key} 缺少上游产出 {missing}，跳过")
+            state.pending.clear()
+            if state.stage.on_finish is not None:
+                try:
+                    state.stage.on_finish()
+                except Exception as e:
+                    self._fail(state, None, e)
+
+            for downstream in state.downstream:
+                downstream_state = self.states[downstream.name]
+                downstream_state.upstream_done += 1
+                worklist.append(downstream_state)
+
+            if all(s.finished for s in self.states.values()):
+                self._all_done.set()
@@ -0,0 +1,151 @@
+"""
+问答评估模块
+将问题并发发送给多个应用，结果边得到边追加写入CSV，最后导出Excel
+"""
+
+import csv
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import pandas as pd
+
+from .checkpoint import CheckpointJournal
+from .config import IdKeyPair
+from .http_transport import TransportError
+from .llm_client import LLMClient
+
+ROLE_PROMPT = """<context>你的角色是"财务制度库查询助手"，主要职责是帮助用户快速准确地查找公司内部的财务制度、政策文件以及相关的指导原则。请遵循以下指导来完成任务：
+
+理解查询需求：首先，你需要理解用户的查询需求。这可能包括具体的政策名称、关键词或者与某个特定主题相关的信息。
+数据库搜索：使用内部数据库或知识库进行搜索，找到与用户请求最相关的规章制度或文件。确保搜索范围包括但不限于公司手册、员工守则、合规指南等文档。
+提供结果摘要：为用户提供搜索结果的简要概述，并附上直接链接或附件（如果适用），以便他们可以进一步阅读完整内容。
+确认与反馈：询问用户是否找到了他们所需要的信息，如果没有找到，请进一步澄清他们的需求并再次尝试提供帮助；如果找到了，询问是否有其他问题需要解答。
+记录查询情况：在每次交互后，记录下查询的情况，包括查询主题、提供的资料、用户满意度等信息，以便于后续分析和改进服务。
+请以礼貌且专业的态度回应所有请求，并确保所提供的信息是最新的且准确无误。</context>\n 问题如下：\n"""
+
+# 结果CSV的列
+FIELDS = [
+    "序号",
+    "应用",
+    "问题",
+    "标答",
+    "回答",
+    "耗时(秒)",
+    "输入tokens",
+    "输出tokens",
+    "错误",
+]
+
+
+class QAEvaluator:
+    """问答评估器"""
+
+    def __init__(
+        self,
+        llm_client: LLMClient,
+        apps: List[IdKeyPair],
+        journal: Optional[CheckpointJournal] = None,
+        role_prompt: str = ROLE_PROMPT,
+    ):
+        self.llm_client = llm_client
+        self.apps = apps
+        # 断点日志：记录每个(应用, 问题)的结果行，续跑时直接复用
+        self.journal = journal
+        # 最近一次 run 中请求失败（未记入断点日志）的任务数
+        self.failures = 0
+        self.role_prompt = role_prompt
+
+    def run(self, qa_list: List[Dict[str, Any]], output_file: Path) -> Path:
+        """
+        评估全部问题，返回结果CSV路径
+
+        每个(应用, 问题)为一个任务，以 llm_client.concurrency 个线程并发执行；
+        每得到一个结果即追加写入与 output_file 同名的CSV，全部完成后导出Excel
+        """
+        csv_path = output_file.with_suffix(".csv")
+        csv_path.parent.mkdir(parents=True, exist_ok=True)
+
+        tasks = []
+        with open(csv_path, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.DictWriter(f, fieldnames=FIELDS)
+            writer.writeheader()
+            for i, qa in enumerate(qa_list):
+                for app in self.apps:
+                    key = f"{app.name}/{i}"
+                    if self.journal is not None and self.journal.done("qa", key):
+                        writer.writerow(self.journal.get("qa", key))
+                    else:
+                        tasks.append((i, qa, app))
+            f.flush()
+
+            self.failures = 0
+            done = len(qa_list) * len(self.apps) - len(tasks)
+            total = len(qa_list) * len(self.apps)
+            with ThreadPoolExecutor(max_workers=self.llm_client.concurrency) as pool:
+                futures = [pool.submit(self._ask, *task) for task in tasks]
+                for future in as_completed(futures):
+                    row = future.result()
+                    writer.writerow(row)
+                    if row["错误"]:
+                        self.failures += 1
+                    f.flush()
+                    done += 1
+                    if done % 50 == 0 or done == total:
+                        print(f"问答评估进度: {done}/{total}")
+
+        self.export_excel(csv_path, output_file)
+        return csv_path
+
+    def _ask(self, index: int, qa: Dict[str, Any], app: IdKeyPair) -> Dict[str, Any]:
+        """向单个应用提问，记录回答、耗时和token用量"""
+        chat_id = f"qa_{index}"
+        row = {
+            "序号": index,
+            "应用": app.name,
+            "问题": qa["问题"],
+            "标答": qa.get("答案", ""),
+            "回答": "",
+            "耗时(秒)": None,
+            "输入tokens": None,
+            "输出tokens": None,
+            "错误": "",
+        }
+
+        start = time.perf_counter()
+        try:
+            # 评估需要反映知识库当前状态，不使用响应缓存
+            self.llm_client.delete_one_chat(chat_id, app)
+            answer, usage = self.llm_client.chat_completion(
+                self.role_prompt + qa["问题"], chat_id, app
+            )
+        except TransportError as e:
+            print(f"问题请求失败 {qa['问题']}: {e}")
+            row["错误"] = str(e)
+            return row
+        finally:
+            row["耗时(秒)"] = round(time.perf_counter() - start, 3)
+
+        row["回答"] = answer
+        row["输入tokens"] = usage.get("prompt_tokens")
+        row["输出tokens"] = usage.get("completion_tokens")
+        if self.journal is not None:
+            self.journal.record("qa", f"{app.name}/{index}", row)
+        return row
+
+    def export_excel(self, csv_path: Path, output_file: Path) -> None:
+        """将结果CSV整理为每个问题一行、每个应用一列回答的Excel"""
+        df = pd.read_csv(csv_path, encoding="utf-8-sig", keep_default_na=False)
+        df = df.sort_values("序号", kind="stable")
+
+        exp_df = df.drop_duplicates("序号")[["序号", "问题", "标答"]].set_index("序号")
+        for app in self.apps:
+            rows = df[df["应用"] == app.name].set_index("序号")
+            exp_df[app.name] = rows["回答"]
+            exp_df[f"{app.name}耗时(秒)"] = rows["耗时(秒)"]
+
+        with pd.ExcelWriter(output_file) as writer:
+            exp_df.to_excel(writer, sheet_name="结果", index=False)
+            df.to_excel(writer, sheet_name="明细", index=False)
+        print(f"评估结果已保存到: {output_file}")
@@ -0,0 +1,228 @@
+"""
+表格分块模块
+按token预算将表格拆分为若干行组，每块重复表头，供大模型分块并发处理
+"""
+
+import re
+from typing import Dict, List, Optional, Tuple
+
+# 中日韩字符按每字一个token估算，其余字符按每4个一个token估算
+_CJK = re.compile(r"[\u3000-\u303f\u3400-\u9fff\uf900-\ufaff\uff00-\uffef]")
+_MD_SEPARATOR = re.compile(r"^\|?\s*:?-+:?\s*(\|\s*:?-+:?\s*)*\|?\s*$")
+_HTML_ROW_START = re.compile(r"^\s*<(tr|r)[\s>]")
+_HTML_ROW_END = re.compile(r"^\s*</(tr|r)>")
+_HTML_TABLE_START = re.compile(r"^\s*<table[\s>]")
+_HTML_TABLE_END = re.compile(r"^\s*</table>")
+_HTML_WRAPPER = re.compile(r"^\s*</?(thead|tbody|tfoot)[\s>]")
+_ROWSPAN = re.compile(r"rowspan=[\"']?(\d+)")
+
+# 行组: (所属表格序号, 行列表)，序号为None表示表格之外的文本
+Group = Tuple[Optional[int], List[str]]
+
+
+def estimate_tokens(text: str) -> int:
+    """粗略估算文本的token数"""
+    cjk = len(_CJK.findall(text))
+    return cjk + (len(text) - cjk + 3) // 4
+
+
+class TableChunker:
+    """表格分块器"""
+
+    def __init__(self, token_budget: int = 4000, header_rows: int = 1):
+        # 每块的token预算，不大于0时不分块
+        self.token_budget = token_budget
+        # 每块重复的表头数据行数
+        self.header_rows = header_rows
+
+    def split(self, content: str) -> List[str]:
+        """
+        拆分表格内容，支持 HTMLTableProcessor 的压缩格式和Markdown表格
+
+        内容未超出预算或无法识别表格行时原样返回一块；
+        跨行合并(rowspan)的行不会被拆到不同块中
+        """
+        if self.token_budget <= 0 or estimate_tokens(content) <= self.token_budget:
+            return [content]
+
+        lines = content.split("\n")
+        if any(_HTML_ROW_START.match(line) for line in lines):
+            parsed = self._parse_html(lines)
+        else:
+            parsed = self._parse_markdown(lines)
+
+        prefix, heads, tails, groups, suffix = parsed
+        if len([g for g in groups if g[0] is not None]) <= 1:
+            return [content]
+        return self._pack(prefix, heads, tails, groups, suffix)
+
+    def _parse_html(self, lines: List[str]) -> tuple:
+        """解析压缩格式HTML：表格开始标签和前 header_rows 行作为表头"""
+        heads: Dict[int, List[str]] = {}
+        tails: Dict[int, List[str]] = {}
+        groups: List[Group] = []
+        outside: List[str] = []
+        prefix: Optional[List[str]] = None
+
+        table = None
+        rows: List[List[str]] = []
+        row: Optional[List[str]] = None
+
+        for line in lines:
+            if table is None:
+                if _HTML_TABLE_START.match(line):
+                    if prefix is None:
+                        prefix, outside = outside, []
+                    elif outside:
+                        groups.append((None, outside))
+                        outside = []
+                    table = len(heads)
+                    heads[table] = [line]
+                    tails[table] = []
+                    rows = []
+                else:
+                    outside.append(line)
+                continue
+
+            if row is not None:
+                row.append(line)
+                if _HTML_ROW_END.match(line):
+                    rows.append(row)
+                    row = None
+            elif _HTML_ROW_START.match(line):
+                row = [line]
+            elif _HTML_TABLE_END.match(line):
+                tails[table] = [line]
+                self._add_table_rows(table, rows, heads, tails, groups)
+                table = None
+            elif not _HTML_WRAPPER.match(line):
+                # thead/tbody 在分块后没有意义，其余行原样保留在表头
+                heads[table].append(line)
+
+        if table is not None:
+            self._add_table_rows(table, rows, heads, tails, groups)
+        return prefix or [], heads, tails, groups, outside
+
+    def _add_table_rows(
+        self,
+        table: int,
+        rows: List[List[str]],
+        heads: Dict[int, List[str]],
+        tails: Dict[int, List[str]],
+        groups: List[Group],
+    ) -> None:
+        """表头行并入表头，其余行按rowspan合并为不可拆分的行组"""
+        for row in rows[: self.header_rows]:
+            heads[table].extend(row)
+
+        body = rows[self.header_rows :]
+        if not body:
+            # 只有表头的表格整体作为一组
+            groups.append((None, heads[table] + tails[table]))
+            return
+        i = 0
+        while i < len(body):
+            end = i + 1
+            j = i
+            while j < end:
+                spans = [int(n) for n in _ROWSPAN.findall("\n".join(body[j]))]
+                end = min(len(body), max([end] + [j + n for n in spans]))
+                j += 1
+            groups.append((table, [line for r in body[i:end] for line in r]))
+            i = end
+
+    def _parse_markdown(self, lines: List[str]) -> tuple:
+        """解析Markdown表格：列名行、分隔行和前 header_rows 行作为表头"""
+        heads: Dict[int, List[str]] = {}
+        groups: List[Group] = []
+        outside: List[str] = []
+        prefix: Optional[List[str]] = None
+
+        i = 0
+        while i < len(lines):
+            if not lines[i].lstrip().startswith("|"):
+                outside.append(lines[i])
+                i += 1
+                continue
+
+            j = i
+            while j < len(lines) and lines[j].lstrip().startswith("|"):
+                j += 1
+            block = lines[i:j]
+            i = j
+
+            if prefix is None:
+                prefix, outside = outside, []
+            elif outside:
+                groups.append((None, outside))
+                outside = []
+
+            table = len(heads)
+            n_head = 2 if len(block) > 1 and _MD_SEPARATOR.match(block[1]) else 1
+            n_head += self.header_rows
+            heads[table] = block[:n_head]
+            if len(block) > n_head:
+                groups.extend((table, [line]) for line in block[n_head:])
+            else:
+                groups.append((None, block))
+
+        tails = {table: [] for table in heads}
+        return prefix or [], heads, tails, groups, outside
+
+    def _pack(
+        self,
+        prefix: List[str],
+        heads: Dict[int, List[str]],
+        tails: Dict[int, List[str]],
+        groups: List[Group],
+        suffix: List[str],
+    ) -> List[str]:
+        """按预算贪心装箱，每块都带上前后缀和所在表格的表头"""
+
+        def cost(lines: List[str]) -> int:
+            return sum(estimate_tokens(line) + 1 for line in lines)
+
+        base = cost(prefix) + cost(suffix)
+        chunks = []
+        current: List[Group] = []
+        used = base
+
+        for table, lines in groups:
+            extra = cost(lines)
+            if table is not None and table not in {t for t, _ in current}:
+                extra += cost(heads[table]) + cost(tails[table])
+            if current and used + extra > self.token_budget:
+                chunks.append(self._render(prefix, heads, tails, current, suffix))
+                current = []
+                used = base
+                if table is not None:
+                    extra = cost(lines) + cost(heads[table]) + cost(tails[table])
+            current.append((table, lines))
+            used += extra
+
+        if current:
+            chunks.append(self._render(prefix, heads, tails, current, suffix))
+        return chunks
+
+    def _render(
+        self,
+        prefix: List[str],
+        heads: Dict[int, List[str]],
+        tails: Dict[int, List[str]],
+        groups: List[Group],
+        suffix: List[str],
+    ) -> str:
+        out = list(prefix)
+        table = None
+        for group_table, lines in groups:
+            if group_table != table:
+                if table is not None:
+                    out.extend(tails[table])
+                if group_table is not None:
+                    out.extend(heads[group_table])
+                table = group_table
+            out.extend(lines)
+        if table is not None:
+            out.extend(tails[table])
+        out.extend(suffix)
+        return "\n".join(out)
@@ -0,0 +1,168 @@
+"""
+表格序列化模块
+按节点事件直接生成中等/高压缩格式的表格文本，不再经过 prettify 和多轮正则替换
+"""
+
+import re
+from typing import Dict, List, Optional
+
+# HTML空元素：无子节点时输出为 <br/> 形式
+VOID_ELEMENTS = {
+    "area",
+    "base",
+    "basefont",
+    "bgsound",
+    "br",
+    "col",
+    "command",
+    "embed",
+    "frame",
+    "hr",
+    "image",
+    "img",
+    "input",
+    "isindex",
+    "keygen",
+    "link",
+    "menuitem",
+    "meta",
+    "nextid",
+    "param",
+    "source",
+    "spacer",
+    "track",
+    "wbr",
+}
+
+# 高压缩格式的标签映射说明
+TAG_MAPPING_COMMENT = "<!-- 标签映射表={<table>:<t>,<tr>:<r>,<td>:<d>,<th>:<h>} -->"
+
+# 注释等原样输出的片段中可能出现的标签文本，按原格式化规则处理
+_RAW_TAG_NEWLINE = re.compile(r"(</?t[rdable].*?>)\n\s+")
+_RAW_CLOSE_SPACE = re.compile(r"\s+(</t[rdable]>)")
+_RAW_TAG = re.compile(r"</?t[rdable]")
+_RAW_COMPACT = re.compile(r"(</*)t([drh].*?>)")
+_RAW_ROW = re.compile(r"(</*tr)")
+
+
+def escape_text(text: str) -> str:
+    """转义文本中的 & < >"""
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def format_attrs(attrs: Dict[str, Optional[str]]) -> str:
+    """按属性名排序输出属性字符串"""
+    parts = []
+    for key, value in sorted(attrs.items()):
+        if value is None:
+            parts.append(key)
+            continue
+        value = escape_text(value)
+        if '"' in value:
+            if "'" in value:
+                value = '"' + value.replace('"', "&quot;") + '"'
+            else:
+                value = "'" + value + "'"
+        else:
+            value = '"' + value + '"'
+        parts.append(f"{key}={value}")
+    return " " + " ".join(parts) if parts else ""
+
+
+class CompactTableWriter:
+    """
+    表格压缩格式写出器
+
+    依次接收开始标签、结束标签、文本等事件，逐行生成与原
+    prettify + 正则流程相同的输出：表格标签后的行不缩进，
+    单行内容的单元格合并为一行，<td> 缩进两格、<tr> 缩进一格；
+    compact 为真时将 <td>/<tr>/<th> 映射为 <d>/<r>/<h>
+    """
+
+    def __init__(self, compact: bool = False):
+        self.compact = compact
+        self.lines: List[str] = []
+        self.depth = 0
+        # 上一行以 table/tr/td 等表格标签结尾时，下一行不缩进
+        self._dedent_next = False
+        # 最近一个 <td> 开始标签所在的行号
+        self._td_line = -1
+
+    def _tag(self, name: str, attrs: str, closing: bool, void: bool) -> str:
+        prefix = ""
+        if name.startswith("td") and not closing:
+            prefix = "  "
+        elif name.startswith("tr"):
+            prefix = " "
+        if self.compact and name[:1] == "t" and name[1:2] in ("d", "r", "h"):
+            name = name[1:]
+        slash = "/" if closing else ""
+        end = "/>" if void else ">"
+        return f"{prefix}<{slash}{name}{attrs}{end}"
+
+    def _emit(self, piece: str, dedent: bool = False) -> None:
+        indent = "" if dedent or self._dedent_next else " " * self.depth
+        self.lines.append(indent + piece)
+
+    def _is_table_tag(self, name: str) -> bool:
+        return name[:1] == "t" and name[1:2] in ("r", "d", "a", "b", "l", "e")
+
+    def start(self, name: str, attrs: Dict[str, Optional[str]]) -> None:
+        """开始标签"""
+        self._emit(self._tag(name, format_attrs(attrs), False, False))
+        if name.startswith("td"):
+            self._td_line = len(self.lines) - 1
+        self._dedent_next = self._is_table_tag(name)
+        self.depth += 1
+
+    def end(self, name: str) -> None:
+        """结束标签"""
+        self.depth -= 1
+        tag = self._tag(name, "", True, False)
+        # </tr> </td> 等两字母的表格结束标签顶格
+        dedent = len(name) == 2 and self._is_table_tag(name)
+        self._emit(tag, dedent)
+
+        if name == "td":
+            td_line = self._td_line
+            last = len(self.lines) - 1
+            if td_line == last - 1:
+                # 空单元格合并为一行
+                self.lines[td_line] += self.lines.pop().lstrip()
+            elif td_line == last - 2 and "\n" not in self.lines[last - 1]:
+                # 只有一行内容的单元格合并为一行
+                closing = self.lines.pop().lstrip()
+                content = self.lines.pop()
+                self.lines[td_line] += content + closing
+            self._td_line = -1
+        self._dedent_next = self._is_table_tag(name)
+
+    def void(self, name: str, attrs: Dict[str, Optional[str]]) -> None:
+        """无子节点的空元素"""
+        self._emit(self._tag(name, format_attrs(attrs), False, True))
+        self._dedent_next = self._is_table_tag(name)
+
+    def text(self, piece: str) -> None:
+        """已转义的文本片段，首尾空白被去除，空片段忽略"""
+        piece = piece.strip()
+        if not piece:
+            return
+        self._emit(piece)
+        self._dedent_next = False
+
+    def raw(self, piece: str) -> None:
+        """注释、pre 等原样输出的片段"""
+        piece = _RAW_TAG_NEWLINE.sub(r"\1\n", piece)
+        piece = _RAW_CLOSE_SPACE.sub(r"\n\1", piece)
+        piece = piece.replace("<td", "  <td")
+        piece = _RAW_ROW.sub(r" \1", piece)
+        if self.compact:
+            piece = _RAW_COMPACT.sub(r"\1\2", piece)
+        self._emit(piece)
+
+        last_line = piece.rsplit("\n", 1)[-1]
+        self._dedent_next = bool(_RAW_TAG.search(last_line)) and last_line.endswith(">")
+
+    def getvalue(self) -> str:
+        """返回全部输出行，每行以换行结尾"""
+        return "".join(line + "\n" for line in self.lines)
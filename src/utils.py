@@ -6,7 +6,7 @@
 import re
 import json
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
 
 
 def mask(key: str) -> str:
@@ -58,6 +58,81 @@ def clean_content(content: str) -> str:
     return remove_multi_newlines(remove_think(content))
 
 
+def tables_to_markdown(title: str, tables: List[str]) -> str:
+    """将各表格的Markdown拼接为一个文档，压缩多余空格和分隔线"""
+    md = f"# {title}\n\n" + "\n\n".join(tables)
+
+    md = re.sub(r"( {2,})", r" ", md)
+    md = re.sub(r"(-{3,})", r"-----", md)
+    return md
+
+
+class StreamCleaner:
+    """clean_content 的流式版本：逐段输入回答，输出去除<think>块、压缩空行并去除首尾空白后的文本"""
+
+    THINK_OPEN = "<think>"
+    THINK_CLOSE = "</think>"
+
+    def __init__(self):
+        self._in_think = False
+        self._pending = ""  # 可能是标签前缀的未决文本
+        self._started = False
+        self._whitespace = ""  # 暂缓输出的空白，后面出现非空白字符时才输出
+
+    @staticmethod
+    def _partial_suffix(text: str, tag: str) -> int:
+        """text 末尾与 tag 开头重合的最大长度"""
+        for size in range(min(len(text), len(tag) - 1), 0, -1):
+            if tag.startswith(text[-size:]):
+                return size
+        return 0
+
+    def _strip_think(self, text: str) -> str:
+        buffer = self._pending + text
+        self._pending = ""
+        out = []
+        while buffer:
+            tag = self.THINK_CLOSE if self._in_think else self.THINK_OPEN
+            idx = buffer.find(tag)
+            if idx >= 0:
+                if not self._in_think:
+                    out.append(buffer[:idx])
+                buffer = buffer[idx + len(tag) :]
+                self._in_think = not self._in_think
+                continue
+
+            keep = self._partial_suffix(buffer, tag)
+            if not self._in_think:
+                out.append(buffer[: len(buffer) - keep])
+            self._pending = buffer[len(buffer) - keep :] if keep else ""
+            break
+        return "".join(out)
+
+    def _squeeze(self, text: str) -> str:
+        out = []
+        for char in text:
+            if char.isspace():
+                if self._started:
+                    self._whitespace += char
+                continue
+            if self._whitespace:
+                out.append(re.sub(r"\n{3,}", "\n\n", self._whitespace))
+                self._whitespace = ""
+            out.append(char)
+            self._started = True
+        return "".join(out)
+
+    def feed(self, text: str) -> str:
+        """输入一段原始回答，返回可以立即输出的清理后文本"""
+        return self._squeeze(self._strip_think(text))
+
+    def flush(self) -> str:
+        """回答结束，输出剩余文本（丢弃结尾空白）"""
+        rest = "" if self._in_think else self._pending
+        self._pending = ""
+        return self._squeeze(rest)
+
+
 def load_json_to_dict(file_path: Path) -> Optional[Dict[str, Any]]:
     """安全地将JSON文件加载为字典"""
     try:
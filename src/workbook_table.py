@@ -0,0 +1,220 @@
+"""
+Excel表格提取模块
+直接从工作簿读取单元格生成Markdown，输出格式与 PDFProcessor.pdf_table_to_markdown 一致，
+省去Excel→PDF转换和camelot图像识别两个步骤
+"""
+
+import re
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, datetime, time
+from pathlib import Path
+from typing import Any, List, Optional, Tuple
+
+import pandas as pd
+
+from .utils import tables_to_markdown
+
+# 与原 rglob("*.xls*") 导出PDF的范围一致，.xlsm 同样由openpyxl读取
+WORKBOOK_SUFFIXES = (".xls", ".xlsx", ".xlsm")
+
+# 合并区域: (首行, 首列, 末行, 末列)，从0开始且包含末行末列
+MergedRange = Tuple[int, int, int, int]
+
+
+def format_value(value: Any, number_format: str = "General") -> str:
+    """按单元格数字格式将值转为显示文本（覆盖常用的小数位、千分位和百分比格式）"""
+    if value is None:
+        return ""
+    if isinstance(value, bool):
+        return "TRUE" if value else "FALSE"
+    if isinstance(value, datetime):
+        if value.time() == time(0):
+            return value.date().isoformat()
+        return value.isoformat(sep=" ")
+    if isinstance(value, (date, time)):
+        return value.isoformat()
+    if isinstance(value, (int, float)):
+        number_format = number_format or "General"
+        match = re.search(r"0\.(0+)", number_format)
+        decimals = len(match.group(1)) if match else 0
+        if "%" in number_format:
+            return f"{value * 100:.{decimals}f}%"
+        if number_format != "General" and "0" in number_format:
+            separator = "," if "#,##" in number_format else ""
+            return f"{value:{separator}.{decimals}f}"
+        if float(value).is_integer():
+            return str(int(value))
+        return format(value, ".15g")
+    # camelot 以 strip_text="\n" 提取，单元格内换行同样去除
+    return str(value).replace("\n", "").strip()
+
+
+class WorkbookTableExtractor:
+    """工作簿表格提取器"""
+
+    def __init__(self, fill_merged: bool = False, workers: int = 0):
+        # 合并单元格: False 时只在左上角保留文本（与camelot默认一致），True 时填充整个区域
+        self.fill_merged = fill_merged
+        # 大于1时批量处理按文件多进程并行
+        self.workers = workers
+
+    def read_sheets(self, path: Path) -> List[Tuple[str, List[List[str]]]]:
+        """读取各可见工作表，返回 (工作表名, 单元格文本二维表) 列表"""
+        if path.suffix == ".xls":
+            return self._read_xls(path)
+        return self._read_xlsx(path)
+
+    def _read_xlsx(self, path: Path) -> List[Tuple[str, List[List[str]]]]:
+        from openpyxl import load_workbook
+        from openpyxl.utils import column_index_from_string
+
+        # 需要合并区域和行列隐藏信息，不能使用只读模式；公式取缓存的计算结果
+        wb = load_workbook(path, data_only=True)
+        sheets = []
+        try:
+            for ws in wb.worksheets:
+                if ws.sheet_state != "visible":
+                    continue
+                grid = [
+                    [format_value(cell.value, cell.number_format) for cell in row]
+                    for row in ws.iter_rows()
+                ]
+                merged = [
+                    (r.min_row - 1, r.min_col - 1, r.max_row - 1, r.max_col - 1)
+                    for r in ws.merged_cells.ranges
+                ]
+                hidden_rows = {
+                    i - 1 for i, dim in ws.row_dimensions.items() if dim.hidden
+                }
+                # Excel 将连续的隐藏列写为一个 <col min max> 区间，openpyxl 只按首列字母存放
+                hidden_cols = set()
+                for dim in ws.column_dimensions.values():
+                    if dim.hidden:
+                        first = dim.min or column_index_from_string(dim.index)
+                        hidden_cols.update(range(first - 1, dim.max or first))
+                sheets.append(
+                    (ws.title, self._build_grid(grid, merged, hidden_rows, hidden_cols))
+                )
+        finally:
+            wb.close()
+        return sheets
+
+    def _read_xls(self, path: Path) -> List[Tuple[str, List[List[str]]]]:
+        import xlrd
+
+        # formatting_info 提供合并区域、数字格式和行列隐藏信息
+        book = xlrd.open_workbook(str(path), formatting_info=True)
+        sheets = []
+        for sheet in book.sheets():
+            if sheet.visibility != 0:
+                continue
+            grid = []
+            for r in range(sheet.nrows):
+                row = []
+                for c in range(sheet.ncols):
+                    cell = sheet.cell(r, c)
+                    fmt = book.format_map[book.xf_list[cell.xf_index].format_key]
+                    value = cell.value
+                    if (
+                        cell.ctype == xlrd.XL_CELL_EMPTY
+                        or cell.ctype == xlrd.XL_CELL_BLANK
+                    ):
+                        value = None
+                    elif cell.ctype == xlrd.XL_CELL_DATE:
+                        value = xlrd.xldate_as_datetime(value, book.datemode)
+                    elif cell.ctype == xlrd.XL_CELL_BOOLEAN:
+                        value = bool(value)
+                    row.append(format_value(value, fmt.format_str))
+                grid.append(row)
+            merged = [
+                (rlo, clo, rhi - 1, chi - 1)
+                for rlo, rhi, clo, chi in sheet.merged_cells
+            ]
+            hidden_rows = {r for r, info in sheet.rowinfo_map.items() if info.hidden}
+            hidden_cols = {c for c, info in sheet.colinfo_map.items() if info.hidden}
+            sheets.append(
+                (sheet.name, self._build_grid(grid, merged, hidden_rows, hidden_cols))
+            )
+        return sheets
+
+    def _build_grid(
+        self,
+        grid: List[List[str]],
+        merged: List[MergedRange],
+        hidden_rows: set,
+        hidden_cols: set,
+    ) -> List[List[str]]:
+        """处理合并单元格，去掉隐藏行列（打印时不输出），并裁剪到有内容的区域"""
+        # 填充后的表用于确定内容区域，合并区域延伸到的行列也保留
+        filled = [list(row) for row in grid]
+        for top, left, bottom, right in merged:
+            if top >= len(grid) or left >= len(grid[top]):
+                continue
+            text = grid[top][left]
+            for r in range(top, min(bottom, len(grid) - 1) + 1):
+                for c in range(left, min(right, len(grid[r]) - 1) + 1):
+                    if (r, c) != (top, left):
+                        filled[r][c] = text
+                        grid[r][c] = ""
+        if self.fill_merged:
+            grid = filled
+
+        def visible(table: List[List[str]]) -> List[List[str]]:
+            return [
+                [text for c, text in enumerate(row) if c not in hidden_cols]
+                for r, row in enumerate(table)
+                if r not in hidden_rows
+            ]
+
+        grid, filled = visible(grid), visible(filled)
+        rows = [r for r, row in enumerate(filled) if any(row)]
+        if not rows:
+            return []
+        cols = [c for row in filled for c, text in enumerate(row) if text]
+        first_col, last_col = min(cols), max(cols)
+        return [
+            (row + [""] * (last_col + 1 - len(row)))[first_col : last_col + 1]
+            for row in grid[rows[0] : rows[-1] + 1]
+        ]
+
+    def workbook_to_markdown(self, path: Path, output_path: Path) -> None:
+        """将工作簿各工作表的表格转换为Markdown"""
+        try:
+            tables = [
+                # 与camelot结果相同，以列序号为表头
+                pd.DataFrame(grid).to_markdown(index=False)
+                for _, grid in self.read_sheets(path)
+                if grid
+            ]
+            with open(output_path, "w", encoding="utf-8") as f:
+                f.write(tables_to_markdown(path.stem, tables))
+        except Exception as e:
+            print(f"处理Excel表格时出错 {path}: {e}")
+
+    def batch_process_workbooks(
+        self, source_dir: Path, output_dir: Path, files: Optional[List[Path]] = None
+    ) -> None:
+        """批量处理工作簿，files 指定时只处理这些文件"""
+        output_dir.mkdir(parents=True, exist_ok=True)
+
+        if files is None:
+            files = sorted(
+                f for f in source_dir.rglob("*.*") if f.suffix in WORKBOOK_SUFFIXES
+            )
+
+        if self.workers > 1 and len(files) > 1:
+            with ProcessPoolExecutor(max_workers=self.workers) as executor:
+                futures = []
+                for cnt, path in enumerate(files):
+                    print(f"文件{cnt}开始处理（{path.stem}）")
+                    output_path = output_dir / path.with_suffix(".md").name
+                    futures.append(
+                        executor.submit(self.workbook_to_markdown, path, output_path)
+                    )
+                for future in futures:
+                    future.result()
+            return
+
+        for cnt, path in enumerate(files):
+            print(f"文件{cnt}开始处理（{path.stem}）")
+            self.workbook_to_markdown(path, output_dir / path.with_suffix(".md").name)
@@ -0,0 +1,155 @@
+"""
+md_formatter 微基准
+比较改写前逐词调用六次 re.sub 的实现与单次扫描整页的 format_words，并核对两者输出一致
+
+    python -m tests.bench_md_formatter [--words 140000] [--repeat 5]
+    python -m tests.bench_md_formatter --write-golden   # 用逐词实现重新生成黄金文件
+"""
+
+import argparse
+import json
+import random
+import re
+import time
+from pathlib import Path
+from typing import List
+
+from src.pdf_processor import PDFProcessor
+
+GOLDEN_DIR = Path(__file__).parent / "data" / "md_formatter"
+
+NUMERALS = "一二三四五六七八九十百"
+
+
+def baseline_md_formatter(str_in: str) -> str:
+    """改写前的实现，逐词调用"""
+    if "章" in str_in:
+        str_in = re.sub(r"(第[一二三四五六七八九十百]+章)", r"\n\n## \1 ", str_in)
+    if "条" in str_in:
+        str_in = re.sub(r"(第[一二三四五六七八九十百]+条)", r"\n\n#### \1\n", str_in)
+    if "节" in str_in:
+        str_in = re.sub(r"(第[一二三四五六七八九十百]+节)", r"\n\n### \1 ", str_in)
+    if "（" in str_in:
+        str_in = re.sub(r"(（[一二三四五六七八九十百]+）)", r"\n\n\1", str_in)
+    if "." in str_in:
+        str_in = re.sub(r"(\d+)\.", r"\n\n（\1）", str_in)
+    if "附件" in str_in:
+        str_in = re.sub(r"(附件：)", r"\n\n## \1\n", str_in)
+    return str_in
+
+
+def baseline_format_words(text_list: List[str]) -> str:
+    return "".join(baseline_md_formatter(text) for text in text_list)
+
+
+def numeral(rng: random.Random) -> str:
+    return "".join(rng.choice(NUMERALS) for _ in range(rng.randint(1, 3)))
+
+
+def make_word(rng: random.Random) -> str:
+    """生成一个类似 extract_words 结果的词语，包含各条规则及其跨词拆分的情形"""
+    r = rng.random()
+    if r < 0.04:
+        return f"第{numeral(rng)}章"
+    if r < 0.08:
+        return f"第{numeral(rng)}节"
+    if r < 0.16:
+        return f"第{numeral(rng)}条"
+    if r < 0.22:
+        return f"（{numeral(rng)}）" + rng.choice(["", "差旅费", "住宿标准"])
+    if r < 0.30:
+        return rng.choice(["1.", "12.", "3.5", "2023.10.1", "第3.", "v1.2.3", "."])
+    if r < 0.33:
+        return rng.choice(["附件：", "附件", "：", "附件：费用标准表"])
+    if r < 0.38:
+        # 单个规则被拆到相邻词语中，逐词处理时不匹配
+        return rng.choice(["第一", "章", "第十", "条", "（", "二）", "第", "百节"])
+    if r < 0.40:
+        return f"第{numeral(rng)}章第{numeral(rng)}条"
+    if r < 0.42:
+        return "\n| 项目 | 标准 |\n|-----|-----|\n| 1.餐费 | 100 |\n"
+    if r < 0.44:
+        return ""
+    return rng.choice(
+        [
+            "费用",
+            "报销",
+            "应当",
+            "按照",
+            "本办法",
+            "规定",
+            "执行",
+            "出差人员",
+            "交通费",
+            "标准",
+            "为",
+            "元",
+            "，",
+            "。",
+            "省分行",
+            "机构",
+            "审批",
+            "章程",
+            "条款",
+            "章节",
+        ]
+    )
+
+
+def make_pages(words: int, words_per_page: int = 400, seed: int = 0) -> List[List[str]]:
+    rng = random.Random(seed)
+    flat = [make_word(rng) for _ in range(words)]
+    return [flat[i : i + words_per_page] for i in range(0, len(flat), words_per_page)]
+
+
+def write_golden() -> None:
+    """以逐词实现的输出作为黄金文件"""
+    pages = make_pages(4000, seed=20260101)
+    GOLDEN_DIR.mkdir(parents=True, exist_ok=True)
+    with open(GOLDEN_DIR / "pages.json", "w", encoding="utf-8") as f:
+        json.dump(pages, f, ensure_ascii=False, indent=0)
+        f.write("\n")
+    content = "# " + "".join(baseline_format_words(words) for words in pages)
+    with open(GOLDEN_DIR / "expected.md", "w", encoding="utf-8", newline="") as f:
+        f.write(content)
+    print(f"已写入黄金文件: {GOLDEN_DIR}")
+
+
+def bench(words: int, repeat: int) -> None:
+    pages = make_pages(words)
+    processor = PDFProcessor()
+
+    def run(func) -> float:
+        best = float("inf")
+        for _ in range(repeat):
+            start = time.perf_counter()
+            for page in pages:
+                func(page)
+            best = min(best, time.perf_counter() - start)
+        return best
+
+    assert [baseline_format_words(p) for p in pages] == [
+        processor.format_words(p) for p in pages
+    ], "输出不一致"
+    old = run(baseline_format_words)
+    new = run(processor.format_words)
+    print(f"{words} 个词语, {len(pages)} 页, 取 {repeat} 次最短耗时")
+    print(f"  逐词 md_formatter: {old:.3f}s")
+    print(f"  format_words:      {new:.3f}s")
+    print(f"  加速比: {old / new:.2f}x")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="md_formatter 微基准")
+    parser.add_argument("--words", type=int, default=140000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--write-golden", action="store_true")
+    args = parser.parse_args()
+    if args.write_golden:
+        write_golden()
+    else:
+        bench(args.words, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""测试共用的fixture"""
+
+import json
+
+import pytest
+
+from src.config import load_config
+from src.llm_client import LLMClient
+
+
+@pytest.fixture
+def write_config(tmp_path):
+    """
+    按桩服务地址生成配置文件，返回文件路径
+
+    关键字参数按配置节覆盖默认值，如 write_config(stub, http={"max_retries": 3})；
+    默认不退避、不重试
+    """
+
+    def factory(stub, **sections):
+        config = {
+            "url": stub.url,
+            "app": {"id": "app", "key": "key"},
+            "dataset": {"id": "dataset", "key": "key"},
+            "http": {"backoff_base": 0, "max_retries": 0},
+        }
+        for name, values in sections.items():
+            config.setdefault(name, {}).update(values)
+        path = tmp_path / "config.json"
+        path.write_text(json.dumps(config, ensure_ascii=False), encoding="utf-8")
+        return path
+
+    return factory
+
+
+@pytest.fixture
+def make_client(write_config):
+    """以 write_config 生成的配置创建 LLMClient，参数相同"""
+
+    def factory(stub, **sections):
+        return LLMClient(load_config(write_config(stub, **sections)))
+
+    return factory
@@ -0,0 +1,98 @@
+"""
+本地HTTP桩服务
+测试时代替大模型和数据集接口，按 (方法, 路径) 将请求分发给注册的处理函数
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+
+class StubRequest:
+    """桩服务收到的请求"""
+
+    def __init__(self, method: str, path: str, query: Dict[str, str], body: Any):
+        self.method = method
+        self.path = path
+        self.query = query
+        self.body = body
+
+
+# 处理函数返回 (状态码, 响应体) 或 (状态码, 响应体, 响应头)；
+# 响应体为bytes时原样返回，其他类型按JSON编码
+Handler = Callable[[StubRequest], Tuple]
+
+
+class StubServer:
+    """在本机随机端口上运行的HTTP桩服务，用作上下文管理器"""
+
+    def __init__(self):
+        self.routes: Dict[Tuple[str, str], Handler] = {}
+        # 收到的请求依次记录为 (方法, 路径)
+        self.calls: List[Tuple[str, str]] = []
+        self._lock = threading.Lock()
+        self._server: Optional[ThreadingHTTPServer] = None
+
+    def route(self, method: str, path: str, handler: Handler) -> None:
+        """注册处理函数，path 为不含前导斜杠的接口路径"""
+        self.routes[(method, path)] = handler
+
+    @property
+    def url(self) -> str:
+        """服务根地址，以斜杠结尾，与配置中的 url 格式一致"""
+        return f"http://127.0.0.1:{self._server.server_port}/"
+
+    def __enter__(self) -> "StubServer":
+        stub = self
+
+        class RequestHandler(BaseHTTPRequestHandler):
+            def log_message(self, *args) -> None:
+                pass
+
+            def _handle(self) -> None:
+                parts = urlsplit(self.path)
+                path = parts.path.lstrip("/")
+                query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+                length = int(self.headers.get("Content-Length") or 0)
+                raw = self.rfile.read(length) if length else b""
+                body = json.loads(raw) if raw else None
+                with stub._lock:
+                    stub.calls.append((self.command, path))
+
+                handler = stub.routes.get((self.command, path))
+                if handler is None:
+                    result: Tuple = (404, {"message": "not found"})
+                else:
+                    result = handler(StubRequest(self.command, path, query, body))
+                status, payload = result[0], result[1]
+                headers = result[2] if len(result) > 2 else {}
+
+                if isinstance(payload, bytes):
+                    data = payload
+                    headers.setdefault("Content-Type", "application/octet-stream")
+                else:
+                    data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                    headers.setdefault("Content-Type", "application/json")
+                self.send_response(status)
+                for key, value in headers.items():
+                    self.send_header(key, value)
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            do_GET = do_POST = do_PUT = do_DELETE = _handle
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), RequestHandler)
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    def count(self, method: str, path: str) -> int:
+        """某个接口收到的请求次数"""
+        with self._lock:
+            return self.calls.count((method, path))
@@ -0,0 +1,45 @@
+"""BulkIndexer 测试：单个集合的分页或数据格式异常不影响其他集合"""
+
+from src.bulk_indexer import BulkIndexer
+
+from .stub_server import StubServer
+
+
+def test_malformed_collections_do_not_abort_others(make_client):
+    pages = {
+        "good": {"data": {"list": [{"_id": "g1", "q": "条款一"}], "total": 1}},
+        # 分页结构异常
+        "bad_page": {"data": [{"_id": "b1", "q": "条款"}]},
+        # 数据缺少 q 字段
+        "bad_item": {
+            "data": {
+                "list": [{"_id": "m1"}, {"_id": "m2", "q": "条款二"}],
+                "total": 2,
+            }
+        },
+    }
+    updated = []
+
+    def data_list(request):
+        return 200, pages[request.body["collectionId"]]
+
+    def chat(request):
+        answer = '["关键词1", "关键词2", "关键词3", "问题1", "问题2"]'
+        return 200, {"choices": [{"message": {"content": answer}}]}
+
+    def update(request):
+        updated.append(request.body["dataId"])
+        return 200, {"code": 200}
+
+    with StubServer() as stub:
+        stub.route("POST", "api/core/dataset/data/v2/list", data_list)
+        stub.route("POST", "api/v1/chat/completions", chat)
+        stub.route("DELETE", "api/core/chat/delHistory", lambda r: (200, {}))
+        stub.route("PUT", "api/core/dataset/data/update", update)
+
+        indexer = BulkIndexer(make_client(stub, llm={"concurrency": 2}), batch_size=1)
+        stats = indexer.index_collections(["bad_page", "good", "bad_item"])
+
+    assert sorted(updated) == ["g1", "m2"]
+    assert stats.failed_collections == ["bad_page"]
+    assert (stats.items, stats.indexed, stats.failed) == (3, 2, 1)
@@ -0,0 +1,213 @@
+"""BulkUploader 测试：写入请求失败后重试，每个知识块在服务端只保存一份，顺序与本地一致"""
+
+import json
+import threading
+
+from src.bulk_uploader import BulkUploader
+from src.checkpoint import CheckpointJournal
+
+from .stub_server import StubServer
+
+COLLECTION = "api/core/dataset/collection"
+DATA = "api/core/dataset/data"
+TRAINING = "api/core/dataset/training/getDatasetTrainingQueue"
+
+
+class FakeDataset:
+    """内存中的数据集接口；faults 按接口路径依次注入失败: "before" 不写入即返回500，
+    "after" 写入后返回503（请求已在服务端生效）。写入的数据先进入训练队列，
+    查询训练队列后才训练完成、出现在数据列表中；stuck 为True时队列一直不清空"""
+
+    def __init__(self, faults=None, stuck=False):
+        self.collections = {}
+        self.data = {}
+        self.queue = []
+        self.stuck = stuck
+        self.faults = {path: list(kinds) for path, kinds in (faults or {}).items()}
+        self._lock = threading.Lock()
+        self._next_id = 0
+
+    def _new_id(self, prefix):
+        self._next_id += 1
+        return f"{prefix}{self._next_id}"
+
+    def _apply(self, path, write):
+        with self._lock:
+            kinds = self.faults.get(path)
+            fault = kinds.pop(0) if kinds else None
+            if fault == "before":
+                return 500, {"message": "injected"}
+            result = write()
+        if fault == "after":
+            return 503, {"message": "injected"}
+        return 200, {"code": 200, "data": result}
+
+    def install(self, stub):
+        stub.route("POST", f"{COLLECTION}/listV2", self.list_collections)
+        stub.route("POST", f"{COLLECTION}/create", self.create_collection)
+        stub.route("POST", f"{DATA}/v2/list", self.list_data)
+        stub.route("POST", f"{DATA}/pushData", self.push_data)
+        stub.route("DELETE", f"{DATA}/delete", self.delete_data)
+        stub.route("GET", TRAINING, self.training_queue)
+
+    def list_collections(self, request):
+        items = [{"_id": cid, "name": name} for name, cid in self.collections.items()]
+        return 200, {"data": {"list": items, "total": len(items)}}
+
+    def create_collection(self, request):
+        def write():
+            collection_id = self._new_id("col")
+            self.collections[request.body["name"]] = collection_id
+            return collection_id
+
+        return self._apply(f"{COLLECTION}/create", write)
+
+    def list_data(self, request):
+        body = request.body
+        with self._lock:
+            items = [
+                {"_id": data_id, **item}
+                for data_id, item in self.data.items()
+                if item["collectionId"] == body["collectionId"]
+            ]
+        page = items[body["offset"] : body["offset"] + body["pageSize"]]
+        return 200, {"data": {"list": page, "total": len(items)}}
+
+    def push_data(self, request):
+        def write():
+            for item in request.body["data"]:
+                self.queue.append(
+                    {
+                        "collectionId": request.body["collectionId"],
+                        # 服务端会规整内容的首尾空白
+                        "q": item["q"].strip(),
+                        "chunkIndex": item["chunkIndex"],
+                        "chunkId": item["chunkId"],
+                    }
+                )
+            return {"insertLen": len(request.body["data"])}
+
+        return self._apply(f"{DATA}/pushData", write)
+
+    def training_queue(self, request):
+        with self._lock:
+            count = len(self.queue)
+            if not self.stuck:
+                self.train()
+        return 200, {
+            "code": 200,
+            "data": {"rebuildingCount": 0, "trainingCount": count},
+        }
+
+    def train(self):
+        """训练队列中的数据全部完成"""
+        for item in self.queue:
+            self.data[self._new_id("data")] = item
+        self.queue = []
+
+    def delete_data(self, request):
+        with self._lock:
+            self.data.pop(request.query["id"], None)
+        return 200, {"code": 200}
+
+    def stored(self):
+        """训练完成后按服务端顺序列出 (chunkIndex, chunkId, 内容)"""
+        self.train()
+        return sorted(
+            (item["chunkIndex"], item["chunkId"], item["q"])
+            for item in self.data.values()
+        )
+
+
+def write_chunks(chunk_dir, texts):
+    chunk_dir.mkdir(parents=True, exist_ok=True)
+    with open(chunk_dir / "规章.jsonl", "w", encoding="utf-8") as f:
+        for chunk_id, q in texts.items():
+            f.write(json.dumps({"id": chunk_id, "q": q}, ensure_ascii=False) + "\n")
+
+
+def upload(tmp_path, client, journal, **options):
+    uploader = BulkUploader(
+        client,
+        batch_size=2,
+        workers=1,
+        with_indexes=False,
+        journal=journal,
+        queue_interval=0,
+        **options,
+    )
+    return uploader.upload_dir(tmp_path / "chunks")
+
+
+def test_retries_store_every_chunk_once(tmp_path, make_client):
+    # c1 与 c3 内容相同，c2 的尾部空白会被服务端去掉
+    texts = {"c1": "条款一", "c2": "条款二\n", "c3": "条款一", "c4": "条款三"}
+    write_chunks(tmp_path / "chunks", texts)
+    dataset = FakeDataset(
+        {
+            f"{COLLECTION}/create": ["after"],
+            # 第一批写入后返回503，第二批未写入即返回500
+            f"{DATA}/pushData": ["after", "before"],
+        }
+    )
+
+    with StubServer() as stub:
+        dataset.install(stub)
+        client = make_client(stub, http={"max_retries": 3})
+        stats = upload(tmp_path, client, None)
+        creates = stub.count("POST", f"{COLLECTION}/create")
+
+    assert (stats.uploaded, stats.failed) == (4, 0)
+    assert creates == 1
+    assert list(dataset.collections) == ["规章"]
+    assert dataset.stored() == [
+        (i, chunk_id, q.strip()) for i, (chunk_id, q) in enumerate(texts.items())
+    ]
+
+
+def test_retry_gives_up_while_training_queue_is_busy(tmp_path, make_client):
+    write_chunks(tmp_path / "chunks", {"c1": "条款一", "c2": "条款二"})
+    dataset = FakeDataset({f"{DATA}/pushData": ["after"]}, stuck=True)
+
+    with StubServer() as stub:
+        dataset.install(stub)
+        client = make_client(stub, http={"max_retries": 3})
+        stats = upload(tmp_path, client, None, queue_timeout=0)
+        pushes = stub.count("POST", f"{DATA}/pushData")
+
+    # 已写入的数据还在队列中，列表里看不到，不能据此重发
+    assert (stats.uploaded, stats.failed) == (0, 2)
+    assert pushes == 1
+    assert dataset.stored() == [(0, "c1", "条款一"), (1, "c2", "条款二")]
+
+
+def test_rerun_replaces_changed_and_removes_deleted(tmp_path, make_client):
+    texts = {"c1": "条款一", "c2": "条款二", "c3": "条款三"}
+    write_chunks(tmp_path / "chunks", texts)
+    journal_path = tmp_path / "upload_journal.jsonl"
+    dataset = FakeDataset()
+
+    with StubServer() as stub:
+        dataset.install(stub)
+        client = make_client(stub, http={"max_retries": 3})
+        journal = CheckpointJournal(journal_path)
+        upload(tmp_path, client, journal)
+        journal.close()
+
+        journal = CheckpointJournal(journal_path, resume=True)
+        stats = upload(tmp_path, client, journal)
+        journal.close()
+        assert (stats.uploaded, stats.skipped) == (0, 3)
+        assert stub.count("POST", f"{DATA}/pushData") == 2
+
+        dataset.train()
+        texts["c2"] = "条款二（修订）"
+        del texts["c3"]
+        write_chunks(tmp_path / "chunks", texts)
+        journal = CheckpointJournal(journal_path, resume=True)
+        stats = upload(tmp_path, client, journal)
+        journal.close()
+
+    assert (stats.uploaded, stats.skipped) == (1, 1)
+    assert (stats.replaced, stats.removed) == (1, 1)
+    assert dataset.stored() == [(0, "c1", "条款一"), (1, "c2", "条款二（修订）")]
@@ -0,0 +1,55 @@
+"""DocumentMerger 测试：流式拼接后分隔符与来源文件的换行符一致"""
+
+import os
+
+import pytest
+
+from src.document_merger import SEPARATOR, DocumentMerger
+
+
+def write_bytes(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    return path
+
+
+@pytest.mark.parametrize("newline", [b"\r\n", b"\n"])
+def test_separator_uses_source_line_ending(tmp_path, newline):
+    pdf = write_bytes(tmp_path / "pdf" / "表.md", b"# A" + newline + b"x" + newline)
+    llm = write_bytes(tmp_path / "llm" / "表.md", "表格说明".encode() + newline)
+    output = tmp_path / "out" / "表.md"
+    output.parent.mkdir()
+
+    # 块小于文件时同样按首块判断
+    DocumentMerger(chunk_size=2).merge_files([pdf, llm], output)
+
+    sep = SEPARATOR.replace("\n", newline.decode()).encode()
+    assert output.read_bytes() == pdf.read_bytes() + sep + llm.read_bytes()
+    assert not output.with_name("表.md.part").exists()
+
+
+def test_sources_without_newline_use_system_line_ending(tmp_path):
+    first = write_bytes(tmp_path / "a" / "x.md", b"first")
+    second = write_bytes(tmp_path / "b" / "x.md", b"second\r\n")
+    output = tmp_path / "x.md"
+
+    DocumentMerger().merge_files([first, second], output)
+    assert output.read_bytes() == b"first" + b"\r\n\r\n---\r\n\r\n" + b"second\r\n"
+
+    DocumentMerger().merge_files([first, first], output)
+    sep = SEPARATOR.replace("\n", os.linesep).encode()
+    assert output.read_bytes() == b"first" + sep + b"first"
+
+
+def test_merge_md_files_pairs_same_names(tmp_path):
+    pdf_dir, llm_dir, merge_dir = tmp_path / "pdf", tmp_path / "llm", tmp_path / "m"
+    write_bytes(pdf_dir / "甲.md", b"pdf\n")
+    write_bytes(pdf_dir / "乙.md", b"only pdf\n")
+    write_bytes(llm_dir / "甲.md", b"llm\n")
+
+    DocumentMerger(workers=2).merge_md_files(pdf_dir, llm_dir, merge_dir)
+
+    assert sorted(p.name for p in merge_dir.iterdir()) == ["甲.md"]
+    assert (
+        merge_dir / "甲.md"
+    ).read_bytes() == b"pdf\n" + SEPARATOR.encode() + b"llm\n"
@@ -0,0 +1,85 @@
+"""HTTPTransport 熔断器测试"""
+
+import time
+
+import pytest
+
+from src.http_transport import (
+    CircuitBreaker,
+    CircuitOpenError,
+    HTTPTransport,
+    TransportError,
+)
+
+from .stub_server import StubServer
+
+RESET_TIMEOUT = 0.05
+
+
+def make_transport() -> HTTPTransport:
+    return HTTPTransport(
+        max_retries=0,
+        backoff_base=0.0,
+        breaker=CircuitBreaker(failure_threshold=2, reset_timeout=RESET_TIMEOUT),
+    )
+
+
+def open_breaker(transport: HTTPTransport, url: str) -> None:
+    """连续两次503使熔断器打开，等待冷却后进入半开状态"""
+    for _ in range(2):
+        with pytest.raises(TransportError):
+            transport.request("GET", url)
+    assert transport.breaker.state == "open"
+    time.sleep(RESET_TIMEOUT * 2)
+    assert transport.breaker.state == "half_open"
+
+
+def test_client_error_on_half_open_trial_closes_breaker():
+    statuses = iter([503, 503, 404])
+    with StubServer() as stub:
+        stub.route("GET", "item", lambda request: (next(statuses, 200), {}))
+        transport = make_transport()
+        open_breaker(transport, stub.url + "item")
+
+        with pytest.raises(TransportError) as info:
+            transport.request("GET", stub.url + "item")
+        assert not isinstance(info.value, CircuitOpenError)
+        assert info.value.status_code == 404
+
+        # 试探请求得到了响应，熔断器恢复，后续请求正常发出
+        assert transport.breaker.state == "closed"
+        assert transport.request("GET", stub.url + "item").status_code == 200
+
+
+def test_unexpected_error_on_half_open_trial_releases_slot(monkeypatch):
+    with StubServer() as stub:
+        stub.route("GET", "item", lambda request: (503, {}))
+        transport = make_transport()
+        open_breaker(transport, stub.url + "item")
+
+        def broken(*args, **kwargs):
+            raise ValueError("unexpected")
+
+        send = transport.session.request
+        monkeypatch.setattr(transport.session, "request", broken)
+        with pytest.raises(ValueError):
+            transport.request("GET", stub.url + "item")
+
+        # 试探名额已归还，下一次请求仍可作为试探发出
+        monkeypatch.setattr(transport.session, "request", send)
+        stub.route("GET", "item", lambda request: (200, {}))
+        assert transport.request("GET", stub.url + "item").status_code == 200
+        assert transport.breaker.state == "closed"
+
+
+def test_server_error_on_half_open_trial_reopens_breaker():
+    with StubServer() as stub:
+        stub.route("GET", "item", lambda request: (503, {}))
+        transport = make_transport()
+        open_breaker(transport, stub.url + "item")
+
+        with pytest.raises(TransportError):
+            transport.request("GET", stub.url + "item")
+        with pytest.raises(CircuitOpenError):
+            transport.request("GET", stub.url + "item")
+        assert stub.count("GET", "item") == 3
@@ -0,0 +1,111 @@
+"""LLMClient 流式表格增强测试：SSE解析、多轮续写和响应缓存"""
+
+import io
+import json
+
+import pytest
+
+from src.llm_client import LLMResponseError
+
+from .stub_server import StubServer
+
+CHAT = "api/v1/chat/completions"
+DEL_HISTORY = "api/core/chat/delHistory"
+PROMPTS = {"start": "处理表格:\n", "continue": "继续"}
+
+
+def sse(deltas):
+    """按SSE格式编码增量内容"""
+    events = [
+        "data: " + json.dumps({"choices": [{"delta": {"content": delta}}]}) + "\n\n"
+        for delta in deltas
+    ]
+    return ("".join(events) + "data: [DONE]\n\n").encode("utf-8")
+
+
+@pytest.fixture
+def stub():
+    with StubServer() as server:
+        server.route("DELETE", DEL_HISTORY, lambda request: (200, {"code": 200}))
+        yield server
+
+
+@pytest.fixture
+def stream_client(tmp_path, stub, make_client):
+    """流式模式、带响应缓存的客户端，关键字参数覆盖 llm 配置"""
+
+    def factory(**llm):
+        options = {"chunk_tokens": 0, "stream": True}
+        options["cache"] = {"path": str(tmp_path / "cache.db")}
+        return make_client(stub, prompts=PROMPTS, llm={**options, **llm})
+
+    return factory
+
+
+def route_rounds(stub, rounds):
+    """首轮提问返回 rounds[0]，之后每次续写依次返回后面的回答"""
+    replies = iter(rounds)
+
+    def chat(request):
+        assert request.body["stream"] is True
+        return 200, sse(next(replies)), {"Content-Type": "text/event-stream"}
+
+    stub.route("POST", CHAT, chat)
+
+
+def test_stream_writes_rounds_and_fills_cache(stub, stream_client):
+    route_rounds(
+        stub,
+        [
+            ["<think>思考", "</think>\n| 项目 |", " 标准 |"],
+            ["| 餐费 | 100 |<E", "OF>"],
+        ],
+    )
+    client = stream_client()
+
+    out = io.StringIO()
+    client.process_table_with_llm_stream("| a |", "chat", out)
+    expected = "| 项目 | 标准 |\n| 餐费 | 100 |<EOF>"
+    assert out.getvalue() == expected
+    assert stub.count("POST", CHAT) == 2
+
+    # 再次处理相同内容直接使用缓存，不再请求接口
+    again = io.StringIO()
+    client.process_table_with_llm_stream("| a |", "chat", again)
+    assert again.getvalue() == expected
+    # 缓存与非流式方式共用
+    assert client.process_table_with_llm("| a |", "chat") == expected
+    assert stub.count("POST", CHAT) == 2
+
+
+def test_unfinished_stream_is_not_cached(stub, stream_client):
+    route_rounds(stub, [["第一段"], ["第二段"], ["第三段<EOF>"]])
+    client = stream_client(max_rounds=2)
+
+    with pytest.raises(LLMResponseError):
+        client.process_table_with_llm_stream("| a |", "chat", io.StringIO())
+    assert stub.count("POST", CHAT) == 2
+
+    # 未完成的对话没有写入缓存，重新处理时再次请求接口
+    client.max_rounds = 20
+    route_rounds(stub, [["完整<EOF>"]])
+    out = io.StringIO()
+    client.process_table_with_llm_stream("| a |", "chat", out)
+    assert out.getvalue() == "完整<EOF>"
+    assert stub.count("POST", CHAT) == 3
+
+
+def test_malformed_event_raises(stub, stream_client):
+    stub.route(
+        "POST",
+        CHAT,
+        lambda request: (
+            200,
+            b"data: {broken\n\n",
+            {"Content-Type": "text/event-stream"},
+        ),
+    )
+    client = stream_client()
+
+    with pytest.raises(LLMResponseError):
+        client.process_table_with_llm_stream("| a |", "chat", io.StringIO())
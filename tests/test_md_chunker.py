@@ -0,0 +1,120 @@
+"""MarkdownChunker 测试：按条切分、token上限拆分和知识块ID的稳定性"""
+
+import json
+
+from src.md_chunker import MarkdownChunker
+from src.table_chunker import estimate_tokens
+
+DOCUMENT = """# 费用管理办法
+
+## 第一章 总则
+
+#### 第一条 目的
+为规范费用管理，制定本办法。
+
+#### 第二条 范围
+适用于全体员工。
+##### 说明
+#标签 不是标题
+
+## 第二章 报销
+
+### 第一节 差旅
+
+#### 第三条 标准
+按职级执行。
+"""
+
+
+def test_sections_split_at_articles():
+    sections = MarkdownChunker().sections(DOCUMENT)
+
+    assert [(parents, article) for parents, article, _ in sections] == [
+        (["费用管理办法", "第一章 总则"], "第一条 目的"),
+        (["费用管理办法", "第一章 总则"], "第二条 范围"),
+        (["费用管理办法", "第二章 报销", "第一节 差旅"], "第三条 标准"),
+    ]
+    # 五级标题和 # 后没有空格的行属于正文
+    assert sections[1][2] == "适用于全体员工。\n##### 说明\n#标签 不是标题"
+
+
+def test_chunk_records_carry_headings():
+    records = MarkdownChunker().chunk(DOCUMENT, "制度/费用")
+
+    assert [r["index"] for r in records] == [0, 1, 2]
+    assert records[2]["headings"] == [
+        "费用管理办法",
+        "第二章 报销",
+        "第一节 差旅",
+        "第三条 标准",
+    ]
+    assert records[2]["q"] == "\n".join(records[2]["headings"] + ["按职级执行。"])
+    assert all(r["source"] == "制度/费用" for r in records)
+
+
+def test_chunk_ids_are_stable():
+    chunker = MarkdownChunker()
+    first = chunker.chunk(DOCUMENT, "制度/费用")
+
+    assert chunker.chunk(DOCUMENT, "制度/费用") == first
+    assert len({r["id"] for r in first}) == len(first)
+
+    # 修改正文只改变 hash，ID 不变；来源不同时ID不同
+    edited = chunker.chunk(
+        DOCUMENT.replace("按职级执行", "按职级和地区执行"), "制度/费用"
+    )
+    assert [r["id"] for r in edited] == [r["id"] for r in first]
+    assert [r["hash"] != s["hash"] for r, s in zip(edited, first)] == [
+        False,
+        False,
+        True,
+    ]
+    other = chunker.chunk(DOCUMENT, "制度/其他")
+    assert not {r["id"] for r in other} & {r["id"] for r in first}
+
+
+def test_repeated_headings_get_distinct_ids():
+    content = "# 办法\n\n#### 第一条\n甲\n\n#### 第一条\n乙\n"
+    records = MarkdownChunker().chunk(content, "办法")
+    assert len(records) == 2
+    assert records[0]["id"] != records[1]["id"]
+
+
+def test_long_articles_split_within_token_limit():
+    rows = "\n".join(f"| {i} | 项目{i} | {i * 100}元 |" for i in range(80))
+    paragraphs = "\n".join("这是一段较长的说明文字，" * 5 for _ in range(30))
+    content = (
+        "# 办法\n\n#### 第一条 标准\n| | 0 | 1 |\n|---:|:--|:--|\n"
+        + rows
+        + "\n\n#### 第二条 说明\n"
+        + paragraphs
+        + "\n"
+    )
+    chunker = MarkdownChunker(max_tokens=200)
+    records = chunker.chunk(content, "办法")
+
+    tables = [r for r in records if r["headings"][-1] == "第一条 标准"]
+    texts = [r for r in records if r["headings"][-1] == "第二条 说明"]
+    assert len(tables) > 1 and len(texts) > 1
+    for record in records:
+        body = record["q"].split("\n", len(record["headings"]))[-1]
+        assert estimate_tokens(body) <= chunker.max_tokens
+    # 表格拆分后每块都重复列名行和分隔行
+    for record in tables:
+        lines = record["q"].split("\n")
+        assert lines[2:4] == ["| | 0 | 1 |", "|---:|:--|:--|"]
+    assert len({r["id"] for r in records}) == len(records)
+
+
+def test_chunk_file_writes_jsonl(tmp_path):
+    md_path = tmp_path / "费用.md"
+    md_path.write_text(DOCUMENT, encoding="utf-8")
+    output_path = tmp_path / "chunks" / "费用.jsonl"
+
+    count = MarkdownChunker().chunk_file(md_path, output_path, "制度/费用")
+
+    with open(output_path, "r", encoding="utf-8") as f:
+        records = [json.loads(line) for line in f]
+    assert count == len(records) == 3
+    assert records == MarkdownChunker().chunk(DOCUMENT, "制度/费用")
+    assert not output_path.with_suffix(".tmp").exists()
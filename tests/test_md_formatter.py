@@ -0,0 +1,52 @@
+"""
+PDFProcessor.md_formatter / format_words 黄金文件测试
+
+data/md_formatter/expected.md 由改写前逐词调用 md_formatter 的实现生成
+（python -m tests.bench_md_formatter --write-golden），单次扫描整页的结果须与之逐字节一致
+"""
+
+import json
+from pathlib import Path
+
+import pytest
+
+from src.pdf_processor import WORD_SEPARATOR, PDFProcessor
+
+GOLDEN_DIR = Path(__file__).parent / "data" / "md_formatter"
+
+
+@pytest.fixture(scope="module")
+def processor():
+    return PDFProcessor()
+
+
+def test_format_words_matches_golden(processor):
+    with open(GOLDEN_DIR / "pages.json", "r", encoding="utf-8") as f:
+        pages = json.load(f)
+    with open(GOLDEN_DIR / "expected.md", "r", encoding="utf-8", newline="") as f:
+        expected = f.read()
+
+    content = "# " + "".join(processor.format_words(words) for words in pages)
+    assert content == expected
+
+
+@pytest.mark.parametrize(
+    "words, expected",
+    [
+        (["第一章", "总则"], "\n\n## 第一章 总则"),
+        (["第一", "章"], "第一章"),
+        (["第十二条", "费用"], "\n\n#### 第十二条\n费用"),
+        (["1", ".", "12."], "1.\n\n（12）"),
+        (["附件：", "表"], "\n\n## 附件：\n表"),
+        (["（三）", "（", "四）"], "\n\n（三）（四）"),
+    ],
+)
+def test_rules_do_not_match_across_words(processor, words, expected):
+    assert processor.format_words(words) == expected
+
+
+def test_words_containing_separator_fall_back_to_per_word(processor):
+    words = ["第一章", "a" + WORD_SEPARATOR + "1.", "第二条"]
+    assert processor.format_words(words) == "".join(
+        processor.md_formatter(word) for word in words
+    )
@@ -0,0 +1,114 @@
+"""OfficeWorkerPool 测试：以本地替身代替LibreOffice实例"""
+
+import threading
+import time
+
+from src.office_pool import OfficeWorkerPool
+
+
+class FakeBackend:
+    """转换时写出目标文件；文件名含 bad 时转换失败，含 crash 时实例退出并抛出异常"""
+
+    def __init__(self, profile_dir, delay=0.0):
+        self.profile_dir = profile_dir
+        self.delay = delay
+        self.alive = False
+        self.stopped = False
+
+    def start(self):
+        self.alive = True
+
+    def is_alive(self):
+        return self.alive
+
+    def convert(self, input_path, targets):
+        time.sleep(self.delay)
+        if "crash" in input_path.name:
+            self.alive = False
+            raise RuntimeError("实例已退出")
+        if "bad" in input_path.name:
+            return False
+        for format_to, out_dir in targets:
+            (out_dir / f"{input_path.stem}.{format_to}").write_text(
+                self.profile_dir.name, encoding="utf-8"
+            )
+        return True
+
+    def stop(self):
+        self.stopped = True
+
+
+class FakeFactory:
+    def __init__(self, delay=0.0):
+        self.delay = delay
+        self.backends = []
+        self._lock = threading.Lock()
+
+    def __call__(self, libreoffice_path, profile_dir):
+        backend = FakeBackend(profile_dir, self.delay)
+        with self._lock:
+            self.backends.append(backend)
+        return backend
+
+
+def make_inputs(tmp_path, names):
+    paths = []
+    for name in names:
+        path = tmp_path / "in" / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(name, encoding="utf-8")
+        paths.append(path)
+    return paths
+
+
+def test_jobs_spread_across_workers_with_own_profiles(tmp_path):
+    factory = FakeFactory(delay=0.05)
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    inputs = make_inputs(tmp_path, [f"doc{i}.xlsx" for i in range(6)] + ["bad.xlsx"])
+
+    with OfficeWorkerPool(
+        "soffice", workers=3, backend_factory=factory, profile_root=tmp_path / "lo"
+    ) as pool:
+        futures = [
+            pool.submit_multi(path, [("html", out_dir), ("pdf", out_dir)])
+            for path in inputs
+        ]
+        results = pool.join()
+
+    # 每个工作线程各有一个配置目录不同的实例
+    profiles = [backend.profile_dir for backend in factory.backends]
+    assert len(set(profiles)) == len(profiles) == 3
+    assert all(backend.stopped for backend in factory.backends)
+
+    # 失败的任务不影响其他任务
+    assert [future.result() for future in futures] == [True] * 6 + [False]
+    assert results == dict(zip(inputs, [True] * 6 + [False]))
+    assert len(list(out_dir.glob("*.html"))) == len(list(out_dir.glob("*.pdf"))) == 6
+
+    assert all(stats.files > 0 for stats in pool.stats)
+    assert sum(stats.files for stats in pool.stats) == 7
+    assert sum(stats.failures for stats in pool.stats) == 1
+    for stats in pool.stats:
+        assert stats.throughput == stats.files / stats.busy_seconds
+
+
+def test_worker_restarts_dead_backend(tmp_path):
+    factory = FakeFactory()
+    out_dir = tmp_path / "out"
+    out_dir.mkdir()
+    inputs = make_inputs(tmp_path, ["a.docx", "crash.docx", "b.docx"])
+
+    with OfficeWorkerPool(
+        "soffice", workers=1, backend_factory=factory, profile_root=tmp_path / "lo"
+    ) as pool:
+        for path in inputs:
+            pool.submit(path, "pdf", out_dir)
+        results = pool.join()
+
+    assert results == dict(zip(inputs, [True, False, True]))
+    # 实例退出后同一工作线程以原配置目录重新启动实例
+    assert len(factory.backends) == 2
+    assert factory.backends[0].profile_dir == factory.backends[1].profile_dir
+    assert factory.backends[1].stopped
+    assert sorted(p.name for p in out_dir.iterdir()) == ["a.pdf", "b.pdf"]
@@ -0,0 +1,70 @@
+"""PDFProcessor 表格提取页码测试：串行与并行使用同样展开的页码"""
+
+from pathlib import Path
+from types import SimpleNamespace
+
+import pytest
+
+from src import pdf_processor
+from src.pdf_processor import PDFProcessor
+
+
+@pytest.fixture
+def five_pages(monkeypatch):
+    """以5页的替身代替 pdfplumber 打开的PDF"""
+
+    class FakePDF:
+        pages = [object()] * 5
+
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *args):
+            pass
+
+    monkeypatch.setattr(
+        pdf_processor, "pdfplumber", SimpleNamespace(open=lambda path: FakePDF())
+    )
+
+
+@pytest.mark.parametrize(
+    "pages, expected",
+    [
+        ("all", [1, 2, 3, 4, 5]),
+        ("2-end", [2, 3, 4, 5]),
+        ("1,3-9", [1, 3, 4, 5]),
+        ("4,2,4,7", [4, 2]),
+        ("0, ,6", []),
+    ],
+)
+def test_page_numbers_clamp_to_page_count(pages, expected):
+    assert PDFProcessor.page_numbers(pages, 5) == expected
+
+
+@pytest.mark.parametrize("pages", ["all", "2-9", "1,3,8"])
+def test_serial_and_chunked_paths_read_same_pages(five_pages, pages, tmp_path):
+    processor = PDFProcessor(pages_per_chunk=2, table_pages=pages)
+    read = []
+
+    def read_tables(pdf_path, page_str):
+        read.append(page_str)
+        return [f"表{n}" for n in page_str.split(",")]
+
+    processor.read_tables = read_tables
+    processor.pdf_table_to_markdown(Path("报表.pdf"), tmp_path / "报表.md")
+
+    chunks = processor.table_page_chunks(Path("报表.pdf"))
+    assert read == [",".join(chunks)]
+    assert read[0].split(",") == [str(n) for n in PDFProcessor.page_numbers(pages, 5)]
+
+
+def test_process_pdf_file_forwards_parallel(monkeypatch, tmp_path):
+    processor = PDFProcessor()
+    calls = []
+    monkeypatch.setattr(
+        processor,
+        "pdf_table_to_markdown",
+        lambda pdf_path, output_path, parallel=True: calls.append(parallel),
+    )
+    processor.process_pdf_file(Path("费用表.pdf"), tmp_path, False)
+    assert calls == [False]
@@ -0,0 +1,136 @@
+"""PipelineScheduler 测试"""
+
+import threading
+
+import pytest
+
+from src.pipeline_dag import PipelineError, PipelineScheduler, Stage
+
+
+def run_with_timeout(scheduler: PipelineScheduler, timeout: float = 10) -> None:
+    """在线程中运行调度器，超时视为挂起"""
+    errors = []
+
+    def target() -> None:
+        try:
+            scheduler.run()
+        except BaseException as e:
+            errors.append(e)
+
+    thread = threading.Thread(target=target, daemon=True)
+    thread.start()
+    thread.join(timeout)
+    assert not thread.is_alive(), "调度器未结束"
+    if errors:
+        raise errors[0]
+
+
+def test_process_stage_without_inputs_is_rejected():
+    with pytest.raises(ValueError):
+        Stage("x", lambda item: [item], inputs=[])
+    with pytest.raises(ValueError):
+        Stage("x", lambda item: [item], source=lambda: [])
+
+
+def test_cycle_is_rejected():
+    with pytest.raises(ValueError):
+        PipelineScheduler(
+            [
+                Stage("a", lambda item: [item], inputs=["b"]),
+                Stage("b", lambda item: [item], inputs=["a"]),
+            ]
+        )
+
+
+def test_empty_source_finishes():
+    seen = []
+    run_with_timeout(
+        PipelineScheduler(
+            [
+                Stage("s", source=lambda: iter(())),
+                Stage("a", seen.append, inputs=["s"]),
+            ]
+        )
+    )
+    assert seen == []
+
+
+def test_items_flow_through_branches_and_join(tmp_path):
+    merged = []
+    lock = threading.Lock()
+
+    def merge(group):
+        with lock:
+            merged.append((group["double"], group["square"]))
+
+    stages = [
+        Stage("s", source=lambda: iter(range(6)), outputs=[tmp_path / "s"]),
+        Stage("double", lambda x: [(x, x * 2)], inputs=["s"], workers=3),
+        Stage(
+            "square",
+            lambda x: [(x, x * x)],
+            inputs=["s"],
+            accept=lambda x: x % 2 == 0,
+            outputs=[tmp_path / "square"],
+        ),
+        Stage(
+            "merge", merge, inputs=["double", "square"], join_key=lambda pair: pair[0]
+        ),
+    ]
+    scheduler = PipelineScheduler(stages)
+    run_with_timeout(scheduler)
+
+    # 声明的产出目录在运行前创建
+    assert (tmp_path / "s").is_dir() and (tmp_path / "square").is_dir()
+    # 只有两个分支都产出的键才会合并
+    assert sorted(merged) == [((0, 0), (0, 0)), ((2, 4), (2, 4)), ((4, 8), (4, 16))]
+    assert scheduler.states["merge"].items == 3
+
+
+def test_failed_item_does_not_stop_others():
+    done = []
+
+    def work(x):
+        if x == 3:
+            raise RuntimeError("boom")
+        return [x]
+
+    scheduler = PipelineScheduler(
+        [
+            Stage("s", source=lambda: iter(range(5))),
+            Stage("work", work, inputs=["s"], workers=2),
+            Stage("sink", done.append, inputs=["work"]),
+        ]
+    )
+    with pytest.raises(PipelineError):
+        run_with_timeout(scheduler)
+    assert sorted(done) == [0, 1, 2, 4]
+    assert scheduler.states["work"].failures == 1
+
+
+def test_summary_counts_items_failures_and_time():
+    def process(item):
+        if item == 2:
+            raise RuntimeError("坏文件")
+        return [item]
+
+    scheduler = PipelineScheduler(
+        [
+            Stage("s", source=lambda: iter([1, 2, 3])),
+            Stage("a", process, inputs=["s"], workers=2),
+            Stage("b", lambda item: [], inputs=["a"]),
+        ]
+    )
+    with pytest.raises(PipelineError):
+        run_with_timeout(scheduler)
+
+    summary = scheduler.summary()
+    assert list(summary) == ["s", "a", "b"]
+    assert [(e["items"], e["failures"]) for e in summary.values()] == [
+        (3, 0),
+        (3, 1),
+        (2, 0),
+    ]
+    assert all(
+        e["wall_seconds"] >= 0 and e["cpu_seconds"] >= 0 for e in summary.values()
+    )
@@ -0,0 +1,29 @@
+"""按依赖关系调度流水线时，各步骤的统计记入运行指标"""
+
+from types import SimpleNamespace
+
+from src.main import DocumentProcessor
+from src.pipeline_dag import Stage
+
+
+def test_dag_stages_reach_exported_metrics(tmp_path, write_config):
+    processor = DocumentProcessor(
+        write_config(SimpleNamespace(url="http://127.0.0.1/"))
+    )
+
+    def build_stages(source_dir, base_output_dir, pdf_pool=None):
+        return [
+            Stage("convert", source=lambda: iter(["a.html", "b.html"])),
+            Stage("html_table", lambda item: [item], inputs=["convert"]),
+            Stage("llm", lambda item: [], inputs=["html_table"]),
+        ]
+
+    processor._build_pipeline_stages = build_stages
+    processor._run_pipeline_dag(tmp_path, tmp_path / "out", None)
+
+    stages = processor.metrics.to_dict()["stages"]
+    assert set(stages) == {"pipeline", "convert", "html_table", "llm"}
+    for name in ("convert", "html_table", "llm"):
+        assert stages[name]["runs"] == 1
+        assert (stages[name]["items"], stages[name]["failures"]) == (2, 0)
+    assert 'kb_stage_items_total{stage="llm"} 2' in processor.metrics.to_prometheus()
@@ -0,0 +1,59 @@
+"""按步骤执行流水线时的断点续跑测试：有失败项的步骤不记为完成"""
+
+from src.checkpoint import CheckpointJournal
+from src.main import DocumentProcessor
+
+from .stub_server import StubServer
+
+CHAT = "api/v1/chat/completions"
+DEL_HISTORY = "api/core/chat/delHistory"
+
+
+def test_llm_stage_with_failures_is_retried_on_resume(tmp_path, write_config):
+    table_dir, llm_dir = tmp_path / "table", tmp_path / "llm_tab"
+    table_dir.mkdir()
+    for name in ("甲", "乙"):
+        (table_dir / f"{name}.md").write_text(f"| {name} |", encoding="utf-8")
+    journal_path = tmp_path / "journal.jsonl"
+    failing = {"乙"}
+    asked = []
+
+    def chat(request):
+        chat_id = request.body["chatId"]
+        asked.append(chat_id)
+        if chat_id in failing:
+            return 400, {"message": "bad request"}
+        return 200, {"choices": [{"message": {"content": f"{chat_id}<EOF>"}}]}
+
+    with StubServer() as stub:
+        stub.route("POST", CHAT, chat)
+        stub.route("DELETE", DEL_HISTORY, lambda request: (200, {"code": 200}))
+        processor = DocumentProcessor(
+            write_config(stub, prompts={"start": "处理表格:\n", "continue": "继续"})
+        )
+
+        def run_llm_stage(resume):
+            processor.journal = CheckpointJournal(journal_path, resume=resume)
+            try:
+                processor._run_stage(
+                    "llm", processor.process_llm_enhancement, table_dir, llm_dir
+                )
+                return processor.journal.done("stage", "llm")
+            finally:
+                processor.journal.close()
+                processor.journal = None
+
+        assert run_llm_stage(resume=False) is False
+        assert sorted(p.name for p in llm_dir.iterdir()) == ["甲.md"]
+
+        # 续跑时重新执行该步骤，只处理上次失败的文件
+        failing.clear()
+        asked.clear()
+        assert run_llm_stage(resume=True) is True
+        assert asked == ["乙"]
+        assert (llm_dir / "乙.md").read_text(encoding="utf-8") == "乙<EOF>"
+
+        # 全部成功后续跑整体跳过
+        asked.clear()
+        assert run_llm_stage(resume=True) is True
+        assert asked == []
@@ -0,0 +1,77 @@
+"""TableChunker 测试：按token预算拆分表格，每块重复表头"""
+
+from src.table_chunker import TableChunker, estimate_tokens
+
+
+def markdown_table(n_rows):
+    lines = [
+        "# 费用标准",
+        "",
+        "|    | 0 | 1 |",
+        "|---:|:--|:--|",
+        "|  0 | 项目 | 标准 |",
+    ]
+    lines += [f"| {i} | 项目{i} | {i * 100}元 |" for i in range(1, n_rows + 1)]
+    return "\n".join(lines)
+
+
+def html_table(rows):
+    lines = ['<table border="1" cellpadding="4" cellspacing="0">']
+    lines += [" <tr>", "  <th>项目</th>", "  <th>标准</th>", " </tr>"]
+    for row in rows:
+        lines += [" <tr>"] + [f"  {cell}" for cell in row] + [" </tr>"]
+    lines.append("</table>")
+    return "\n".join(lines)
+
+
+def test_estimate_tokens():
+    assert estimate_tokens("") == 0
+    assert estimate_tokens("费用标准") == 4
+    assert estimate_tokens("abcd") == 1
+    assert estimate_tokens("费用 abc") == 3
+
+
+def test_content_within_budget_is_one_chunk():
+    content = markdown_table(3)
+    assert TableChunker(token_budget=1000).split(content) == [content]
+    assert TableChunker(token_budget=0).split(markdown_table(200)) == [
+        markdown_table(200)
+    ]
+
+
+def test_markdown_chunks_fit_budget_and_repeat_header():
+    content = markdown_table(60)
+    chunker = TableChunker(token_budget=120, header_rows=1)
+    chunks = chunker.split(content)
+
+    assert len(chunks) > 1
+    head = content.split("\n")[:5]
+    body = []
+    for chunk in chunks:
+        assert estimate_tokens(chunk) <= chunker.token_budget
+        lines = chunk.split("\n")
+        assert lines[:5] == head
+        body += lines[5:]
+    # 数据行按原顺序各出现一次
+    assert body == content.split("\n")[5:]
+
+
+def test_html_chunks_repeat_header_and_keep_rowspan_rows_together():
+    rows = [[f"<td>项目{i}</td>", f"<td>{i}元</td>"] for i in range(40)]
+    rows[20] = ['<td rowspan="3">合并项目</td>', "<td>20元</td>"]
+    rows[21] = ["<td>21元</td>"]
+    rows[22] = ["<td>22元</td>"]
+    content = html_table(rows)
+    chunks = TableChunker(token_budget=150, header_rows=1).split(content)
+
+    assert len(chunks) > 1
+    header = content.split("\n")[:5]
+    for chunk in chunks:
+        lines = chunk.split("\n")
+        assert lines[:5] == header
+        assert lines[-1] == "</table>"
+    merged = [chunk for chunk in chunks if "合并项目" in chunk]
+    assert len(merged) == 1
+    assert "<td>21元</td>" in merged[0] and "<td>22元</td>" in merged[0]
+    body = [line for chunk in chunks for line in chunk.split("\n")[5:-1]]
+    assert body == content.split("\n")[5:-1]
@@ -0,0 +1,50 @@
+"""WorkbookTableExtractor 测试"""
+
+import pytest
+
+from src.workbook_table import WorkbookTableExtractor
+
+openpyxl = pytest.importorskip("openpyxl")
+
+
+def make_workbook(path):
+    wb = openpyxl.Workbook()
+    ws = wb.active
+    ws.title = "费用"
+    ws.append(["项目", "隐藏1", "隐藏2", "隐藏3", "标准"])
+    ws.append(["餐费", 1, 2, 3, 100])
+    ws.append(["隐藏行", 1, 2, 3, 0])
+    ws.append(["住宿费", 1, 2, 3, 0.5])
+    ws["E4"].number_format = "0.00%"
+    ws.append(["合计说明", None, None, None, None])
+    ws.merge_cells("A5:E5")
+    # 与Excel一样将 B:D 写为一个隐藏区间
+    ws.column_dimensions.group("B", "D", hidden=True)
+    ws.row_dimensions[3].hidden = True
+    wb.save(path)
+
+
+def test_hidden_column_span_and_rows_are_dropped(tmp_path):
+    path = tmp_path / "费用表.xlsx"
+    make_workbook(path)
+
+    sheets = WorkbookTableExtractor().read_sheets(path)
+    assert sheets == [
+        (
+            "费用",
+            [
+                ["项目", "标准"],
+                ["餐费", "100"],
+                ["住宿费", "50.00%"],
+                ["合计说明", ""],
+            ],
+        )
+    ]
+
+
+def test_fill_merged(tmp_path):
+    path = tmp_path / "费用表.xlsx"
+    make_workbook(path)
+
+    ((_, grid),) = WorkbookTableExtractor(fill_merged=True).read_sheets(path)
+    assert grid[-1] == ["合计说明", "合计说明"]